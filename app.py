@@ -68,6 +68,17 @@ def create_app(config_name=None):
     app.register_blueprint(admin_bp, url_prefix='/admin')
     app.register_blueprint(budget_bp)
     
+    # Per-request SQL / serialization timing and slow-query log (no-op unless configured)
+    from services.request_timing import init_request_timing
+    from services.slow_query_log import init_slow_query_log
+    with app.app_context():
+        init_request_timing(app, db.engine)
+        init_slow_query_log(app, db.engine)
+    
+    # Register CLI commands
+    from commands import register_commands
+    register_commands(app)
+    
     # Add context processors
     @app.context_processor
     def inject_globals():
@@ -80,6 +91,10 @@ def create_app(config_name=None):
     with app.app_context():
         db.create_all()
         
+        # Apply schema revisions (indexes) to databases created before them
+        from schema import upgrade_schema
+        upgrade_schema()
+        
         # Create default categories if they don't exist
         from models.category import Category
         from models.user import User
@@ -218,6 +233,11 @@ def create_app(config_name=None):
                         db.session.add(goal)
         
         db.session.commit()
+        
+        # Backfill the monthly rollup for databases created before it existed
+        from models.monthly_rollup import UserMonthlyRollup
+        if not UserMonthlyRollup.query.first() and Transaction.query.first():
+            UserMonthlyRollup.rebuild()
     
     return app
 
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+Endpoint benchmark
+Đo độ trễ (p50/p95/p99), số câu SQL mỗi request và bộ nhớ đỉnh của các endpoint chính
+qua Flask test client, với SQLite in-memory và file, ở nhiều kích thước dữ liệu mỗi user.
+Kết quả in ra dạng JSON để so sánh giữa các lần chạy.
+
+Usage: python benchmarks/endpoint_benchmark.py --sizes 1000,100000,1000000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# (tên, URL, số lần chạy tối đa) - xuất file nặng hơn nhiều nên chạy ít lần hơn
+ENDPOINTS = [
+    ('dashboard', '/api/dashboard/data', None),
+    ('transactions_list', '/api/transactions/list?page=1&per_page=10', None),
+    ('transactions_list_cursor', '/api/transactions/list?mode=cursor&per_page=10', None),
+    ('stats_all_months', '/api/stats/all-months', None),
+    ('predict_spending', '/api/predict-spending', None),
+    ('export_transactions', '/export/transactions?format={export_format}', 3),
+]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='1000,100000,1000000', help='Số giao dịch mỗi user, cách nhau bằng dấu phẩy')
+    parser.add_argument('--backends', default='memory,file', help='memory, file hoặc cả hai')
+    parser.add_argument('--endpoints', default=None, help='Chỉ chạy các endpoint này (tên, cách nhau bằng dấu phẩy)')
+    parser.add_argument('--repeat', type=int, default=30, help='Số request đo cho mỗi endpoint')
+    parser.add_argument('--months', type=int, default=24, help='Số tháng lịch sử của dữ liệu giả lập')
+    parser.add_argument('--export-format', default='xlsx', help='Định dạng cho /export/transactions')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=None, help='Ghi JSON ra file thay vì stdout')
+    return parser.parse_args()
+
+
+class QueryCounter:
+    """Đếm số câu lệnh gửi xuống database qua event before_cursor_execute"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        'p50_ms': round(float(p50), 2),
+        'p95_ms': round(float(p95), 2),
+        'p99_ms': round(float(p99), 2),
+        'mean_ms': round(float(np.mean(samples)), 2),
+        'max_ms': round(float(np.max(samples)), 2),
+    }
+
+
+def run_request(client, url):
+    response = client.get(url)
+    # Đọc hết body (send_file trả về theo khối)
+    response.get_data()
+    response.close()
+    if response.status_code >= 400:
+        raise RuntimeError(f'{url} -> HTTP {response.status_code}')
+    return response
+
+
+def bench_endpoint(client, counter, url, repeat):
+    # Request đầu tiên: cache (danh mục, dự đoán) còn lạnh
+    counter.count = 0
+    start = time.perf_counter()
+    run_request(client, url)
+    first_ms = (time.perf_counter() - start) * 1000
+    first_queries = counter.count
+
+    samples, queries = [], []
+    for _ in range(repeat):
+        counter.count = 0
+        start = time.perf_counter()
+        run_request(client, url)
+        samples.append((time.perf_counter() - start) * 1000)
+        queries.append(counter.count)
+
+    # Bộ nhớ đỉnh đo ở một request riêng vì tracemalloc làm chậm mọi cấp phát
+    tracemalloc.start()
+    run_request(client, url)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = percentiles(samples)
+    result.update({
+        'requests': repeat,
+        'first_request_ms': round(first_ms, 2),
+        'queries_first_request': first_queries,
+        'queries_per_request': round(float(np.mean(queries)), 1),
+        'peak_python_memory_kb': round(peak / 1024, 1),
+    })
+    return result
+
+
+def bench_dataset(backend, rows, args, endpoints):
+    """Tạo database mới, sinh dữ liệu cho một user và đo các endpoint (chạy trong process riêng)"""
+    workdir = tempfile.mkdtemp(prefix='endpoint_bench_')
+    if backend == 'memory':
+        os.environ['DATABASE_URL'] = 'sqlite:///:memory:'
+    else:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ['EXPORT_FOLDER'] = workdir
+
+    from sqlalchemy import event
+    from app import create_app, db
+    from services.data_generator import generate_dataset
+
+    app = create_app()
+    app.config['TESTING'] = True
+    try:
+        with app.app_context():
+            start = time.perf_counter()
+            stats = generate_dataset(users=1, transactions=rows, months=args.months, seed=args.seed)
+            db.session.execute(db.text('ANALYZE'))
+            db.session.commit()
+            seed_seconds = time.perf_counter() - start
+            user_id = db.session.execute(
+                db.text('SELECT id FROM users WHERE username = :username'), {'username': f'gen{args.seed}_0'}
+            ).scalar()
+            print(f'[{backend} / {rows:,} rows] seeded in {seed_seconds:.1f}s', file=sys.stderr)
+
+            engine = db.engine
+
+        # Request chạy ngoài app context ở trên để mỗi request có session riêng như khi chạy thật
+        counter = QueryCounter()
+        event.listen(engine, 'before_cursor_execute', counter)
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(user_id)
+            session['_fresh'] = True
+
+        results = {}
+        for name, url, max_repeat in endpoints:
+            repeat = min(args.repeat, max_repeat) if max_repeat else args.repeat
+            results[name] = bench_endpoint(client, counter, url.format(export_format=args.export_format), repeat)
+            print(f"  {name:26} p50 {results[name]['p50_ms']:9.2f} ms  p99 {results[name]['p99_ms']:9.2f} ms  "
+                  f"{results[name]['queries_per_request']:5} queries", file=sys.stderr)
+        event.remove(engine, 'before_cursor_execute', counter)
+        engine.dispose()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'backend': backend,
+        'rows_per_user': rows,
+        'transactions': stats['transactions'],
+        'seed_seconds': round(seed_seconds, 1),
+        # ru_maxrss: KB trên Linux, byte trên macOS
+        'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == 'darwin' else 1),
+        'endpoints': results,
+    }
+
+
+def main():
+    args = parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+    backends = args.backends.split(',')
+    endpoints = ENDPOINTS
+    if args.endpoints:
+        wanted = set(args.endpoints.split(','))
+        endpoints = [endpoint for endpoint in ENDPOINTS if endpoint[0] in wanted]
+
+    # Mỗi bộ dữ liệu chạy trong một process mới: cache ở cấp module (danh mục, dự đoán)
+    # không lẫn giữa các database và max RSS đo riêng từng lần
+    runs = []
+    for backend in backends:
+        for rows in sizes:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                runs.append(executor.submit(bench_dataset, backend, rows, args, endpoints).result())
+
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'seed': args.seed,
+        'months': args.months,
+        'runs': runs,
+    }
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output)
+        print(f'Wrote {args.output}', file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
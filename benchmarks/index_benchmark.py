@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Index benchmark
+Đo độ trễ các truy vấn dashboard / danh sách giao dịch trên bảng transactions lớn,
+trước và sau khi tạo các index của revision 0001_hot_path_indexes.
+
+Usage: python benchmarks/index_benchmark.py --rows 1000000 --users 200
+"""
+
+import argparse
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000, help='Số giao dịch cần tạo')
+    parser.add_argument('--users', type=int, default=200, help='Số user (user đầu tiên chiếm 10%% số dòng)')
+    parser.add_argument('--repeat', type=int, default=20, help='Số lần chạy mỗi truy vấn')
+    parser.add_argument('--seed', type=int, default=42)
+    return parser.parse_args()
+
+
+def seed_transactions(db, Transaction, user_ids, category_ids, rows, seed):
+    """Chèn giao dịch theo lô bằng executemany (không qua ORM)"""
+    rng = random.Random(seed)
+    today = date.today()
+    heavy_user = user_ids[0]
+    batch = []
+    for i in range(rows):
+        user_id = heavy_user if i % 10 == 0 else rng.choice(user_ids)
+        created = datetime.now() - timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60))
+        batch.append({
+            'amount': float(rng.randint(10, 5000) * 1000),
+            'type': 'expense' if rng.random() < 0.7 else 'income',
+            'description': '',
+            'date': today - timedelta(days=rng.randint(0, 3 * 365)),
+            'created_at': created,
+            'updated_at': created,
+            'user_id': user_id,
+            'category_id': rng.choice(category_ids),
+        })
+        if len(batch) == 50_000:
+            db.session.execute(Transaction.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Transaction.__table__.insert(), batch)
+    db.session.commit()
+
+
+def time_query(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix='index_bench_')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+
+    from app import create_app, db
+    from models import Category, MonthlyBudget, Transaction, User, UserMonthlyRollup
+    from services.dashboard_service import DashboardService
+
+    app = create_app()
+    with app.app_context():
+        users = []
+        for i in range(args.users):
+            users.append(User(username=f'bench{i}', email=f'bench{i}@example.com',
+                              full_name=f'Bench {i}', password_hash='x'))
+        db.session.add_all(users)
+        db.session.commit()
+        user_ids = [u.id for u in users]
+        category_ids = [c.id for c in Category.query.all()]
+
+        print(f'Seeding {args.rows:,} transactions for {args.users} users into {workdir} ...')
+        start = time.perf_counter()
+        seed_transactions(db, Transaction, user_ids, category_ids, args.rows, args.seed)
+        UserMonthlyRollup.rebuild()
+        print(f'Seeded in {time.perf_counter() - start:.1f}s')
+
+        heavy_user = user_ids[0]
+        month_start = date.today().replace(day=1)
+
+        queries = {
+            'dashboard (DashboardService)': lambda: DashboardService.get_dashboard_data(heavy_user),
+            'list page 1': lambda: Transaction.query.filter_by(user_id=heavy_user)
+                .order_by(Transaction.date.desc()).limit(10).all(),
+            'list page 500': lambda: Transaction.query.filter_by(user_id=heavy_user)
+                .order_by(Transaction.date.desc()).offset(5000).limit(10).all(),
+            'list count': lambda: Transaction.query.filter_by(user_id=heavy_user).count(),
+            'month expense sum': lambda: db.session.query(db.func.sum(Transaction.amount)).filter(
+                Transaction.user_id == heavy_user,
+                Transaction.type == 'expense',
+                Transaction.date >= month_start
+            ).scalar(),
+            'admin list page 1': lambda: Transaction.query.order_by(Transaction.created_at.desc()).limit(20).all(),
+            'current budget': lambda: MonthlyBudget.get_current_month_budget(heavy_user),
+        }
+
+        indexes = list(Transaction.__table__.indexes)
+
+        for index in indexes:
+            index.drop(db.engine, checkfirst=True)
+        db.session.execute(db.text('ANALYZE'))
+        before = {name: time_query(fn, args.repeat) for name, fn in queries.items()}
+
+        for index in indexes:
+            index.create(db.engine, checkfirst=True)
+        db.session.execute(db.text('ANALYZE'))
+        after = {name: time_query(fn, args.repeat) for name, fn in queries.items()}
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    print()
+    print(f"{'query':32} {'before (ms)':>12} {'after (ms)':>12} {'speedup':>9}")
+    for name in queries:
+        speedup = before[name] / after[name] if after[name] else float('inf')
+        print(f'{name:32} {before[name]:12.2f} {after[name]:12.2f} {speedup:8.1f}x')
+
+
+if __name__ == '__main__':
+    main()
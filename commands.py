@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+Flask CLI commands
+Các lệnh quản trị chạy bằng `flask <command>`
+"""
+
+import click
+
+
+def register_commands(app):
+    """Đăng ký các lệnh CLI cho ứng dụng"""
+
+    @app.cli.command('rebuild-rollup')
+    @click.option('--user-id', type=int, default=None, help='Chỉ xây dựng lại cho một user')
+    def rebuild_rollup(user_id):
+        """Xây dựng lại bảng user_monthly_rollup từ bảng transactions"""
+        from models.monthly_rollup import UserMonthlyRollup
+
+        rows = UserMonthlyRollup.rebuild(user_id)
+        click.echo(f'✓ Rebuilt user_monthly_rollup: {rows} rows')
+
+    @app.cli.command('upgrade-schema')
+    def upgrade_schema_command():
+        """Áp dụng các schema revision chưa chạy (index, ...)"""
+        from schema import REVISIONS, upgrade_schema
+
+        applied = upgrade_schema()
+        for revision_id, description, _upgrade in REVISIONS:
+            status = 'applied' if revision_id in applied else 'up to date'
+            click.echo(f'{revision_id}: {description} ({status})')
+
+    @app.cli.command('forecast-all')
+    @click.option('--horizon', type=int, default=3, show_default=True, help='Số tháng dự báo')
+    @click.option('--history-months', type=int, default=36, show_default=True, help='Số tháng lịch sử')
+    @click.option('--confidence', type=float, default=0.9, show_default=True)
+    def forecast_all(horizon, history_months, confidence):
+        """Dự báo chi tiêu cho mọi user và ghi vào bảng forecasts"""
+        from services.forecast_service import ForecastService
+
+        stats = ForecastService.forecast_all_users(horizon, history_months, confidence)
+        click.echo(
+            f"✓ Forecast {stats['users']} users, {stats['rows']} rows "
+            f"(load {stats['load_seconds']}s, fit {stats['fit_seconds']}s, write {stats['write_seconds']}s)"
+        )
+
+    @app.cli.command('backtest')
+    @click.option('--synthetic-users', type=int, default=0, help='Dùng N user giả lập thay cho database')
+    @click.option('--months', type=int, default=36, show_default=True, help='Số tháng lịch sử của user giả lập')
+    @click.option('--user-id', 'user_ids', type=int, multiple=True, help='Chỉ chạy cho các user này')
+    @click.option('--workers', type=int, default=None, help='Số process (mặc định: số CPU)')
+    @click.option('--min-history', type=int, default=1, show_default=True, help='Số tháng tối thiểu trước tháng dự đoán')
+    @click.option('--seed', type=int, default=42, show_default=True)
+    @click.option('--json', 'as_json', is_flag=True, help='In kết quả dạng JSON')
+    def backtest(synthetic_users, months, user_ids, workers, min_history, seed, as_json):
+        """Đánh giá MAE / MAPE các phương pháp dự đoán bằng cách phát lại lịch sử"""
+        import json
+        from services.backtest import load_user_series, synthetic_user_series, run_backtest
+
+        if synthetic_users:
+            series_by_user = synthetic_user_series(synthetic_users, months, seed)
+        else:
+            series_by_user = load_user_series(list(user_ids))
+
+        report = run_backtest(series_by_user, workers, min_history)
+        if as_json:
+            click.echo(json.dumps(report, indent=2))
+            return
+
+        click.echo(
+            f"{report['users']} users, {report['predictions']} predictions in {report['seconds']}s "
+            f"({report['users_per_second']} users/s, {report['predictions_per_second']} predictions/s, "
+            f"{report['workers']} workers)"
+        )
+        for method, result in report['methods'].items():
+            click.echo(f"  {method:<18} MAE {result['mae']}  MAPE {result['mape']}%  (n={result['predictions']})")
+
+    @app.cli.command('generate-data')
+    @click.option('--users', type=int, default=100, show_default=True, help='Số user giả lập')
+    @click.option('--transactions', type=int, default=100000, show_default=True, help='Tổng số giao dịch, gồm cả lương hàng tháng')
+    @click.option('--months', type=int, default=24, show_default=True, help='Số tháng lịch sử')
+    @click.option('--seed', type=int, default=42, show_default=True,
+                  help='Cùng seed cho cùng dữ liệu; mỗi seed chỉ dùng một lần trên một database')
+    @click.option('--batch-size', type=int, default=50000, show_default=True)
+    def generate_data(users, transactions, months, seed, batch_size):
+        """Tạo dữ liệu giả lập lớn (user, giao dịch có mùa vụ) để kiểm thử tải"""
+        from services.data_generator import generate_dataset
+
+        def on_progress(written, total):
+            click.echo(f'  {written}/{total} transactions', err=True)
+
+        try:
+            stats = generate_dataset(users, transactions, months, seed, batch_size, progress_callback=on_progress)
+        except RuntimeError as e:
+            raise click.ClickException(str(e))
+        click.echo(
+            f"✓ Generated {stats['users']} users, {stats['transactions']} transactions "
+            f"(insert {stats['insert_seconds']}s, rollup {stats['rollup_seconds']}s, {stats['rollup_rows']} rollup rows)"
+        )
+
+    @app.cli.command('check-query-plans')
+    @click.option('--user-id', type=int, default=None, help='User dùng để chạy (mặc định: user nhiều giao dịch nhất)')
+    @click.option('--verbose', is_flag=True, help='In kế hoạch của mọi câu lệnh')
+    def check_query_plans(user_id, verbose):
+        """Kiểm tra ngân sách câu lệnh và kế hoạch truy vấn của các endpoint nóng"""
+        from services.query_plans import check_query_budgets, check_hot_paths
+
+        failed = 0
+        for result in check_query_budgets(app, user_id):
+            status = 'FAIL' if result.failures else 'ok'
+            click.echo(f'budget {result.name}: {status} ({result.queries}/{result.max_queries} queries)')
+            for failure in result.failures:
+                click.echo(f'  - {failure}')
+            failed += bool(result.failures)
+
+        for result in check_hot_paths(app, user_id):
+            status = 'FAIL' if result.failures else 'ok'
+            click.echo(f'plan {result.name}: {status} ({len(result.statements)} statements)')
+            for failure in result.failures:
+                click.echo(f'  - {failure}')
+            if verbose:
+                for item in result.statements:
+                    click.echo(f"  {item['statement']}")
+                    for detail in item['plan']:
+                        click.echo(f'      {detail}')
+            failed += bool(result.failures)
+        if failed:
+            raise click.ClickException(f'{failed} check(s) failed: query budget or query plan regressions')
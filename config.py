@@ -1,4 +1,5 @@
 import os
+import tempfile
 from datetime import timedelta
 from dotenv import load_dotenv
 
@@ -16,6 +17,17 @@ class Config:
     # Session configuration
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     
+    # Background export jobs
+    EXPORT_FOLDER = os.environ.get('EXPORT_FOLDER') or os.path.join(tempfile.gettempdir(), 'expense_tracker_exports')
+    EXPORT_WORKERS = int(os.environ.get('EXPORT_WORKERS', 2))
+    EXPORT_JOB_TTL = timedelta(hours=24)
+    
+    # Per-request SQL timing (Server-Timing header + JSON log line)
+    SQL_TIMING = os.environ.get('SQL_TIMING', '').lower() in ('1', 'true', 'yes')
+    
+    # Slow-query log with EXPLAIN output (disabled unless a threshold in ms is set)
+    SLOW_QUERY_MS = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+    
     # OCR configuration
     TESSERACT_CMD = r'C:\Program Files\Tesseract-OCR\tesseract.exe'  # Windows path
     
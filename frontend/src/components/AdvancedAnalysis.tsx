@@ -2,15 +2,6 @@ import { useEffect, useState } from 'react';
 import axios from 'axios';
 import { formatCurrency } from '../utils/formatters';
 
-interface MonthData {
-  month: number;
-  year: number;
-  month_name: string;
-  income: number;
-  expense: number;
-  balance: number;
-}
-
 interface TrendAnalysis {
   trend: string;
   trend_description: string;
@@ -48,9 +39,18 @@ interface RatioAnalysis {
   }>;
 }
 
+interface AnalysisResponse {
+  total_months: number;
+  months_analyzed: number;
+  trend: TrendAnalysis;
+  outliers: OutlierAnalysis;
+  correlation: CorrelationAnalysis;
+  ratio_stability: RatioAnalysis;
+}
+
 export default function AdvancedAnalysis() {
   const [loading, setLoading] = useState(true);
-  const [monthsData, setMonthsData] = useState<MonthData[]>([]);
+  const [analysis, setAnalysis] = useState<AnalysisResponse | null>(null);
 
   useEffect(() => {
     loadAnalysisData();
@@ -59,11 +59,11 @@ export default function AdvancedAnalysis() {
   const loadAnalysisData = async () => {
     try {
       setLoading(true);
-      // Call same API as HTML version
-      const res = await axios.get('http://localhost:5001/api/stats/all-months', {
+      // Analyses are computed server-side (cached per data version)
+      const res = await axios.get('http://localhost:5001/api/analysis', {
         withCredentials: true
       });
-      setMonthsData(res.data.months_data || []);
+      setAnalysis(res.data);
     } catch (error) {
       console.error('Error loading advanced analysis:', error);
     } finally {
@@ -71,258 +71,6 @@ export default function AdvancedAnalysis() {
     }
   };
 
-  // Copy exact logic from HTML app.js
-  const analyzeExpenseTrend = (): TrendAnalysis => {
-    if (!monthsData || monthsData.length < 2) {
-      return {
-        trend: 'insufficient_data',
-        trend_description: 'Không đủ dữ liệu để phân tích xu hướng',
-        monthly_changes: []
-      };
-    }
-
-    // Filter out current month
-    const now = new Date();
-    const currentYear = now.getFullYear();
-    const currentMonth = now.getMonth() + 1;
-    const filteredData = monthsData.filter(m => 
-      !(m.year === currentYear && m.month === currentMonth)
-    );
-
-    if (filteredData.length < 2) {
-      return {
-        trend: 'insufficient_data',
-        trend_description: 'Không đủ dữ liệu (cần ít nhất 2 tháng hoàn thành)',
-        monthly_changes: []
-      };
-    }
-
-    const sortedData = [...filteredData].sort((a, b) => {
-      if (a.year !== b.year) return a.year - b.year;
-      return a.month - b.month;
-    });
-
-    const monthlyChanges = [];
-    let totalChange = 0;
-
-    for (let i = 1; i < sortedData.length; i++) {
-      const current = sortedData[i];
-      const previous = sortedData[i - 1];
-      const change = current.expense - previous.expense;
-      const changePercent = previous.expense > 0 ? (change / previous.expense) * 100 : 0;
-
-      monthlyChanges.push({
-        month: `${current.month_name} ${current.year}`,
-        change,
-        change_percent: changePercent
-      });
-
-      totalChange += change;
-    }
-
-    const averageChange = totalChange / monthlyChanges.length;
-    const avgExpense = sortedData.reduce((sum, m) => sum + m.expense, 0) / sortedData.length;
-    const trendStrength = Math.abs(averageChange) / avgExpense * 100;
-
-    let trend = 'stable';
-    let trendDescription = 'Chi tiêu tương đối ổn định';
-
-    if (averageChange > 0 && trendStrength > 5) {
-      trend = 'increasing';
-      trendDescription = `Chi tiêu đang tăng trung bình ${formatCurrency(averageChange)}/tháng`;
-    } else if (averageChange < 0 && trendStrength > 5) {
-      trend = 'decreasing';
-      trendDescription = `Chi tiêu đang giảm trung bình ${formatCurrency(Math.abs(averageChange))}/tháng`;
-    }
-
-    return { trend, trend_description: trendDescription, monthly_changes: monthlyChanges };
-  };
-
-  const detectExpenseOutliers = (): OutlierAnalysis => {
-    if (!monthsData || monthsData.length < 3) {
-      return {
-        outliers: [],
-        message: 'Cần ít nhất 3 tháng dữ liệu để phát hiện bất thường'
-      };
-    }
-
-    // Filter out current month
-    const now = new Date();
-    const currentYear = now.getFullYear();
-    const currentMonth = now.getMonth() + 1;
-    const filteredData = monthsData.filter(m => 
-      !(m.year === currentYear && m.month === currentMonth)
-    );
-
-    if (filteredData.length < 3) {
-      return {
-        outliers: [],
-        message: 'Cần ít nhất 3 tháng hoàn thành để phát hiện bất thường'
-      };
-    }
-
-    const expenses = filteredData.map(m => m.expense);
-    const mean = expenses.reduce((sum, exp) => sum + exp, 0) / expenses.length;
-    const variance = expenses.reduce((sum, exp) => sum + Math.pow(exp - mean, 2), 0) / expenses.length;
-    const stdDev = Math.sqrt(variance);
-
-    const outliers: any[] = [];
-    const threshold = 1.5;
-
-    filteredData.forEach(month => {
-      const zScore = Math.abs(month.expense - mean) / stdDev;
-      if (zScore > threshold) {
-        outliers.push({
-          month: `${month.month_name} ${month.year}`,
-          expense: month.expense,
-          deviation_from_mean: month.expense - mean,
-          type: month.expense > mean ? 'high' : 'low',
-          severity: zScore > 2 ? 'extreme' : 'moderate'
-        });
-      }
-    });
-
-    return {
-      outliers: outliers.sort((a, b) => Math.abs(b.deviation_from_mean) - Math.abs(a.deviation_from_mean)),
-      message: outliers.length > 0 
-        ? `Phát hiện ${outliers.length} tháng có chi tiêu bất thường`
-        : 'Không phát hiện tháng nào có chi tiêu bất thường'
-    };
-  };
-
-  const analyzeIncomeExpenseCorrelation = (): CorrelationAnalysis => {
-    if (!monthsData || monthsData.length < 3) {
-      return {
-        correlation: 0,
-        correlation_strength: 'insufficient_data',
-        description: 'Cần ít nhất 3 tháng dữ liệu để phân tích tương quan'
-      };
-    }
-
-    // Filter out current month
-    const now = new Date();
-    const currentYear = now.getFullYear();
-    const currentMonth = now.getMonth() + 1;
-    const filteredData = monthsData.filter(m => 
-      !(m.year === currentYear && m.month === currentMonth)
-    );
-
-    if (filteredData.length < 3) {
-      return {
-        correlation: 0,
-        correlation_strength: 'insufficient_data',
-        description: 'Cần ít nhất 3 tháng hoàn thành để phân tích tương quan'
-      };
-    }
-
-    const n = filteredData.length;
-    const incomes = filteredData.map(m => m.income);
-    const expenses = filteredData.map(m => m.expense);
-
-    const meanIncome = incomes.reduce((sum, inc) => sum + inc, 0) / n;
-    const meanExpense = expenses.reduce((sum, exp) => sum + exp, 0) / n;
-
-    let numerator = 0;
-    let denomIncome = 0;
-    let denomExpense = 0;
-
-    for (let i = 0; i < n; i++) {
-      const incDiff = incomes[i] - meanIncome;
-      const expDiff = expenses[i] - meanExpense;
-
-      numerator += incDiff * expDiff;
-      denomIncome += incDiff * incDiff;
-      denomExpense += expDiff * expDiff;
-    }
-
-    const correlation = numerator / Math.sqrt(denomIncome * denomExpense);
-
-    let correlationStrength = 'weak';
-    let description = '';
-
-    if (Math.abs(correlation) >= 0.7) {
-      correlationStrength = 'strong';
-      description = correlation > 0
-        ? 'Chi tiêu có tương quan mạnh với thu nhập - khi thu nhập tăng, chi tiêu cũng tăng'
-        : 'Chi tiêu có tương quan nghịch mạnh với thu nhập';
-    } else if (Math.abs(correlation) >= 0.3) {
-      correlationStrength = 'moderate';
-      description = correlation > 0
-        ? 'Chi tiêu có tương quan vừa phải với thu nhập'
-        : 'Chi tiêu có tương quan nghịch vừa phải với thu nhập';
-    } else {
-      correlationStrength = 'weak';
-      description = 'Chi tiêu ít tương quan với thu nhập - chi tiêu tương đối độc lập với thu nhập';
-    }
-
-    return { correlation, correlation_strength: correlationStrength, description };
-  };
-
-  const analyzeExpenseRatioStability = (): RatioAnalysis => {
-    if (!monthsData || monthsData.length < 2) {
-      return {
-        stability: 'insufficient_data',
-        monthly_ratios: [],
-        description: 'Cần ít nhất 2 tháng dữ liệu để phân tích tỷ lệ chi tiêu'
-      };
-    }
-
-    // Filter out current month
-    const now = new Date();
-    const currentYear = now.getFullYear();
-    const currentMonth = now.getMonth() + 1;
-    const filteredData = monthsData.filter(m => 
-      !(m.year === currentYear && m.month === currentMonth)
-    );
-
-    if (filteredData.length < 2) {
-      return {
-        stability: 'insufficient_data',
-        monthly_ratios: [],
-        description: 'Cần ít nhất 2 tháng hoàn thành để phân tích tỷ lệ chi tiêu'
-      };
-    }
-
-    const monthlyRatios = filteredData.map(month => {
-      const ratio = month.income > 0 ? (month.expense / month.income) * 100 : 0;
-      return {
-        month: `${month.month_name} ${month.year}`,
-        ratio,
-        status: ratio > 100 ? 'overspending' : ratio > 80 ? 'high' : ratio > 50 ? 'moderate' : 'low'
-      };
-    });
-
-    const ratios = monthlyRatios.map(m => m.ratio).filter(r => r > 0);
-    if (ratios.length === 0) {
-      return {
-        stability: 'no_data',
-        monthly_ratios: monthlyRatios,
-        description: 'Không có dữ liệu thu nhập để tính tỷ lệ'
-      };
-    }
-
-    const meanRatio = ratios.reduce((sum, r) => sum + r, 0) / ratios.length;
-    const variance = ratios.reduce((sum, r) => sum + Math.pow(r - meanRatio, 2), 0) / ratios.length;
-    const stdDev = Math.sqrt(variance);
-    const coefficientOfVariation = (stdDev / meanRatio) * 100;
-
-    let stability = 'stable';
-    let description = '';
-
-    if (coefficientOfVariation < 15) {
-      stability = 'very_stable';
-      description = `Tỷ lệ chi tiêu rất ổn định (${meanRatio.toFixed(1)}% ± ${stdDev.toFixed(1)}%)`;
-    } else if (coefficientOfVariation < 30) {
-      stability = 'stable';
-      description = `Tỷ lệ chi tiêu tương đối ổn định (${meanRatio.toFixed(1)}% ± ${stdDev.toFixed(1)}%)`;
-    } else {
-      stability = 'unstable';
-      description = `Tỷ lệ chi tiêu không ổn định (${meanRatio.toFixed(1)}% ± ${stdDev.toFixed(1)}%)`;
-    }
-
-    return { stability, monthly_ratios: monthlyRatios, description };
-  };
-
   if (loading) {
     return (
       <div className="row mb-4">
@@ -344,7 +92,7 @@ export default function AdvancedAnalysis() {
     );
   }
 
-  if (monthsData.length === 0) {
+  if (!analysis || analysis.total_months === 0) {
     return (
       <div className="row mb-4">
         <div className="col-12">
@@ -368,10 +116,10 @@ export default function AdvancedAnalysis() {
     );
   }
 
-  const trendAnalysis = analyzeExpenseTrend();
-  const outlierAnalysis = detectExpenseOutliers();
-  const correlationAnalysis = analyzeIncomeExpenseCorrelation();
-  const ratioAnalysis = analyzeExpenseRatioStability();
+  const trendAnalysis = analysis.trend;
+  const outlierAnalysis = analysis.outliers;
+  const correlationAnalysis = analysis.correlation;
+  const ratioAnalysis = analysis.ratio_stability;
 
   const getTrendBadgeClass = (trend: string) => {
     switch (trend) {
@@ -1,29 +1,86 @@
-import React from 'react';
-import { Modal, Card, Badge, Table, Alert, Row, Col } from 'react-bootstrap';
-import type {
-  TrendAnalysis,
-  OutlierAnalysis,
-  CorrelationAnalysis,
-  RatioAnalysis
-} from '../../utils/analysisUtils';
+import React, { useEffect, useState } from 'react';
+import { Modal, Card, Badge, Table, Alert, Row, Col, Spinner } from 'react-bootstrap';
+import { statsAPI } from '../../services/api';
+
+// Response of /api/analysis (services/analysis_service.py), computed server-side per data version
+interface TrendAnalysis {
+  trend: 'increasing' | 'decreasing' | 'stable' | 'insufficient_data';
+  trend_description: string;
+  monthly_changes: Array<{
+    month: string;
+    change: number;
+    change_percent: number;
+  }>;
+}
+
+interface OutlierAnalysis {
+  outliers: Array<{
+    month: string;
+    expense: number;
+    deviation_from_mean: number;
+    type: 'high' | 'low';
+    severity: 'extreme' | 'moderate';
+  }>;
+  message: string;
+}
+
+interface CorrelationAnalysis {
+  correlation: number;
+  correlation_strength: 'strong' | 'moderate' | 'weak' | 'insufficient_data';
+  description: string;
+}
+
+interface RatioAnalysis {
+  stability: 'very_stable' | 'stable' | 'unstable' | 'insufficient_data' | 'no_data';
+  description: string;
+  monthly_ratios: Array<{
+    month: string;
+    ratio: number;
+    status: 'overspending' | 'high' | 'moderate' | 'low';
+  }>;
+}
+
+interface AnalysisResponse {
+  total_months: number;
+  months_analyzed: number;
+  trend: TrendAnalysis;
+  outliers: OutlierAnalysis;
+  correlation: CorrelationAnalysis;
+  ratio_stability: RatioAnalysis;
+}
 
 interface AdvancedAnalysisModalProps {
   show: boolean;
   onHide: () => void;
-  trendAnalysis: TrendAnalysis;
-  outlierAnalysis: OutlierAnalysis;
-  correlationAnalysis: CorrelationAnalysis;
-  ratioAnalysis: RatioAnalysis;
 }
 
-const AdvancedAnalysisModal: React.FC<AdvancedAnalysisModalProps> = ({
-  show,
-  onHide,
-  trendAnalysis,
-  outlierAnalysis,
-  correlationAnalysis,
-  ratioAnalysis
-}) => {
+const AdvancedAnalysisModal: React.FC<AdvancedAnalysisModalProps> = ({ show, onHide }) => {
+  const [analysis, setAnalysis] = useState<AnalysisResponse | null>(null);
+  const [loading, setLoading] = useState(false);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (!show) return;
+    let cancelled = false;
+    setLoading(true);
+    setError(null);
+    // Analyses are computed server-side; the ETag makes reopening the modal a 304
+    statsAPI.analysis()
+      .then((res) => {
+        if (!cancelled) setAnalysis(res.data);
+      })
+      .catch((err) => {
+        console.error('Error loading advanced analysis:', err);
+        if (!cancelled) setError('Không tải được phân tích nâng cao');
+      })
+      .finally(() => {
+        if (!cancelled) setLoading(false);
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [show]);
+
   const formatCurrency = (amount: number) => {
     return new Intl.NumberFormat('vi-VN', {
       style: 'currency',
@@ -96,181 +153,211 @@ const AdvancedAnalysisModal: React.FC<AdvancedAnalysisModalProps> = ({
     }
   };
 
-  return (
-    <Modal show={show} onHide={onHide} size="xl">
-      <Modal.Header closeButton>
-        <Modal.Title>
-          <i className="fas fa-lightbulb me-2"></i>Gợi ý chi tiêu
-        </Modal.Title>
-      </Modal.Header>
-      <Modal.Body>
-        <Row>
-          {/* Xu hướng chi tiêu */}
-          <Col md={6} className="mb-4">
-            <Card className="h-100">
-              <Card.Header className="bg-warning text-dark">
-                <h6 className="mb-0">
-                  <i className="fas fa-chart-line me-2"></i>Xu hướng chi tiêu
-                </h6>
-              </Card.Header>
-              <Card.Body>
-                <div className="text-center mb-3">
-                  <Badge bg={getTrendBadgeClass(trendAnalysis.trend)} className="fs-6">
-                    {getTrendIcon(trendAnalysis.trend)} {trendAnalysis.trend_description}
-                  </Badge>
-                </div>
-                {trendAnalysis.monthly_changes.length > 0 && (
-                  <div className="mt-3">
-                    <h6>Thay đổi theo tháng:</h6>
-                    <div style={{ maxHeight: '200px', overflowY: 'auto' }}>
-                      <Table striped bordered hover size="sm">
-                        <thead>
-                          <tr>
-                            <th>Tháng</th>
-                            <th>Thay đổi</th>
-                            <th>%</th>
+  const renderBody = () => {
+    if (loading && !analysis) {
+      return (
+        <div className="text-center py-4">
+          <Spinner animation="border" variant="success" />
+          <p className="mt-2 text-muted">Đang tải phân tích nâng cao...</p>
+        </div>
+      );
+    }
+    if (error && !analysis) {
+      return <Alert variant="danger">{error}</Alert>;
+    }
+    if (!analysis || analysis.total_months === 0) {
+      return (
+        <Alert variant="warning" className="text-center">
+          Cần ít nhất 2 tháng dữ liệu để thực hiện phân tích nâng cao
+        </Alert>
+      );
+    }
+
+    const {
+      trend: trendAnalysis,
+      outliers: outlierAnalysis,
+      correlation: correlationAnalysis,
+      ratio_stability: ratioAnalysis
+    } = analysis;
+
+    return (
+      <Row>
+        {/* Xu hướng chi tiêu */}
+        <Col md={6} className="mb-4">
+          <Card className="h-100">
+            <Card.Header className="bg-warning text-dark">
+              <h6 className="mb-0">
+                <i className="fas fa-chart-line me-2"></i>Xu hướng chi tiêu
+              </h6>
+            </Card.Header>
+            <Card.Body>
+              <div className="text-center mb-3">
+                <Badge bg={getTrendBadgeClass(trendAnalysis.trend)} className="fs-6">
+                  {getTrendIcon(trendAnalysis.trend)} {trendAnalysis.trend_description}
+                </Badge>
+              </div>
+              {trendAnalysis.monthly_changes.length > 0 && (
+                <div className="mt-3">
+                  <h6>Thay đổi theo tháng:</h6>
+                  <div style={{ maxHeight: '200px', overflowY: 'auto' }}>
+                    <Table striped bordered hover size="sm">
+                      <thead>
+                        <tr>
+                          <th>Tháng</th>
+                          <th>Thay đổi</th>
+                          <th>%</th>
+                        </tr>
+                      </thead>
+                      <tbody>
+                        {trendAnalysis.monthly_changes.map((change, idx) => (
+                          <tr key={idx}>
+                            <td>{change.month}</td>
+                            <td className={change.change >= 0 ? 'text-danger' : 'text-success'}>
+                              {change.change >= 0 ? '+' : ''}{formatCurrency(change.change)}
+                            </td>
+                            <td className={change.change >= 0 ? 'text-danger' : 'text-success'}>
+                              {change.change >= 0 ? '+' : ''}{change.change_percent.toFixed(1)}%
+                            </td>
                           </tr>
-                        </thead>
-                        <tbody>
-                          {trendAnalysis.monthly_changes.map((change, idx) => (
-                            <tr key={idx}>
-                              <td>{change.month}</td>
-                              <td className={change.change >= 0 ? 'text-danger' : 'text-success'}>
-                                {change.change >= 0 ? '+' : ''}{formatCurrency(change.change)}
-                              </td>
-                              <td className={change.change >= 0 ? 'text-danger' : 'text-success'}>
-                                {change.change >= 0 ? '+' : ''}{change.change_percent.toFixed(1)}%
-                              </td>
-                            </tr>
-                          ))}
-                        </tbody>
-                      </Table>
-                    </div>
+                        ))}
+                      </tbody>
+                    </Table>
                   </div>
-                )}
-              </Card.Body>
-            </Card>
-          </Col>
+                </div>
+              )}
+            </Card.Body>
+          </Card>
+        </Col>
 
-          {/* Tháng bất thường */}
-          <Col md={6} className="mb-4">
-            <Card className="h-100">
-              <Card.Header className="bg-danger text-white">
-                <h6 className="mb-0">
-                  <i className="fas fa-exclamation-triangle me-2"></i>Tháng bất thường
-                </h6>
-              </Card.Header>
-              <Card.Body>
-                <Alert variant="info">
-                  <small>{outlierAnalysis.message}</small>
-                </Alert>
-                {outlierAnalysis.outliers.length > 0 && (
-                  <div style={{ maxHeight: '200px', overflowY: 'auto' }}>
-                    {outlierAnalysis.outliers.map((outlier, idx) => (
-                      <div key={idx} className="mb-2 p-2 border rounded">
-                        <div className="d-flex justify-content-between align-items-center">
-                          <strong>{outlier.month}</strong>
-                          <Badge bg={outlier.severity === 'extreme' ? 'danger' : 'warning'}>
-                            {outlier.severity === 'extreme' ? 'Cực kỳ bất thường' : 'Bất thường'}
-                          </Badge>
-                        </div>
-                        <small className="text-muted">
-                          Chi tiêu: {formatCurrency(outlier.expense)}
-                          {' '}({outlier.type === 'high' ? 'Cao' : 'Thấp'} hơn trung bình{' '}
-                          {formatCurrency(Math.abs(outlier.deviation_from_mean))})
-                        </small>
+        {/* Tháng bất thường */}
+        <Col md={6} className="mb-4">
+          <Card className="h-100">
+            <Card.Header className="bg-danger text-white">
+              <h6 className="mb-0">
+                <i className="fas fa-exclamation-triangle me-2"></i>Tháng bất thường
+              </h6>
+            </Card.Header>
+            <Card.Body>
+              <Alert variant="info">
+                <small>{outlierAnalysis.message}</small>
+              </Alert>
+              {outlierAnalysis.outliers.length > 0 && (
+                <div style={{ maxHeight: '200px', overflowY: 'auto' }}>
+                  {outlierAnalysis.outliers.map((outlier, idx) => (
+                    <div key={idx} className="mb-2 p-2 border rounded">
+                      <div className="d-flex justify-content-between align-items-center">
+                        <strong>{outlier.month}</strong>
+                        <Badge bg={outlier.severity === 'extreme' ? 'danger' : 'warning'}>
+                          {outlier.severity === 'extreme' ? 'Cực kỳ bất thường' : 'Bất thường'}
+                        </Badge>
                       </div>
-                    ))}
-                  </div>
-                )}
-              </Card.Body>
-            </Card>
-          </Col>
+                      <small className="text-muted">
+                        Chi tiêu: {formatCurrency(outlier.expense)}
+                        {' '}({outlier.type === 'high' ? 'Cao' : 'Thấp'} hơn trung bình{' '}
+                        {formatCurrency(Math.abs(outlier.deviation_from_mean))})
+                      </small>
+                    </div>
+                  ))}
+                </div>
+              )}
+            </Card.Body>
+          </Card>
+        </Col>
 
-          {/* Tương quan thu nhập - chi tiêu */}
-          <Col md={6} className="mb-4">
-            <Card className="h-100">
-              <Card.Header className="bg-info text-white">
-                <h6 className="mb-0">
-                  <i className="fas fa-link me-2"></i>Tương quan thu nhập - chi tiêu
-                </h6>
-              </Card.Header>
-              <Card.Body>
-                <div className="text-center mb-3">
-                  <Row>
-                    <Col xs={6}>
-                      <div className="border rounded p-2">
-                        <div className="h4 text-primary mb-1">
-                          {(correlationAnalysis.correlation * 100).toFixed(1)}%
-                        </div>
-                        <small className="text-muted">Hệ số tương quan</small>
+        {/* Tương quan thu nhập - chi tiêu */}
+        <Col md={6} className="mb-4">
+          <Card className="h-100">
+            <Card.Header className="bg-info text-white">
+              <h6 className="mb-0">
+                <i className="fas fa-link me-2"></i>Tương quan thu nhập - chi tiêu
+              </h6>
+            </Card.Header>
+            <Card.Body>
+              <div className="text-center mb-3">
+                <Row>
+                  <Col xs={6}>
+                    <div className="border rounded p-2">
+                      <div className="h4 text-primary mb-1">
+                        {(correlationAnalysis.correlation * 100).toFixed(1)}%
                       </div>
-                    </Col>
-                    <Col xs={6}>
-                      <div className="border rounded p-2">
-                        <div className="h6 mb-1">
-                          <Badge bg={getCorrelationBadgeClass(correlationAnalysis.correlation_strength)}>
-                            {getCorrelationText(correlationAnalysis.correlation_strength)}
-                          </Badge>
-                        </div>
-                        <small className="text-muted">Mức độ</small>
+                      <small className="text-muted">Hệ số tương quan</small>
+                    </div>
+                  </Col>
+                  <Col xs={6}>
+                    <div className="border rounded p-2">
+                      <div className="h6 mb-1">
+                        <Badge bg={getCorrelationBadgeClass(correlationAnalysis.correlation_strength)}>
+                          {getCorrelationText(correlationAnalysis.correlation_strength)}
+                        </Badge>
                       </div>
-                    </Col>
-                  </Row>
-                </div>
-                <Alert variant="info">
-                  <small>{correlationAnalysis.description}</small>
-                </Alert>
-              </Card.Body>
-            </Card>
-          </Col>
+                      <small className="text-muted">Mức độ</small>
+                    </div>
+                  </Col>
+                </Row>
+              </div>
+              <Alert variant="info">
+                <small>{correlationAnalysis.description}</small>
+              </Alert>
+            </Card.Body>
+          </Card>
+        </Col>
 
-          {/* Tỷ lệ chi tiêu / thu nhập */}
-          <Col md={6} className="mb-4">
-            <Card className="h-100">
-              <Card.Header className="bg-secondary text-white">
-                <h6 className="mb-0">
-                  <i className="fas fa-percentage me-2"></i>Tỷ lệ chi tiêu / thu nhập
-                </h6>
-              </Card.Header>
-              <Card.Body>
-                <Alert variant={getStabilityAlertClass(ratioAnalysis.stability)} className="text-center">
-                  <strong>{ratioAnalysis.description}</strong>
-                </Alert>
-                {ratioAnalysis.monthly_ratios.length > 0 && (
-                  <div className="mt-3">
-                    <h6>Chi tiết theo tháng:</h6>
-                    <div style={{ maxHeight: '200px', overflowY: 'auto' }}>
-                      <Table striped bordered hover size="sm">
-                        <thead>
-                          <tr>
-                            <th>Tháng</th>
-                            <th>Tỷ lệ</th>
-                            <th>Trạng thái</th>
+        {/* Tỷ lệ chi tiêu / thu nhập */}
+        <Col md={6} className="mb-4">
+          <Card className="h-100">
+            <Card.Header className="bg-secondary text-white">
+              <h6 className="mb-0">
+                <i className="fas fa-percentage me-2"></i>Tỷ lệ chi tiêu / thu nhập
+              </h6>
+            </Card.Header>
+            <Card.Body>
+              <Alert variant={getStabilityAlertClass(ratioAnalysis.stability)} className="text-center">
+                <strong>{ratioAnalysis.description}</strong>
+              </Alert>
+              {ratioAnalysis.monthly_ratios.length > 0 && (
+                <div className="mt-3">
+                  <h6>Chi tiết theo tháng:</h6>
+                  <div style={{ maxHeight: '200px', overflowY: 'auto' }}>
+                    <Table striped bordered hover size="sm">
+                      <thead>
+                        <tr>
+                          <th>Tháng</th>
+                          <th>Tỷ lệ</th>
+                          <th>Trạng thái</th>
+                        </tr>
+                      </thead>
+                      <tbody>
+                        {ratioAnalysis.monthly_ratios.map((ratio, idx) => (
+                          <tr key={idx}>
+                            <td>{ratio.month}</td>
+                            <td>{ratio.ratio.toFixed(1)}%</td>
+                            <td>
+                              <Badge bg={getRatioStatusBadgeClass(ratio.status)}>
+                                {getRatioStatusText(ratio.status)}
+                              </Badge>
+                            </td>
                           </tr>
-                        </thead>
-                        <tbody>
-                          {ratioAnalysis.monthly_ratios.map((ratio, idx) => (
-                            <tr key={idx}>
-                              <td>{ratio.month}</td>
-                              <td>{ratio.ratio.toFixed(1)}%</td>
-                              <td>
-                                <Badge bg={getRatioStatusBadgeClass(ratio.status)}>
-                                  {getRatioStatusText(ratio.status)}
-                                </Badge>
-                              </td>
-                            </tr>
-                          ))}
-                        </tbody>
-                      </Table>
-                    </div>
+                        ))}
+                      </tbody>
+                    </Table>
                   </div>
-                )}
-              </Card.Body>
-            </Card>
-          </Col>
-        </Row>
-      </Modal.Body>
+                </div>
+              )}
+            </Card.Body>
+          </Card>
+        </Col>
+      </Row>
+    );
+  };
+
+  return (
+    <Modal show={show} onHide={onHide} size="xl">
+      <Modal.Header closeButton>
+        <Modal.Title>
+          <i className="fas fa-lightbulb me-2"></i>Gợi ý chi tiêu
+        </Modal.Title>
+      </Modal.Header>
+      <Modal.Body>{renderBody()}</Modal.Body>
     </Modal>
   );
 };
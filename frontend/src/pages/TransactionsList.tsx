@@ -44,6 +44,7 @@ export default function TransactionsList() {
     has_prev: false
   });
   const [categories, setCategories] = useState<Category[]>([]);
+  const [categoriesVersion, setCategoriesVersion] = useState<string>('');
   const [loading, setLoading] = useState(true);
   const [receiptModal, setReceiptModal] = useState<{ show: boolean; image: string }>({
     show: false,
@@ -70,6 +71,8 @@ export default function TransactionsList() {
       if (category) params.category = category;
       if (dateFrom) params.date_from = dateFrom;
       if (dateTo) params.date_to = dateTo;
+      // Server omits categories when our cached version is still current
+      if (categoriesVersion) params.categories_version = categoriesVersion;
 
       // New API returns all data including categories
       const response = await transactionsAPI.getAll(params);
@@ -87,6 +90,9 @@ export default function TransactionsList() {
       if (response.categories && response.categories.length > 0) {
         setCategories(response.categories);
       }
+      if (response.categories_version) {
+        setCategoriesVersion(response.categories_version);
+      }
     } catch (error) {
       console.error('Error loading transactions:', error);
     } finally {
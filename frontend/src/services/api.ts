@@ -66,6 +66,8 @@ export const statsAPI = {
   
   allMonths: () => api.get('/api/stats/all-months'),
   
+  analysis: () => api.get('/api/analysis'),
+  
   getRecentTransactions: (limit = 5) => api.get('/api/transactions/recent', { params: { limit } }),
   
   getSavingsGoals: () => api.get('/api/savings-goals'),
@@ -85,6 +87,9 @@ export const predictionsAPI = {
   
   categories: (months = 3) => api.get('/api/predict-spending/categories', { params: { months } }),
   
+  forecast: (horizon = 3, confidence = 0.9) =>
+    api.get('/api/forecast', { params: { horizon, confidence } }),
+  
   suggestions: () => api.get('/api/spending-suggestions'),
 };
 
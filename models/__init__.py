@@ -4,5 +4,9 @@ from .category import Category
 from .transaction import Transaction
 from .savings_goal import SavingsGoal
 from .monthly_budget import MonthlyBudget
+from .monthly_rollup import UserMonthlyRollup
+from .export_job import ExportJob
+from .forecast import Forecast
+from .data_version import bump_data_version
 
-__all__ = ['User', 'Category', 'Transaction', 'SavingsGoal', 'MonthlyBudget']
\ No newline at end of file
+__all__ = ['User', 'Category', 'Transaction', 'SavingsGoal', 'MonthlyBudget', 'UserMonthlyRollup', 'ExportJob', 'Forecast']
\ No newline at end of file
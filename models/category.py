@@ -11,7 +11,8 @@ class Category(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
-    transactions = db.relationship('Transaction', backref='category', lazy=True)
+    # Dynamic: category.transactions is a query, never every row of the category in memory
+    transactions = db.relationship('Transaction', backref='category', lazy='dynamic')
     
     def __repr__(self):
         return f'<Category {self.name}>'
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+"""
+Per-user data version
+users.data_version tăng mỗi khi giao dịch, mục tiêu tiết kiệm hoặc budget của user thay đổi.
+Các endpoint đọc dùng nó làm ETag và cache kết quả theo version.
+"""
+
+from sqlalchemy import event, inspect
+from models.user import User
+from models.transaction import Transaction
+from models.savings_goal import SavingsGoal
+from models.monthly_budget import MonthlyBudget
+
+
+def bump_data_version(connection, *user_ids):
+    """Tăng data_version của các user (chạy trên connection của flush hiện tại)"""
+    table = User.__table__
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if user_ids:
+        connection.execute(
+            table.update().where(table.c.id.in_(user_ids)).values(data_version=table.c.data_version + 1)
+        )
+
+
+def _owner_ids(target):
+    """user_id hiện tại và user_id cũ (nếu bản ghi bị chuyển sang user khác)"""
+    history = inspect(target).attrs['user_id'].history
+    return [target.user_id] + list(history.deleted or ())
+
+
+def _after_write(mapper, connection, target):
+    bump_data_version(connection, *_owner_ids(target))
+
+
+for _model in (Transaction, SavingsGoal, MonthlyBudget):
+    for _event_name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _event_name, _after_write)
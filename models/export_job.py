@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+Export Job Model
+Lưu trạng thái các job xuất dữ liệu chạy nền
+"""
+
+import uuid
+from datetime import datetime
+from app import db
+
+
+class ExportJob(db.Model):
+    """Job xuất giao dịch ra file, chạy trong thread nền"""
+
+    __tablename__ = 'export_jobs'
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    format = db.Column(db.String(20), nullable=False, default='xlsx')
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    total_rows = db.Column(db.Integer)
+    processed_rows = db.Column(db.Integer, nullable=False, default=0)
+    file_path = db.Column(db.String(500))
+    filename = db.Column(db.String(200))
+    file_size = db.Column(db.Integer)
+    error = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+    def __repr__(self):
+        return f'<ExportJob {self.id} {self.status}>'
+
+    @property
+    def progress_percentage(self):
+        if self.status == ExportJob.STATUS_DONE:
+            return 100.0
+        if not self.total_rows:
+            return 0.0
+        return round(min(100.0, self.processed_rows / self.total_rows * 100), 1)
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'format': self.format,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'progress_percentage': self.progress_percentage,
+            'filename': self.filename,
+            'file_size': self.file_size,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+"""
+Forecast Model
+Dự báo chi tiêu theo tháng được tính trước cho mọi user (flask forecast-all)
+"""
+
+import calendar
+from datetime import datetime
+from app import db
+
+
+class Forecast(db.Model):
+    """Một dòng = dự báo chi tiêu của một user cho một tháng, ghi đè ở mỗi lần chạy batch"""
+
+    __tablename__ = 'forecasts'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)  # 1-12
+    predicted_amount = db.Column(db.Float, nullable=False)
+    lower_amount = db.Column(db.Float, nullable=False)
+    upper_amount = db.Column(db.Float, nullable=False)
+    method = db.Column(db.String(20), nullable=False)
+    history_months = db.Column(db.Integer, nullable=False)
+    trend_slope = db.Column(db.Float, nullable=False)
+    generated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<Forecast {self.user_id} {self.year}/{self.month}: {self.predicted_amount}>'
+
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'year': self.year,
+            'month': self.month,
+            'month_name': calendar.month_name[self.month],
+            'predicted_amount': self.predicted_amount,
+            'lower': self.lower_amount,
+            'upper': self.upper_amount,
+            'method': self.method,
+            'history_months': self.history_months,
+            'trend_slope': self.trend_slope,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None
+        }
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+User Monthly Rollup Model
+Bảng tổng hợp thu chi theo tháng, được cập nhật tăng dần mỗi khi giao dịch thay đổi
+"""
+
+from datetime import datetime
+from sqlalchemy import event, extract, func, inspect
+from app import db
+from models.transaction import Transaction
+
+
+class UserMonthlyRollup(db.Model):
+    """Tổng tiền và số giao dịch theo (user, năm, tháng, loại, danh mục)"""
+
+    __tablename__ = 'user_monthly_rollup'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)  # 1-12
+    type = db.Column(db.String(20), primary_key=True)  # 'income' or 'expense'
+    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), primary_key=True)
+    total_amount = db.Column(db.Float, nullable=False, default=0.0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<UserMonthlyRollup {self.user_id} - {self.year}/{self.month} {self.type}: {self.total_amount}>'
+
+    @staticmethod
+    def period_expr():
+        """Biểu thức số tháng tuyệt đối (year * 12 + month - 1) để lọc theo khoảng tháng"""
+        return UserMonthlyRollup.year * 12 + UserMonthlyRollup.month - 1
+
+    @staticmethod
+    def recent_periods(months, today=None):
+        """Danh sách (year, month) của N tháng dương lịch gần nhất, từ cũ đến mới, gồm tháng hiện tại"""
+        today = today or datetime.now().date()
+        current_period = today.year * 12 + today.month - 1
+        return [(period // 12, period % 12 + 1) for period in range(current_period - months + 1, current_period + 1)]
+
+    @staticmethod
+    def totals_by_type(user_id, year=None, month=None):
+        """Tổng thu nhập / chi tiêu của user, toàn thời gian hoặc trong một tháng"""
+        query = db.session.query(
+            UserMonthlyRollup.type,
+            func.sum(UserMonthlyRollup.total_amount)
+        ).filter(UserMonthlyRollup.user_id == user_id)
+
+        if year is not None:
+            query = query.filter(UserMonthlyRollup.year == year)
+        if month is not None:
+            query = query.filter(UserMonthlyRollup.month == month)
+
+        totals = {'income': 0.0, 'expense': 0.0}
+        for transaction_type, total in query.group_by(UserMonthlyRollup.type).all():
+            totals[transaction_type] = float(total or 0)
+        return totals
+
+    @staticmethod
+    def count_transactions(user_id=None, transaction_type=None, category_id=None):
+        """Số giao dịch (của một user hoặc toàn hệ thống) tính từ bảng tổng hợp"""
+        query = db.session.query(func.sum(UserMonthlyRollup.transaction_count))
+        if user_id is not None:
+            query = query.filter(UserMonthlyRollup.user_id == user_id)
+        if transaction_type:
+            query = query.filter(UserMonthlyRollup.type == transaction_type)
+        if category_id:
+            query = query.filter(UserMonthlyRollup.category_id == category_id)
+        return int(query.scalar() or 0)
+
+    @staticmethod
+    def counts_by_category():
+        """{category_id: số giao dịch} của toàn hệ thống - một truy vấn GROUP BY"""
+        rows = db.session.query(
+            UserMonthlyRollup.category_id,
+            func.sum(UserMonthlyRollup.transaction_count)
+        ).group_by(UserMonthlyRollup.category_id).all()
+        return {category_id: int(count or 0) for category_id, count in rows}
+
+    @staticmethod
+    def monthly_totals(user_id, transaction_type=None, start_period=None, end_period=None):
+        """Tổng theo tháng và loại, sắp xếp theo thời gian.
+
+        start_period / end_period là số tháng tuyệt đối (year * 12 + month - 1), end_period không bao gồm.
+        """
+        period = UserMonthlyRollup.period_expr()
+        query = db.session.query(
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month,
+            UserMonthlyRollup.type,
+            func.sum(UserMonthlyRollup.total_amount).label('total_amount')
+        ).filter(UserMonthlyRollup.user_id == user_id)
+
+        if transaction_type:
+            query = query.filter(UserMonthlyRollup.type == transaction_type)
+        # Lọc theo năm trước để tận dụng khóa chính (user_id, year, month, ...)
+        if start_period is not None:
+            query = query.filter(UserMonthlyRollup.year >= start_period // 12, period >= start_period)
+        if end_period is not None:
+            query = query.filter(UserMonthlyRollup.year <= (end_period - 1) // 12, period < end_period)
+
+        return query.group_by(
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month,
+            UserMonthlyRollup.type
+        ).order_by(
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month
+        ).all()
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """Xây dựng lại bảng tổng hợp từ bảng transactions, trả về số dòng đã ghi"""
+        year = extract('year', Transaction.date)
+        month = extract('month', Transaction.date)
+
+        source = db.session.query(
+            Transaction.user_id,
+            year.label('year'),
+            month.label('month'),
+            Transaction.type,
+            Transaction.category_id,
+            func.sum(Transaction.amount),
+            func.count(Transaction.id)
+        ).group_by(Transaction.user_id, year, month, Transaction.type, Transaction.category_id)
+
+        delete = db.delete(UserMonthlyRollup)
+        if user_id is not None:
+            source = source.filter(Transaction.user_id == user_id)
+            delete = delete.where(UserMonthlyRollup.user_id == user_id)
+
+        db.session.execute(delete)
+        result = db.session.execute(
+            db.insert(UserMonthlyRollup).from_select(
+                ['user_id', 'year', 'month', 'type', 'category_id', 'total_amount', 'transaction_count'],
+                source
+            )
+        )
+        db.session.commit()
+        return result.rowcount
+
+
+def _apply_delta(connection, user_id, transaction_date, transaction_type, category_id, amount, count):
+    """Cộng dồn amount / count vào dòng tổng hợp tương ứng (tạo mới nếu chưa có)"""
+    table = UserMonthlyRollup.__table__
+    key = (
+        (table.c.user_id == user_id) &
+        (table.c.year == transaction_date.year) &
+        (table.c.month == transaction_date.month) &
+        (table.c.type == transaction_type) &
+        (table.c.category_id == category_id)
+    )
+
+    result = connection.execute(
+        table.update().where(key).values(
+            total_amount=table.c.total_amount + amount,
+            transaction_count=table.c.transaction_count + count
+        )
+    )
+    if result.rowcount == 0 and count > 0:
+        connection.execute(table.insert().values(
+            user_id=user_id,
+            year=transaction_date.year,
+            month=transaction_date.month,
+            type=transaction_type,
+            category_id=category_id,
+            total_amount=amount,
+            transaction_count=count
+        ))
+    elif count < 0:
+        connection.execute(table.delete().where(key & (table.c.transaction_count <= 0)))
+
+
+_ROLLUP_FIELDS = ('user_id', 'date', 'type', 'category_id', 'amount')
+
+
+@event.listens_for(Transaction, 'after_insert')
+def _rollup_after_insert(mapper, connection, target):
+    _apply_delta(connection, target.user_id, target.date, target.type,
+                 target.category_id, float(target.amount), 1)
+
+
+@event.listens_for(Transaction, 'after_delete')
+def _rollup_after_delete(mapper, connection, target):
+    _apply_delta(connection, target.user_id, target.date, target.type,
+                 target.category_id, -float(target.amount), -1)
+
+
+@event.listens_for(Transaction, 'after_update')
+def _rollup_after_update(mapper, connection, target):
+    state = inspect(target)
+    old_values = {}
+    changed = False
+    for field in _ROLLUP_FIELDS:
+        history = state.attrs[field].history
+        if history.deleted:
+            old_values[field] = history.deleted[0]
+            changed = True
+        else:
+            old_values[field] = getattr(target, field)
+
+    if not changed:
+        return
+
+    _apply_delta(connection, old_values['user_id'], old_values['date'], old_values['type'],
+                 old_values['category_id'], -float(old_values['amount']), -1)
+    _apply_delta(connection, target.user_id, target.date, target.type,
+                 target.category_id, float(target.amount), 1)
@@ -17,6 +17,10 @@ class SavingsGoal(db.Model):
     # Foreign key
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_savings_goals_user_active', 'user_id', 'is_active'),
+    )
+    
     @property
     def progress_percentage(self):
         if self.target_amount == 0:
@@ -5,24 +5,41 @@ class Transaction(db.Model):
     __tablename__ = 'transactions'
     
     id = db.Column(db.Integer, primary_key=True)
-    amount = db.Column(db.Float, nullable=False)
-    type = db.Column(db.String(20), nullable=False)  # 'income' or 'expense'
+    # active_history: the rollup listeners (models/monthly_rollup.py) need the old value of
+    # amount / type / date / user_id / category_id even when a commit expired the instance
+    amount = db.column_property(db.Column(db.Float, nullable=False), active_history=True)
+    type = db.column_property(db.Column(db.String(20), nullable=False), active_history=True)  # 'income' or 'expense'
     description = db.Column(db.Text)
-    date = db.Column(db.Date, nullable=False, default=datetime.utcnow().date())
+    date = db.column_property(db.Column(db.Date, nullable=False, default=datetime.utcnow().date()), active_history=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Foreign keys
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    category_id = db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False)
+    user_id = db.column_property(db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False), active_history=True)
+    category_id = db.column_property(
+        db.Column(db.Integer, db.ForeignKey('categories.id'), nullable=False), active_history=True
+    )
     
     # Optional receipt image
     receipt_image = db.Column(db.String(200))
     
+    # Indexes for the hot per-user filters and sorts
+    __table_args__ = (
+        db.Index('ix_transactions_user_date', 'user_id', 'date'),
+        db.Index('ix_transactions_user_type_date_amount', 'user_id', 'type', 'date', 'amount'),
+        db.Index('ix_transactions_user_created_at', 'user_id', 'created_at'),
+        db.Index('ix_transactions_category_id', 'category_id'),
+        db.Index('ix_transactions_created_at', 'created_at'),
+    )
+    
     def __repr__(self):
         return f'<Transaction {self.type}: {self.amount}>'
     
-    def to_dict(self):
+    def to_dict(self, categories=None, users=None):
+        """Serialize; pass preloaded {id: obj} maps to avoid lazy-loading category / user per row"""
+        category = categories.get(self.category_id) if categories is not None else self.category
+        user = users.get(self.user_id) if users is not None else self.user
+        
         result = {
             'id': self.id,
             'amount': self.amount,
@@ -37,19 +54,19 @@ class Transaction(db.Model):
         }
         
         # Include category info if available
-        if self.category:
+        if category:
             result['category'] = {
-                'id': self.category.id,
-                'name': self.category.name,
-                'type': self.category.type
+                'id': category.id,
+                'name': category.name,
+                'type': category.type
             }
         
         # Include user info if available (for admin views)
-        if self.user:
+        if user:
             result['user'] = {
-                'id': self.user.id,
-                'username': self.user.username,
-                'email': self.user.email
+                'id': user.id,
+                'username': user.username,
+                'email': user.email
             }
         
         return result
\ No newline at end of file
@@ -17,9 +17,12 @@ class User(UserMixin, db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_login = db.Column(db.DateTime)
+    # Tăng khi dữ liệu của user thay đổi (xem models/data_version.py)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
-    transactions = db.relationship('Transaction', backref='user', lazy=True)
+    # Dynamic: user.transactions is a query, never the whole history in memory
+    transactions = db.relationship('Transaction', backref='user', lazy='dynamic')
     savings_goals = db.relationship('SavingsGoal', backref='user', lazy=True)
     
     def set_password(self, password):
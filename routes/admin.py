@@ -4,9 +4,13 @@ from models.user import User
 from models.transaction import Transaction
 from models.category import Category
 from models.savings_goal import SavingsGoal
+from models.monthly_rollup import UserMonthlyRollup
 from app import db
 from sqlalchemy import func
 from functools import wraps
+from services.serialization import transaction_eager_options
+from services.pagination import keyset_paginate, KeysetPage, InvalidCursor
+from services.category_cache import invalidate_categories
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -78,7 +82,10 @@ def toggle_admin(id):
 @admin_required
 def categories():
     categories = Category.query.order_by(Category.type, Category.name).all()
-    return render_template('admin/categories.html', categories=categories)
+    transaction_counts = dict(db.session.query(
+        Transaction.category_id, func.count(Transaction.id)
+    ).group_by(Transaction.category_id).all())
+    return render_template('admin/categories.html', categories=categories, transaction_counts=transaction_counts)
 
 @admin_bp.route('/categories/add', methods=['GET', 'POST'])
 @login_required
@@ -99,6 +106,7 @@ def add_category():
             )
             db.session.add(category)
             db.session.commit()
+            invalidate_categories()
             flash('Danh mục đã được thêm!', 'success')
             return redirect(url_for('admin.categories'))
     
@@ -109,7 +117,27 @@ def add_category():
 @admin_required
 def transactions():
     page = request.args.get('page', 1, type=int)
-    transactions = Transaction.query.order_by(Transaction.created_at.desc()).paginate(
-        page=page, per_page=20, error_out=False
-    )
+    
+    query = Transaction.query.options(*transaction_eager_options())
+    
+    # Opt-in cursor mode: keyset pagination on (created_at, id) across all users
+    cursor = request.args.get('cursor')
+    if cursor is not None or request.args.get('mode') == 'cursor':
+        try:
+            items, next_cursor = keyset_paginate(query, Transaction.created_at, Transaction.id, cursor, 20)
+        except InvalidCursor:
+            # Cursor bị sửa hoặc cũ: báo lỗi và quay về trang đầu, giữ nguyên bộ lọc
+            flash('Liên kết phân trang không hợp lệ, đã quay về trang đầu.', 'danger')
+            args = request.args.to_dict()
+            args.pop('cursor', None)
+            args['mode'] = 'cursor'
+            return redirect(url_for('admin.transactions', **args))
+        total = UserMonthlyRollup.count_transactions()
+        transactions = KeysetPage(items, 20, next_cursor, total, False)
+    else:
+        transactions = query.order_by(Transaction.created_at.desc()).paginate(
+            page=page, per_page=20, error_out=False, count=False
+        )
+        # Tổng số lấy từ bảng tổng hợp thay vì COUNT(*) quét toàn bảng transactions
+        transactions.total = UserMonthlyRollup.count_transactions()
     return render_template('admin/transactions.html', transactions=transactions)
\ No newline at end of file
@@ -1,24 +1,69 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, Response, stream_with_context, send_file, url_for
 from flask_login import login_required, current_user
 from models.transaction import Transaction
 from models.category import Category
 from models.savings_goal import SavingsGoal
-from models.monthly_budget import MonthlyBudget
 from models.user import User
+from models.monthly_rollup import UserMonthlyRollup
+from models.export_job import ExportJob
 from app import db
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from datetime import datetime, timedelta
 from services.prediction_service import ExpensePredictionService
+from services.dashboard_service import DashboardService
+from services.analysis_service import AnalysisService
+from services.forecast_service import ForecastService, MAX_FORECAST_HORIZON
+from services.pagination import keyset_paginate, transaction_total, InvalidCursor
+from services.serialization import serialize_transactions, transaction_eager_options
+from services.export_jobs import enqueue_export, supported_formats
+from services.export_service import export_formats
+from services.http_cache import data_version_etag
+from services.result_cache import STALE
+from services.category_cache import (
+    get_categories, get_categories_version, category_dicts, invalidate_categories
+)
 import calendar
+import json
+import os
 
 api_bp = Blueprint('api', __name__)
 
+# Upper bound for the months parameter of /stats/monthly
+MAX_STATS_MONTHS = 120
+
+# Rows fetched per round-trip when streaming
+STREAM_BATCH_SIZE = 1000
+
+def with_categories(payload):
+    """Thêm danh sách danh mục vào payload chỉ khi version client gửi (?categories_version=) đã cũ"""
+    version = get_categories_version()
+    payload['categories_version'] = version
+    if request.args.get('categories_version') != version:
+        payload['categories'] = [{'id': c.id, 'name': c.name, 'type': c.type} for c in get_categories()]
+    return payload
+
+def stream_ndjson(query):
+    """Stream query rows as newline-delimited JSON, one batch of ORM rows in memory at a time"""
+    query = query.options(*transaction_eager_options())
+    
+    def generate():
+        for transaction in query.yield_per(STREAM_BATCH_SIZE):
+            yield json.dumps(transaction.to_dict(), ensure_ascii=False) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
 @api_bp.route('/transactions', methods=['GET'])
 @login_required
 def get_transactions():
     """Get all transactions - simple list without pagination"""
-    transactions = Transaction.query.filter_by(user_id=current_user.id).all()
-    return jsonify([t.to_dict() for t in transactions])
+    query = Transaction.query.filter_by(user_id=current_user.id)
+    if request.args.get('stream') == 'ndjson':
+        # Thứ tự theo ix_transactions_user_date (user_id, date, rowid): dòng đầu tiên ra ngay,
+        # SQLite không phải sắp xếp toàn bộ giao dịch của user trước
+        return stream_ndjson(query.order_by(Transaction.date, Transaction.id))
+    
+    transactions = query.all()
+    return jsonify(serialize_transactions(transactions))
 
 @api_bp.route('/transactions/list', methods=['GET'])
 @login_required
@@ -45,31 +90,48 @@ def get_transactions_list():
     if date_to:
         query = query.filter(Transaction.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
     
+    # Opt-in cursor mode: keyset pagination on (date, id), no OFFSET and no per-page COUNT(*)
+    cursor = request.args.get('cursor')
+    if cursor is not None or request.args.get('mode') == 'cursor':
+        try:
+            items, next_cursor = keyset_paginate(query, Transaction.date, Transaction.id, cursor, per_page)
+        except InvalidCursor:
+            return jsonify({'error': 'Cursor không hợp lệ'}), 400
+        
+        total, total_is_estimate = transaction_total(
+            query, current_user.id, transaction_type,
+            int(category_id) if category_id else None, date_from, date_to
+        )
+        return jsonify(with_categories({
+            'transactions': serialize_transactions(items),
+            'total': total,
+            'total_is_estimate': total_is_estimate,
+            'per_page': per_page,
+            'next_cursor': next_cursor,
+            'has_next': next_cursor is not None
+        }))
+    
     # Get paginated results
     pagination = query.order_by(Transaction.date.desc()).paginate(
         page=page, per_page=per_page, error_out=False
     )
     
-    # Get all categories for filter
-    categories = Category.query.all()
-    
-    return jsonify({
-        'transactions': [t.to_dict() for t in pagination.items],
+    return jsonify(with_categories({
+        'transactions': serialize_transactions(pagination.items),
         'total': pagination.total,
         'page': pagination.page,
         'per_page': pagination.per_page,
         'pages': pagination.pages,
         'has_next': pagination.has_next,
-        'has_prev': pagination.has_prev,
-        'categories': [{'id': c.id, 'name': c.name, 'type': c.type} for c in categories]
-    })
+        'has_prev': pagination.has_prev
+    }))
 
 @api_bp.route('/transactions/recent', methods=['GET'])
 @login_required
 def get_recent_transactions():
     limit = int(request.args.get('limit', 5))
     transactions = Transaction.query.filter_by(user_id=current_user.id).order_by(Transaction.date.desc()).limit(limit).all()
-    return jsonify([t.to_dict() for t in transactions])
+    return jsonify(serialize_transactions(transactions))
 
 @api_bp.route('/transactions', methods=['POST'])
 @login_required
@@ -146,124 +208,43 @@ def categories():
         )
         db.session.add(category)
         db.session.commit()
+        invalidate_categories()
         return jsonify(category.to_dict()), 201
     
-    # GET method
-    categories = Category.query.all()
-    return jsonify([c.to_dict() for c in categories])
+    # GET method: cached list, ETag is the category version
+    version = get_categories_version()
+    if version in request.if_none_match:
+        return '', 304
+    response = jsonify(category_dicts())
+    response.set_etag(version)
+    return response
 
 @api_bp.route('/dashboard/data', methods=['GET'])
 @login_required
+@data_version_etag
 def get_dashboard_data():
     """Get ALL dashboard data in one request - exactly like HTML dashboard"""
-    today = datetime.now().date()
-    current_month = today.month
-    current_year = today.year
-    
-    # Calculate date ranges
-    month_start = today.replace(day=1)
-    if current_month == 12:
-        month_end = today.replace(year=current_year + 1, month=1, day=1) - timedelta(days=1)
-    else:
-        month_end = today.replace(month=current_month + 1, day=1) - timedelta(days=1)
-    
-    # Get user's transactions
-    user_transactions = Transaction.query.filter_by(user_id=current_user.id)
-    
-    # Calculate totals
-    total_income = user_transactions.filter_by(type='income').with_entities(func.sum(Transaction.amount)).scalar() or 0
-    total_expense = user_transactions.filter_by(type='expense').with_entities(func.sum(Transaction.amount)).scalar() or 0
-    balance = total_income - total_expense
-    
-    # Monthly totals
-    monthly_income = user_transactions.filter(
-        Transaction.type == 'income',
-        Transaction.date >= month_start,
-        Transaction.date <= month_end
-    ).with_entities(func.sum(Transaction.amount)).scalar() or 0
-    
-    monthly_expense = user_transactions.filter(
-        Transaction.type == 'expense',
-        Transaction.date >= month_start,
-        Transaction.date <= month_end
-    ).with_entities(func.sum(Transaction.amount)).scalar() or 0
-    
-    # Recent transactions
-    recent_transactions = user_transactions.order_by(Transaction.created_at.desc()).limit(5).all()
-    
-    # Category spending this month
-    category_spending = db.session.query(
-        Category.name,
-        func.sum(Transaction.amount).label('total')
-    ).join(Transaction).filter(
-        Transaction.user_id == current_user.id,
-        Transaction.type == 'expense',
-        Transaction.date >= month_start,
-        Transaction.date <= month_end
-    ).group_by(Category.name).order_by(func.sum(Transaction.amount).desc()).limit(5).all()
-    
-    # Savings goals
-    savings_goals = SavingsGoal.query.filter_by(user_id=current_user.id, is_active=True).all()
-    
-    # Budget Alert
-    budget_alert = None
-    current_budget = MonthlyBudget.get_current_month_budget(current_user.id)
-    if current_budget and current_budget.budget_limit > 0:
-        spending_percentage = (float(monthly_expense) / float(current_budget.budget_limit)) * 100
-        
-        if spending_percentage >= 70:
-            if spending_percentage >= 100:
-                alert_level = 'danger'
-                alert_color = 'danger'
-                alert_message = 'Đã vượt quá giới hạn chi tiêu!'
-                alert_title = '🚨 Vượt Giới Hạn!'
-            elif spending_percentage >= 95:
-                alert_level = 'critical'
-                alert_color = 'danger'
-                alert_message = 'Sắp vượt quá giới hạn chi tiêu!'
-                alert_title = '⚠️ Nguy Hiểm!'
-            elif spending_percentage >= 80:
-                alert_level = 'warning'
-                alert_color = 'warning'
-                alert_message = 'Đã chi tiêu gần đạt giới hạn tháng'
-                alert_title = '⚡ Cảnh Báo!'
-            else:
-                alert_level = 'info'
-                alert_color = 'info'
-                alert_message = 'Chi tiêu đang tăng, cần chú ý'
-                alert_title = '📊 Theo Dõi'
-            
-            budget_alert = {
-                'budget_limit': float(current_budget.budget_limit),
-                'current_spending': float(monthly_expense),
-                'remaining_budget': float(current_budget.budget_limit) - float(monthly_expense),
-                'spending_percentage': round(spending_percentage, 1),
-                'alert_level': alert_level,
-                'alert_color': alert_color,
-                'alert_message': alert_message,
-                'alert_title': alert_title,
-                'show_alert': True
-            }
+    data = DashboardService.get_dashboard_data(current_user.id)
     
     return jsonify({
-        'total_income': float(total_income),
-        'total_expense': float(total_expense),
-        'balance': float(balance),
-        'monthly_income': float(monthly_income),
-        'monthly_expense': float(monthly_expense),
-        'recent_transactions': [t.to_dict() for t in recent_transactions],
-        'category_spending': [{'name': cat_name, 'total': float(total)} for cat_name, total in category_spending],
-        'savings_goals': [g.to_dict() for g in savings_goals],
-        'budget_alert': budget_alert
+        'total_income': data['total_income'],
+        'total_expense': data['total_expense'],
+        'balance': data['balance'],
+        'monthly_income': data['monthly_income'],
+        'monthly_expense': data['monthly_expense'],
+        'recent_transactions': serialize_transactions(data['recent_transactions']),
+        'category_spending': [{'name': cat_name, 'total': total} for cat_name, total in data['category_spending']],
+        'savings_goals': [g.to_dict() for g in data['savings_goals']],
+        'budget_alert': data['budget_alert']
     })
 
 @api_bp.route('/stats/overview', methods=['GET'])
 @login_required
+@data_version_etag
 def get_overview_stats():
-    user_transactions = Transaction.query.filter_by(user_id=current_user.id)
-    
-    total_income = user_transactions.filter_by(type='income').with_entities(func.sum(Transaction.amount)).scalar() or 0
-    total_expense = user_transactions.filter_by(type='expense').with_entities(func.sum(Transaction.amount)).scalar() or 0
+    totals = UserMonthlyRollup.totals_by_type(current_user.id)
+    total_income = totals['income']
+    total_expense = totals['expense']
     
     return jsonify({
         'total_income': float(total_income),
@@ -273,41 +254,41 @@ def get_overview_stats():
 
 @api_bp.route('/stats/monthly', methods=['GET'])
 @login_required
+@data_version_etag
 def get_monthly_stats():
-    months = int(request.args.get('months', 6))
-    today = datetime.now().date()
-    
+    months = min(max(int(request.args.get('months', 6)), 1), MAX_STATS_MONTHS)
+    periods = UserMonthlyRollup.recent_periods(months)
+    
+    # One grouped query over the calendar-month range
+    first_year, first_month = periods[0]
+    last_year, last_month = periods[-1]
+    totals_by_month = {}
+    for row in UserMonthlyRollup.monthly_totals(
+        current_user.id,
+        start_period=first_year * 12 + first_month - 1,
+        end_period=last_year * 12 + last_month
+    ):
+        totals_by_month[(row.year, row.month, row.type)] = row.total_amount
+    
+    # Zero-fill months without transactions
     monthly_data = []
-    for i in range(months):
-        target_date = today.replace(day=1) - timedelta(days=i*30)
-        
-        income = Transaction.query.filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'income',
-            extract('month', Transaction.date) == target_date.month,
-            extract('year', Transaction.date) == target_date.year
-        ).with_entities(func.sum(Transaction.amount)).scalar() or 0
-        
-        expense = Transaction.query.filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'expense',
-            extract('month', Transaction.date) == target_date.month,
-            extract('year', Transaction.date) == target_date.year
-        ).with_entities(func.sum(Transaction.amount)).scalar() or 0
+    for year, month in periods:
+        income = float(totals_by_month.get((year, month, 'income')) or 0)
+        expense = float(totals_by_month.get((year, month, 'expense')) or 0)
         
         monthly_data.append({
-            'month': f"{target_date.year}-{target_date.month:02d}",
-            'month_name': calendar.month_name[target_date.month],
-            'income': float(income),
-            'expense': float(expense),
-            'balance': float(income - expense)
+            'month': f"{year}-{month:02d}",
+            'month_name': calendar.month_name[month],
+            'income': income,
+            'expense': expense,
+            'balance': income - expense
         })
     
-    monthly_data.reverse()
     return jsonify(monthly_data)
 
 @api_bp.route('/stats/categories', methods=['GET'])
 @login_required
+@data_version_etag
 def get_category_stats():
     transaction_type = request.args.get('type', 'expense')
     months = int(request.args.get('months', 1))
@@ -403,9 +384,12 @@ def delete_savings_goal(id):
 
 @api_bp.route('/predict-spending', methods=['GET'])
 @login_required
+@data_version_etag
 def predict_spending():
     """Advanced expense prediction using multiple methods"""
-    prediction = ExpensePredictionService.get_comprehensive_prediction(current_user.id)
+    prediction, cache_state = ExpensePredictionService.get_cached_prediction(
+        current_user.id, current_user.data_version
+    )
     
     if not prediction:
         return jsonify({
@@ -413,14 +397,20 @@ def predict_spending():
             'message': 'Cần ít nhất 1 tháng dữ liệu chi tiêu để thực hiện dự đoán'
         }), 400
     
-    return jsonify(prediction)
+    response = jsonify(prediction)
+    response.headers['X-Cache'] = cache_state
+    if cache_state == STALE:
+        # Kết quả của version cũ: không gắn ETag hiện tại để client hỏi lại lần sau
+        response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @api_bp.route('/predict-spending/simple', methods=['GET'])
 @login_required
+@data_version_etag
 def predict_spending_simple():
     """Simple average prediction"""
     months = int(request.args.get('months', 3))
-    prediction = ExpensePredictionService.predict_next_month_simple_average(current_user.id, months)
+    prediction = ExpensePredictionService.predict_current_month_simple_average(current_user.id, months)
     
     if not prediction:
         return jsonify({
@@ -432,10 +422,11 @@ def predict_spending_simple():
 
 @api_bp.route('/predict-spending/weighted', methods=['GET'])
 @login_required
+@data_version_etag
 def predict_spending_weighted():
     """Weighted average prediction (recent months have more weight)"""
     months = int(request.args.get('months', 3))
-    prediction = ExpensePredictionService.predict_next_month_weighted_average(current_user.id, months)
+    prediction = ExpensePredictionService.predict_current_month_weighted_average(current_user.id, months)
     
     if not prediction:
         return jsonify({
@@ -447,10 +438,11 @@ def predict_spending_weighted():
 
 @api_bp.route('/predict-spending/trend', methods=['GET'])
 @login_required
+@data_version_etag
 def predict_spending_trend():
     """Linear regression trend prediction"""
     months = int(request.args.get('months', 6))
-    prediction = ExpensePredictionService.predict_next_month_linear_regression(current_user.id, months)
+    prediction = ExpensePredictionService.predict_current_month_linear_regression(current_user.id, months)
     
     if not prediction:
         return jsonify({
@@ -462,6 +454,7 @@ def predict_spending_trend():
 
 @api_bp.route('/predict-spending/categories', methods=['GET'])
 @login_required
+@data_version_etag
 def predict_spending_by_categories():
     """Predict expenses by category"""
     months = int(request.args.get('months', 3))
@@ -473,6 +466,23 @@ def predict_spending_by_categories():
         'total_predicted': sum(p['predicted_amount'] for p in predictions)
     })
 
+@api_bp.route('/forecast', methods=['GET'])
+@login_required
+@data_version_etag
+def forecast_spending():
+    """Forecast expenses for the next N months with seasonality and bootstrap intervals"""
+    horizon = min(max(request.args.get('horizon', 3, type=int), 1), MAX_FORECAST_HORIZON)
+    confidence = min(max(request.args.get('confidence', 0.9, type=float), 0.5), 0.99)
+    forecast = ForecastService.forecast(current_user.id, horizon, confidence)
+    
+    if not forecast:
+        return jsonify({
+            'error': 'Không đủ dữ liệu để dự báo',
+            'message': 'Cần ít nhất 1 tháng đã kết thúc có dữ liệu chi tiêu'
+        }), 400
+    
+    return jsonify(forecast)
+
 @api_bp.route('/spending-suggestions', methods=['GET'])
 @login_required
 def get_spending_suggestions():
@@ -498,24 +508,11 @@ def get_spending_suggestions():
 
 @api_bp.route('/stats/all-months', methods=['GET'])
 @login_required
+@data_version_etag
 def get_all_months_data():
     """Get income and expense data for all months"""
-    # Query all transactions grouped by month and year
-    monthly_data = db.session.query(
-        extract('year', Transaction.date).label('year'),
-        extract('month', Transaction.date).label('month'),
-        Transaction.type,
-        func.sum(Transaction.amount).label('total_amount')
-    ).filter(
-        Transaction.user_id == current_user.id
-    ).group_by(
-        extract('year', Transaction.date),
-        extract('month', Transaction.date),
-        Transaction.type
-    ).order_by(
-        extract('year', Transaction.date),
-        extract('month', Transaction.date)
-    ).all()
+    # Read monthly totals from the rollup table
+    monthly_data = UserMonthlyRollup.monthly_totals(current_user.id)
     
     # Organize data by month
     months_dict = {}
@@ -553,6 +550,19 @@ def get_all_months_data():
         }
     })
 
+@api_bp.route('/analysis', methods=['GET'])
+@login_required
+@data_version_etag
+def get_advanced_analysis():
+    """Trend, outliers, income/expense correlation and expense ratio stability (completed months)"""
+    analysis, cache_state = AnalysisService.get_cached_analysis(current_user.id, current_user.data_version)
+    
+    response = jsonify(analysis)
+    response.headers['X-Cache'] = cache_state
+    if cache_state == STALE:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
 # Savings Goals CRUD APIs
 @api_bp.route('/savings-goals/<int:id>', methods=['GET'])
 @login_required
@@ -593,6 +603,46 @@ def update_savings_goal(id):
     
     return jsonify(goal.to_dict())
 
+# Background export jobs
+@api_bp.route('/exports', methods=['POST'])
+@login_required
+def create_export():
+    """Queue a background export; poll /api/exports/<id> for progress"""
+    data = request.get_json(silent=True) or {}
+    export_format = data.get('format', request.args.get('format', 'xlsx'))
+    
+    if export_format not in supported_formats():
+        return jsonify({'error': f'Định dạng không được hỗ trợ: {export_format}'}), 400
+    
+    job = enqueue_export(current_user.id, export_format)
+    return jsonify(_export_job_response(job)), 202
+
+@api_bp.route('/exports/<job_id>', methods=['GET'])
+@login_required
+def get_export(job_id):
+    """Export job status and progress"""
+    job = ExportJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    return jsonify(_export_job_response(job))
+
+@api_bp.route('/exports/<job_id>/download', methods=['GET'])
+@login_required
+def download_export(job_id):
+    """Download a finished export; supports Range requests so dropped downloads can resume"""
+    job = ExportJob.query.filter_by(id=job_id, user_id=current_user.id).first_or_404()
+    
+    if job.status != ExportJob.STATUS_DONE or not job.file_path or not os.path.exists(job.file_path):
+        return jsonify({'error': 'File xuất chưa sẵn sàng', 'status': job.status}), 409
+    
+    _writer, _extension, mimetype = export_formats()[job.format]
+    return send_file(job.file_path, mimetype=mimetype,
+                     as_attachment=True, download_name=job.filename, conditional=True)
+
+def _export_job_response(job):
+    result = job.to_dict()
+    result['status_url'] = url_for('api.get_export', job_id=job.id)
+    result['download_url'] = url_for('api.download_export', job_id=job.id) if job.status == ExportJob.STATUS_DONE else None
+    return result
+
 # Admin APIs
 @api_bp.route('/admin/stats', methods=['GET'])
 @login_required
@@ -642,10 +692,12 @@ def get_admin_categories():
         return jsonify({'error': 'Unauthorized'}), 403
     
     categories = Category.query.order_by(Category.type, Category.name).all()
+    # Một truy vấn trên bảng tổng hợp thay vì COUNT(*) cho từng danh mục
+    counts = UserMonthlyRollup.counts_by_category()
     result = []
     for cat in categories:
         cat_dict = cat.to_dict()
-        cat_dict['transaction_count'] = Transaction.query.filter_by(category_id=cat.id).count()
+        cat_dict['transaction_count'] = counts.get(cat.id, 0)
         result.append(cat_dict)
     
     return jsonify(result)
@@ -656,8 +708,14 @@ def get_admin_transactions():
     if not current_user.is_admin:
         return jsonify({'error': 'Unauthorized'}), 403
     
-    transactions = Transaction.query.order_by(Transaction.date.desc()).all()
-    return jsonify([t.to_dict() for t in transactions])
+    # Mới tạo trước (created_at, id giảm dần) như trang admin/transactions, cả khi stream:
+    # đọc theo ix_transactions_created_at thay vì quét và sắp xếp toàn bảng theo date
+    query = Transaction.query.order_by(Transaction.created_at.desc(), Transaction.id.desc())
+    if request.args.get('stream') == 'ndjson':
+        return stream_ndjson(query)
+    
+    transactions = query.all()
+    return jsonify(serialize_transactions(transactions))
 
 @api_bp.route('/admin/recent-users', methods=['GET'])
 @login_required
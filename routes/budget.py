@@ -4,17 +4,36 @@ Budget Management Routes
 API endpoints cho quản lý giới hạn chi tiêu và cảnh báo
 """
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, render_template
 from flask_login import login_required, current_user
-from sqlalchemy import func, extract
+from sqlalchemy import func
 from app import db
 from models import MonthlyBudget, Transaction
+from services.http_cache import data_version_etag
 
 budget_bp = Blueprint('budget', __name__)
 
+
+def current_month_expense(user_id, now):
+    """Tổng chi tiêu tháng hiện tại.
+
+    Lọc theo khoảng ngày [đầu tháng, đầu tháng sau) thay vì extract(year/month) để
+    dùng được index (user_id, type, date, amount) cho cả cột date.
+    """
+    month_start = now.date().replace(day=1)
+    next_month_start = (month_start + timedelta(days=32)).replace(day=1)
+    return db.session.query(func.sum(Transaction.amount)).filter(
+        Transaction.user_id == user_id,
+        Transaction.type == 'expense',
+        Transaction.date >= month_start,
+        Transaction.date < next_month_start
+    ).scalar() or 0
+
+
 @budget_bp.route('/api/budget/current', methods=['GET'])
 @login_required
+@data_version_etag
 def get_current_budget():
     """Lấy thông tin budget tháng hiện tại"""
     try:
@@ -34,12 +53,7 @@ def get_current_budget():
         
         # Calculate current spending
         now = datetime.now()
-        current_spending = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'expense',
-            extract('year', Transaction.date) == now.year,
-            extract('month', Transaction.date) == now.month
-        ).scalar() or 0
+        current_spending = current_month_expense(current_user.id, now)
         
         spending_percentage = (float(current_spending) / float(budget.budget_limit) * 100) if budget.budget_limit > 0 else 0
         remaining_budget = float(budget.budget_limit) - float(current_spending)
@@ -155,12 +169,7 @@ def get_budget_alert():
             })
         
         # Tính tổng chi tiêu tháng hiện tại
-        current_spending = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'expense',
-            extract('year', Transaction.date) == now.year,
-            extract('month', Transaction.date) == now.month
-        ).scalar() or 0
+        current_spending = current_month_expense(current_user.id, now)
         
         # Tính phần trăm chi tiêu
         spending_percentage = (float(current_spending) / float(budget.budget_limit)) * 100
@@ -219,13 +228,7 @@ def budget_settings():
     if current_budget:
         now = datetime.now()
         # Tính tổng chi tiêu tháng hiện tại
-        from sqlalchemy import func, extract
-        current_spending = db.session.query(func.sum(Transaction.amount)).filter(
-            Transaction.user_id == current_user.id,
-            Transaction.type == 'expense',
-            extract('year', Transaction.date) == now.year,
-            extract('month', Transaction.date) == now.month
-        ).scalar() or 0
+        current_spending = current_month_expense(current_user.id, now)
         
         spending_percentage = (float(current_spending) / float(current_budget.budget_limit)) * 100
         
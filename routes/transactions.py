@@ -1,13 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
 from models.transaction import Transaction
-from models.category import Category
+from services.category_cache import get_categories
 from models.savings_goal import SavingsGoal
 from app import db
 from datetime import datetime
 import os
 from werkzeug.utils import secure_filename
 from services.ocr_service import get_ocr_service
+from services.serialization import transaction_eager_options
+from services.pagination import keyset_paginate, transaction_total, KeysetPage, InvalidCursor
 
 transactions_bp = Blueprint('transactions', __name__)
 
@@ -29,7 +31,7 @@ def index():
     date_to = request.args.get('date_to')
     
     # Build query
-    query = Transaction.query.filter_by(user_id=current_user.id)
+    query = Transaction.query.options(*transaction_eager_options(include_user=False)).filter_by(user_id=current_user.id)
     
     if transaction_type:
         query = query.filter_by(type=transaction_type)
@@ -40,11 +42,29 @@ def index():
     if date_to:
         query = query.filter(Transaction.date <= datetime.strptime(date_to, '%Y-%m-%d').date())
     
-    transactions = query.order_by(Transaction.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Opt-in cursor mode: keyset pagination on (date, id)
+    cursor = request.args.get('cursor')
+    if cursor is not None or request.args.get('mode') == 'cursor':
+        try:
+            items, next_cursor = keyset_paginate(query, Transaction.date, Transaction.id, cursor, per_page)
+        except InvalidCursor:
+            # Cursor bị sửa hoặc cũ: báo lỗi và quay về trang đầu, giữ nguyên bộ lọc
+            flash('Liên kết phân trang không hợp lệ, đã quay về trang đầu.', 'danger')
+            args = request.args.to_dict()
+            args.pop('cursor', None)
+            args['mode'] = 'cursor'
+            return redirect(url_for('transactions.index', **args))
+        total, total_is_estimate = transaction_total(
+            query, current_user.id, transaction_type,
+            int(category_id) if category_id else None, date_from, date_to
+        )
+        transactions = KeysetPage(items, per_page, next_cursor, total, total_is_estimate)
+    else:
+        transactions = query.order_by(Transaction.date.desc()).paginate(
+            page=page, per_page=per_page, error_out=False
+        )
     
-    categories = Category.query.all()
+    categories = get_categories()
     
     return render_template('transactions/index.html',
                          transactions=transactions,
@@ -100,7 +120,7 @@ def add():
         flash('Giao dịch đã được thêm thành công!', 'success')
         return redirect(url_for('transactions.index'))
     
-    categories = Category.query.all()
+    categories = get_categories()
     return render_template('transactions/add.html', categories=categories)
 
 @transactions_bp.route('/edit/<int:id>', methods=['GET', 'POST'])
@@ -149,7 +169,7 @@ def edit(id):
         flash('Giao dịch đã được cập nhật!', 'success')
         return redirect(url_for('transactions.index'))
     
-    categories = Category.query.all()
+    categories = get_categories()
     return render_template('transactions/edit.html', transaction=transaction, categories=categories)
 
 @transactions_bp.route('/delete/<int:id>', methods=['POST'])
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+Schema revisions
+db.create_all() chỉ tạo bảng mới, không thêm index vào bảng đã tồn tại.
+Các revision ở đây được áp dụng một lần cho database cũ và được ghi lại trong bảng schema_revisions.
+"""
+
+from datetime import datetime
+from app import db
+
+schema_revisions = db.Table(
+    'schema_revisions',
+    db.Column('id', db.String(50), primary_key=True),
+    db.Column('applied_at', db.DateTime, default=datetime.utcnow)
+)
+
+
+def _create_declared_indexes(*table_names):
+    """Tạo các index đã khai báo trên model nếu chưa có"""
+    for table_name in table_names:
+        for index in db.metadata.tables[table_name].indexes:
+            index.create(db.engine, checkfirst=True)
+
+
+def _add_declared_columns(table_name, *column_names):
+    """Thêm các cột đã khai báo trên model vào bảng cũ nếu chưa có"""
+    table = db.metadata.tables[table_name]
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns(table_name)}
+    with db.engine.begin() as connection:
+        for column_name in column_names:
+            if column_name in existing:
+                continue
+            column = table.c[column_name]
+            ddl = f'ALTER TABLE {table_name} ADD COLUMN {column_name} {column.type.compile(db.engine.dialect)}'
+            if not column.nullable:
+                ddl += f' NOT NULL DEFAULT {column.server_default.arg}'
+            connection.execute(db.text(ddl))
+
+
+# (revision id, mô tả, hàm nâng cấp) - chỉ thêm vào cuối danh sách
+REVISIONS = [
+    ('0001_hot_path_indexes', 'Composite indexes on transactions and savings_goals',
+     lambda: _create_declared_indexes('transactions', 'savings_goals')),
+    ('0002_user_data_version', 'users.data_version counter for ETags and result caches',
+     lambda: _add_declared_columns('users', 'data_version')),
+]
+
+
+def upgrade_schema():
+    """Áp dụng các revision chưa chạy, trả về danh sách revision đã áp dụng"""
+    schema_revisions.create(db.engine, checkfirst=True)
+    applied = {row.id for row in db.session.execute(db.select(schema_revisions.c.id))}
+
+    newly_applied = []
+    for revision_id, _description, upgrade in REVISIONS:
+        if revision_id in applied:
+            continue
+        upgrade()
+        db.session.execute(schema_revisions.insert().values(id=revision_id, applied_at=datetime.utcnow()))
+        db.session.commit()
+        newly_applied.append(revision_id)
+
+    return newly_applied
@@ -0,0 +1,263 @@
+# -*- coding: utf-8 -*-
+"""
+Analysis Service
+Phân tích nâng cao (xu hướng, tháng bất thường, tương quan thu chi, độ ổn định tỷ lệ chi tiêu)
+tính bằng NumPy trên bảng tổng hợp tháng, thay cho phần tính trong trình duyệt trước đây, để
+client (AdvancedAnalysis.tsx, AdvancedAnalysisModal.tsx) chỉ cần tải một response nhỏ thay cho
+toàn bộ lịch sử.
+"""
+
+from datetime import datetime
+import calendar
+import numpy as np
+from models.monthly_rollup import UserMonthlyRollup
+from services.result_cache import VersionedResultCache
+
+# Ngưỡng z-score (độ lệch chuẩn) để coi một tháng là bất thường
+OUTLIER_THRESHOLD = 1.5
+EXTREME_OUTLIER_THRESHOLD = 2
+
+# Kết quả phân tích theo (user, tháng hiện tại), version là users.data_version
+_analysis_cache = VersionedResultCache('analysis')
+
+
+def _format_currency(amount):
+    """Giống Intl.NumberFormat('vi-VN', {style: 'currency', currency: 'VND'})"""
+    sign = '-' if amount < 0 else ''
+    return f"{sign}{abs(round(amount)):,}".replace(',', '.') + ' ₫'
+
+
+class AnalysisService:
+    """Các phân tích trên chuỗi thu / chi theo tháng (chỉ các tháng có giao dịch)"""
+
+    @staticmethod
+    def get_month_arrays(user_id, today=None):
+        """Trả về (labels, income, expense, total_months) của các tháng đã kết thúc.
+
+        total_months đếm cả tháng hiện tại, như độ dài months_data của /api/stats/all-months.
+        """
+        today = today or datetime.now().date()
+        current_period = today.year * 12 + today.month - 1
+
+        totals = {}
+        for row in UserMonthlyRollup.monthly_totals(user_id):
+            period = int(row.year) * 12 + int(row.month) - 1
+            income, expense = totals.get(period, (0.0, 0.0))
+            if row.type == 'income':
+                income = float(row.total_amount)
+            else:
+                expense = float(row.total_amount)
+            totals[period] = (income, expense)
+
+        periods = sorted(period for period in totals if period != current_period)
+        labels = [f"{calendar.month_name[period % 12 + 1]} {period // 12}" for period in periods]
+        income = np.array([totals[period][0] for period in periods], dtype=np.float64)
+        expense = np.array([totals[period][1] for period in periods], dtype=np.float64)
+        return labels, income, expense, len(totals)
+
+    @staticmethod
+    def analyze_trend(labels, expense, total_months):
+        if total_months < 2 or len(expense) < 2:
+            return {
+                'trend': 'insufficient_data',
+                'trend_description': 'Không đủ dữ liệu để phân tích xu hướng' if total_months < 2
+                else 'Không đủ dữ liệu để phân tích xu hướng (cần ít nhất 2 tháng hoàn thành)',
+                'monthly_changes': [],
+                'overall_change': 0,
+                'trend_strength': 0
+            }
+
+        previous, current = expense[:-1], expense[1:]
+        changes = current - previous
+        change_percent = np.divide(changes * 100, previous, out=np.zeros_like(changes), where=previous > 0)
+
+        average_change = float(changes.mean())
+        mean_expense = float(expense.mean())
+        trend_strength = abs(average_change) / mean_expense * 100 if mean_expense else 0.0
+
+        trend, description = 'stable', 'Chi tiêu tương đối ổn định'
+        if average_change > 0 and trend_strength > 5:
+            trend = 'increasing'
+            description = f'Chi tiêu đang tăng trung bình {_format_currency(average_change)}/tháng'
+        elif average_change < 0 and trend_strength > 5:
+            trend = 'decreasing'
+            description = f'Chi tiêu đang giảm trung bình {_format_currency(abs(average_change))}/tháng'
+
+        return {
+            'trend': trend,
+            'trend_description': description,
+            'monthly_changes': [
+                {
+                    'month': label,
+                    'change': change,
+                    'change_percent': percent,
+                    'current_expense': current_expense,
+                    'previous_expense': previous_expense
+                }
+                for label, change, percent, current_expense, previous_expense in zip(
+                    labels[1:], changes.tolist(), change_percent.tolist(), current.tolist(), previous.tolist()
+                )
+            ],
+            'overall_change': float(changes.sum()),
+            'trend_strength': trend_strength,
+            'positive_changes': int((changes > 0).sum()),
+            'negative_changes': int((changes < 0).sum()),
+            'average_monthly_change': average_change
+        }
+
+    @staticmethod
+    def detect_outliers(labels, expense, total_months):
+        if total_months < 3 or len(expense) < 3:
+            return {
+                'outliers': [],
+                'statistics': None,
+                'message': 'Cần ít nhất 3 tháng dữ liệu để phát hiện bất thường' if total_months < 3
+                else 'Cần ít nhất 3 tháng hoàn thành để phát hiện bất thường'
+            }
+
+        mean = float(expense.mean())
+        std_dev = float(expense.std())
+        deviation = expense - mean
+        z_scores = np.divide(np.abs(deviation), std_dev, out=np.zeros_like(deviation), where=std_dev > 0)
+        flagged = np.flatnonzero(z_scores > OUTLIER_THRESHOLD)
+        flagged = flagged[np.argsort(-z_scores[flagged], kind='stable')]
+
+        outliers = [{
+            'month': labels[i],
+            'expense': float(expense[i]),
+            'z_score': float(z_scores[i]),
+            'deviation_from_mean': float(deviation[i]),
+            'type': 'high' if deviation[i] > 0 else 'low',
+            'severity': 'extreme' if z_scores[i] > EXTREME_OUTLIER_THRESHOLD else 'moderate'
+        } for i in flagged.tolist()]
+
+        return {
+            'outliers': outliers,
+            'statistics': {
+                'mean': mean,
+                'std_dev': std_dev,
+                'min_expense': float(expense.min()),
+                'max_expense': float(expense.max()),
+                'threshold_used': OUTLIER_THRESHOLD
+            },
+            'message': f'Phát hiện {len(outliers)} tháng có chi tiêu bất thường' if outliers
+            else 'Không phát hiện tháng nào có chi tiêu bất thường'
+        }
+
+    @staticmethod
+    def analyze_correlation(income, expense, total_months):
+        if total_months < 3 or len(expense) < 3:
+            return {
+                'correlation': 0,
+                'correlation_strength': 'insufficient_data',
+                'description': 'Cần ít nhất 3 tháng dữ liệu để phân tích tương quan' if total_months < 3
+                else 'Cần ít nhất 3 tháng hoàn thành để phân tích tương quan'
+            }
+
+        income_diff = income - income.mean()
+        expense_diff = expense - expense.mean()
+        denominator = np.sqrt(np.dot(income_diff, income_diff) * np.dot(expense_diff, expense_diff))
+        # Chuỗi hằng số: hệ số Pearson không xác định, coi như không tương quan
+        correlation = float(np.dot(income_diff, expense_diff) / denominator) if denominator > 0 else 0.0
+
+        if abs(correlation) >= 0.7:
+            strength = 'strong'
+            description = ('Chi tiêu có tương quan mạnh với thu nhập - khi thu nhập tăng, chi tiêu cũng tăng'
+                           if correlation > 0 else 'Chi tiêu có tương quan nghịch mạnh với thu nhập')
+        elif abs(correlation) >= 0.3:
+            strength = 'moderate'
+            description = ('Chi tiêu có tương quan vừa phải với thu nhập'
+                           if correlation > 0 else 'Chi tiêu có tương quan nghịch vừa phải với thu nhập')
+        else:
+            strength = 'weak'
+            description = 'Chi tiêu ít tương quan với thu nhập - chi tiêu tương đối độc lập với thu nhập'
+
+        return {
+            'correlation': correlation,
+            'correlation_strength': strength,
+            'description': description,
+            'mean_income': float(income.mean()),
+            'mean_expense': float(expense.mean())
+        }
+
+    @staticmethod
+    def analyze_ratio_stability(labels, income, expense, total_months):
+        if total_months < 2 or len(expense) < 2:
+            return {
+                'stability': 'insufficient_data',
+                'monthly_ratios': [],
+                'statistics': None,
+                'description': 'Cần ít nhất 2 tháng dữ liệu để phân tích tỷ lệ chi tiêu' if total_months < 2
+                else 'Cần ít nhất 2 tháng hoàn thành để phân tích tỷ lệ chi tiêu'
+            }
+
+        ratios = np.divide(expense * 100, income, out=np.zeros_like(expense), where=income > 0)
+        statuses = np.select(
+            [ratios > 100, ratios > 80, ratios > 50],
+            ['overspending', 'high', 'moderate'],
+            default='low'
+        )
+        monthly_ratios = [
+            {'month': label, 'ratio': ratio, 'income': month_income, 'expense': month_expense, 'status': status}
+            for label, ratio, month_income, month_expense, status in zip(
+                labels, ratios.tolist(), income.tolist(), expense.tolist(), statuses.tolist()
+            )
+        ]
+
+        positive = ratios[ratios > 0]
+        if len(positive) == 0:
+            return {
+                'stability': 'no_data',
+                'monthly_ratios': monthly_ratios,
+                'statistics': None,
+                'description': 'Không có dữ liệu thu nhập để tính tỷ lệ'
+            }
+
+        mean_ratio = float(positive.mean())
+        std_dev = float(positive.std())
+        coefficient_of_variation = std_dev / mean_ratio * 100
+
+        spread = f'({mean_ratio:.1f}% ± {std_dev:.1f}%)'
+        if coefficient_of_variation < 15:
+            stability, description = 'very_stable', f'Tỷ lệ chi tiêu rất ổn định {spread}'
+        elif coefficient_of_variation < 30:
+            stability, description = 'stable', f'Tỷ lệ chi tiêu tương đối ổn định {spread}'
+        else:
+            stability, description = 'unstable', f'Tỷ lệ chi tiêu không ổn định {spread}'
+
+        return {
+            'stability': stability,
+            'monthly_ratios': monthly_ratios,
+            'statistics': {
+                'mean_ratio': mean_ratio,
+                'std_dev': std_dev,
+                'coefficient_of_variation': coefficient_of_variation,
+                'min_ratio': float(positive.min()),
+                'max_ratio': float(positive.max())
+            },
+            'description': description
+        }
+
+    @staticmethod
+    def analyze(user_id, today=None):
+        """Bốn phân tích từ một lần đọc bảng tổng hợp"""
+        labels, income, expense, total_months = AnalysisService.get_month_arrays(user_id, today)
+        return {
+            'total_months': total_months,
+            'months_analyzed': len(labels),
+            'trend': AnalysisService.analyze_trend(labels, expense, total_months),
+            'outliers': AnalysisService.detect_outliers(labels, expense, total_months),
+            'correlation': AnalysisService.analyze_correlation(income, expense, total_months),
+            'ratio_stability': AnalysisService.analyze_ratio_stability(labels, income, expense, total_months),
+            'generated_at': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def get_cached_analysis(user_id, data_version):
+        """analyze() qua cache, trả về (analysis, cache_state)"""
+        today = datetime.now().date()
+        return _analysis_cache.get(
+            (user_id, today.year, today.month),
+            data_version,
+            lambda: AnalysisService.analyze(user_id)
+        )
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Backtest
+Đánh giá độ chính xác các phương pháp của ExpensePredictionService bằng cách phát lại
+lịch sử từng user theo tháng: tại mỗi tháng chỉ dùng các tháng trước đó để dự đoán,
+rồi so với chi tiêu thực tế (MAE / MAPE). Các user được chia cho ProcessPoolExecutor.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sqlalchemy import select, func
+from app import db
+from models.monthly_rollup import UserMonthlyRollup
+from services.prediction_service import ExpensePredictionService, MonthlySeries
+
+METHODS = ['simple_average', 'weighted_average', 'linear_regression', 'recommended']
+
+# Số user mỗi task gửi sang process con
+BACKTEST_CHUNK_SIZE = 200
+
+
+def load_user_series(user_ids=None):
+    """{user_id: (periods, amounts)} chi tiêu theo tháng (chỉ tháng có chi tiêu) - một truy vấn"""
+    period = UserMonthlyRollup.period_expr()
+    statement = select(
+        UserMonthlyRollup.user_id,
+        period.label('period'),
+        func.sum(UserMonthlyRollup.total_amount).label('total_amount')
+    ).where(
+        UserMonthlyRollup.type == 'expense'
+    ).group_by(
+        UserMonthlyRollup.user_id,
+        UserMonthlyRollup.year,
+        UserMonthlyRollup.month
+    ).order_by(
+        UserMonthlyRollup.user_id,
+        UserMonthlyRollup.year,
+        UserMonthlyRollup.month
+    )
+    if user_ids:
+        statement = statement.where(UserMonthlyRollup.user_id.in_(user_ids))
+
+    rows = db.session.execute(statement).all()
+    if not rows:
+        return {}
+    data = np.array([tuple(row) for row in rows], dtype=np.float64)
+    user_column = data[:, 0].astype(np.int64)
+    # Dòng đã sắp theo user: cắt mảng tại các điểm đổi user
+    boundaries = np.flatnonzero(np.diff(user_column)) + 1
+    return {
+        int(user_rows[0, 0]): (user_rows[:, 1].astype(np.int64), user_rows[:, 2])
+        for user_rows in np.split(data, boundaries)
+    }
+
+
+def synthetic_user_series(users, months=36, seed=42, end_period=None):
+    """Chuỗi chi tiêu giả lập có xu hướng, mùa vụ theo tháng và nhiễu, tái lập được theo seed"""
+    rng = np.random.default_rng(seed)
+    if end_period is None:
+        end_period = 2024 * 12
+    periods = np.arange(end_period - months, end_period, dtype=np.int64)
+    t = np.arange(months)
+
+    base = rng.lognormal(mean=np.log(8e6), sigma=0.5, size=(users, 1))
+    trend = rng.normal(0, 0.01, size=(users, 1)) * base * t
+    amplitude = rng.uniform(0, 0.3, size=(users, 1)) * base
+    phase = rng.uniform(0, 2 * np.pi, size=(users, 1))
+    season = amplitude * np.sin(2 * np.pi * (periods % 12) / 12 + phase)
+    noise = rng.normal(0, 0.15, size=(users, months)) * base
+    amounts = np.maximum(base + trend + season + noise, 0).round(-3)
+
+    # Bỏ ngẫu nhiên một số tháng, như user không ghi chi tiêu tháng đó
+    present = (rng.random((users, months)) > 0.05) & (amounts > 0)
+    return {
+        user_id: (periods[present[user_id]], amounts[user_id][present[user_id]])
+        for user_id in range(users)
+    }
+
+
+def _empty_scores():
+    return {method: {'count': 0, 'abs_error': 0.0, 'abs_pct_error': 0.0, 'pct_count': 0} for method in METHODS}
+
+
+def backtest_users(series_by_user, min_history=1):
+    """Phát lại lịch sử của các user, trả về tổng sai số theo phương pháp (chạy trong process con)"""
+    scores = _empty_scores()
+    predictions = 0
+    for periods, amounts in series_by_user:
+        for target in range(min_history, len(periods)):
+            series = MonthlySeries(periods[:target], amounts[:target], int(periods[target]))
+            result = ExpensePredictionService.get_comprehensive_prediction(None, series)
+            if not result:
+                continue
+            actual = float(amounts[target])
+            predictions += 1
+
+            predicted_by_method = {
+                method: prediction['predicted_amount'] for method, prediction in result['all_predictions'].items()
+            }
+            predicted_by_method['recommended'] = result['recommended_prediction']['predicted_amount']
+            for method, predicted in predicted_by_method.items():
+                error = abs(float(predicted) - actual)
+                score = scores[method]
+                score['count'] += 1
+                score['abs_error'] += error
+                if actual > 0:
+                    score['pct_count'] += 1
+                    score['abs_pct_error'] += error / actual
+    return scores, predictions
+
+
+def _merge_scores(total, scores):
+    for method, score in scores.items():
+        for key, value in score.items():
+            total[method][key] += value
+
+
+def run_backtest(series_by_user, workers=None, min_history=1, chunk_size=BACKTEST_CHUNK_SIZE):
+    """Chia user cho các process con và tổng hợp MAE / MAPE theo phương pháp"""
+    workers = workers or os.cpu_count() or 1
+    items = list(series_by_user.values())
+    chunks = [items[start:start + chunk_size] for start in range(0, len(items), chunk_size)]
+
+    started = time.perf_counter()
+    totals = _empty_scores()
+    predictions = 0
+    if workers == 1:
+        results = (backtest_users(chunk, min_history) for chunk in chunks)
+        for scores, count in results:
+            _merge_scores(totals, scores)
+            predictions += count
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for scores, count in executor.map(backtest_users, chunks, [min_history] * len(chunks)):
+                _merge_scores(totals, scores)
+                predictions += count
+    elapsed = time.perf_counter() - started
+
+    methods = {}
+    for method, score in totals.items():
+        methods[method] = {
+            'predictions': score['count'],
+            'mae': round(score['abs_error'] / score['count'], 0) if score['count'] else None,
+            'mape': round(score['abs_pct_error'] / score['pct_count'] * 100, 2) if score['pct_count'] else None
+        }
+    return {
+        'users': len(items),
+        'predictions': predictions,
+        'workers': workers,
+        'seconds': round(elapsed, 3),
+        'users_per_second': round(len(items) / elapsed, 1) if elapsed else None,
+        'predictions_per_second': round(predictions / elapsed, 1) if elapsed else None,
+        'methods': methods
+    }
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+Category Cache
+Danh mục gần như không đổi nên được giữ trong bộ nhớ tiến trình kèm một version.
+Version là hash nội dung, nên mọi worker nạp cùng dữ liệu sẽ có cùng version;
+client gửi lại version đã có để bỏ qua danh sách danh mục trong response.
+"""
+
+import hashlib
+import json
+import time
+from collections import namedtuple
+from threading import Lock
+from models.category import Category
+
+# Worker khác (không nhận được invalidate) sẽ nạp lại sau tối đa N giây
+CATEGORY_CACHE_TTL = 300
+
+CachedCategory = namedtuple('CachedCategory', ['id', 'name', 'type', 'description', 'created_at'])
+
+_lock = Lock()
+_state = None  # (categories, by_id, version, expires_at)
+
+
+def _load():
+    categories = [
+        CachedCategory(
+            c.id, c.name, c.type, c.description,
+            c.created_at.isoformat() if c.created_at else None
+        )
+        for c in Category.query.order_by(Category.id).all()
+    ]
+    payload = json.dumps([list(c) for c in categories], ensure_ascii=False)
+    version = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    return categories, {c.id: c for c in categories}, version, time.monotonic() + CATEGORY_CACHE_TTL
+
+
+def _get_state():
+    global _state
+    state = _state
+    if state is None or state[3] < time.monotonic():
+        with _lock:
+            if _state is None or _state[3] < time.monotonic():
+                _state = _load()
+            state = _state
+    return state
+
+
+def get_categories():
+    """Danh sách danh mục (sắp theo id), phần tử có .id, .name, .type như object Category"""
+    return _get_state()[0]
+
+
+def get_category_map():
+    """{id: CachedCategory}"""
+    return _get_state()[1]
+
+
+def get_categories_version():
+    return _get_state()[2]
+
+
+def category_dicts(categories=None):
+    """Dạng giống Category.to_dict()"""
+    return [c._asdict() for c in (categories if categories is not None else get_categories())]
+
+
+def invalidate_categories():
+    """Gọi sau khi commit thay đổi bảng categories"""
+    global _state
+    with _lock:
+        _state = None
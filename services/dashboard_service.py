@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Dashboard Service
+Tổng hợp dữ liệu dashboard dùng chung cho API (React) và trang HTML
+"""
+
+from datetime import datetime
+from sqlalchemy import func, case, and_, select
+from app import db
+from models.transaction import Transaction
+from models.category import Category
+from models.savings_goal import SavingsGoal
+from models.monthly_budget import MonthlyBudget
+from models.monthly_rollup import UserMonthlyRollup
+from services.serialization import transaction_eager_options
+import calendar
+
+
+class DashboardService:
+    """Service tính toán dữ liệu dashboard với số truy vấn cố định"""
+
+    # Số truy vấn tối đa cho get_dashboard_data: tổng hợp, giao dịch gần đây, mục tiêu tiết kiệm.
+    # Được kiểm tra bởi `flask check-query-plans` và tests/test_query_checks.py
+    QUERY_BUDGET = 3
+
+    @staticmethod
+    def get_summary(user_id, today=None):
+        """Tính tổng thu chi, chi tiêu theo danh mục tháng này và giới hạn ngân sách trong một truy vấn"""
+        today = today or datetime.now().date()
+        in_current_month = and_(
+            UserMonthlyRollup.year == today.year,
+            UserMonthlyRollup.month == today.month
+        )
+
+        budget_limit = select(MonthlyBudget.budget_limit).where(
+            MonthlyBudget.user_id == user_id,
+            MonthlyBudget.year == today.year,
+            MonthlyBudget.month == today.month
+        ).scalar_subquery()
+
+        rows = db.session.query(
+            UserMonthlyRollup.type,
+            Category.name,
+            func.sum(UserMonthlyRollup.total_amount).label('lifetime_total'),
+            func.sum(case((in_current_month, UserMonthlyRollup.total_amount), else_=0)).label('month_total'),
+            budget_limit.label('budget_limit')
+        ).join(
+            Category, Category.id == UserMonthlyRollup.category_id
+        ).filter(
+            UserMonthlyRollup.user_id == user_id
+        ).group_by(
+            UserMonthlyRollup.type,
+            Category.name
+        ).all()
+
+        summary = {
+            'total_income': 0.0,
+            'total_expense': 0.0,
+            'monthly_income': 0.0,
+            'monthly_expense': 0.0,
+            'category_spending': [],
+            'budget_limit': None
+        }
+        for row in rows:
+            summary[f'total_{row.type}'] += float(row.lifetime_total or 0)
+            summary[f'monthly_{row.type}'] += float(row.month_total or 0)
+            if row.type == 'expense' and row.month_total:
+                summary['category_spending'].append((row.name, float(row.month_total)))
+            if row.budget_limit is not None:
+                summary['budget_limit'] = float(row.budget_limit)
+
+        summary['balance'] = summary['total_income'] - summary['total_expense']
+        summary['category_spending'] = sorted(
+            summary['category_spending'], key=lambda item: item[1], reverse=True
+        )[:5]
+        return summary
+
+    @staticmethod
+    def build_budget_alert(budget_limit, monthly_expense):
+        """Tạo thông tin cảnh báo ngân sách, chỉ khi chi tiêu >= 70% giới hạn"""
+        if not budget_limit or budget_limit <= 0:
+            return None
+
+        spending_percentage = (float(monthly_expense) / float(budget_limit)) * 100
+        if spending_percentage < 70:
+            return None
+
+        # Xác định mức độ cảnh báo
+        if spending_percentage >= 100:
+            alert_level = 'danger'
+            alert_color = 'danger'
+            alert_message = 'Đã vượt quá giới hạn chi tiêu!'
+            alert_title = '🚨 Vượt Giới Hạn!'
+        elif spending_percentage >= 95:
+            alert_level = 'critical'
+            alert_color = 'danger'
+            alert_message = 'Sắp vượt quá giới hạn chi tiêu!'
+            alert_title = '⚠️ Nguy Hiểm!'
+        elif spending_percentage >= 80:
+            alert_level = 'warning'
+            alert_color = 'warning'
+            alert_message = 'Đã chi tiêu gần đạt giới hạn tháng'
+            alert_title = '⚡ Cảnh Báo!'
+        else:  # 70-80%
+            alert_level = 'info'
+            alert_color = 'info'
+            alert_message = 'Chi tiêu đang tăng, cần chú ý'
+            alert_title = '📊 Theo Dõi'
+
+        return {
+            'budget_limit': float(budget_limit),
+            'current_spending': float(monthly_expense),
+            'remaining_budget': float(budget_limit) - float(monthly_expense),
+            'spending_percentage': round(spending_percentage, 1),
+            'alert_level': alert_level,
+            'alert_color': alert_color,
+            'alert_message': alert_message,
+            'alert_title': alert_title,
+            'show_alert': True
+        }
+
+    @staticmethod
+    def get_dashboard_data(user_id, today=None):
+        """Lấy toàn bộ dữ liệu dashboard (tối đa QUERY_BUDGET truy vấn)"""
+        summary = DashboardService.get_summary(user_id, today)
+
+        recent_transactions = Transaction.query.options(
+            *transaction_eager_options(include_user=False)
+        ).filter_by(user_id=user_id).order_by(Transaction.created_at.desc()).limit(5).all()
+
+        savings_goals = SavingsGoal.query.filter_by(user_id=user_id, is_active=True).all()
+
+        return {
+            'total_income': summary['total_income'],
+            'total_expense': summary['total_expense'],
+            'balance': summary['balance'],
+            'monthly_income': summary['monthly_income'],
+            'monthly_expense': summary['monthly_expense'],
+            'recent_transactions': recent_transactions,
+            'category_spending': summary['category_spending'],
+            'savings_goals': savings_goals,
+            'budget_alert': DashboardService.build_budget_alert(
+                summary['budget_limit'], summary['monthly_expense']
+            )
+        }
+
+    @staticmethod
+    def get_monthly_chart(user_id, months=6, today=None):
+        """Dữ liệu biểu đồ thu chi của N tháng gần nhất"""
+        today = today or datetime.now().date()
+
+        periods = UserMonthlyRollup.recent_periods(months, today)
+        first_year, first_month = periods[0]
+
+        totals_by_month = {}
+        for row in UserMonthlyRollup.monthly_totals(user_id, start_period=first_year * 12 + first_month - 1):
+            totals_by_month[(row.year, row.month, row.type)] = row.total_amount
+
+        monthly_data = []
+        for year, month in periods:
+            monthly_data.append({
+                'month': calendar.month_name[month],
+                'income': float(totals_by_month.get((year, month, 'income')) or 0),
+                'expense': float(totals_by_month.get((year, month, 'expense')) or 0)
+            })
+
+        return monthly_data
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic data generator
+Tạo nhiều user và hàng triệu giao dịch có tính mùa vụ để kiểm thử tải.
+Dữ liệu được sinh theo lô bằng NumPy và ghi bằng executemany của driver (không qua ORM),
+cùng seed cho cùng dữ liệu. Bảng tổng hợp tháng được xây dựng lại một lần ở cuối.
+"""
+
+import time
+from datetime import date, datetime
+import numpy as np
+from app import db, bcrypt
+from models.user import User
+from models.category import Category
+from models.transaction import Transaction
+from models.monthly_rollup import UserMonthlyRollup
+
+GENERATOR_BATCH_SIZE = 50000
+
+# Hệ số chi tiêu theo tháng trong năm (Tết tháng 1-2, mùa hè, cuối năm)
+MONTH_SEASONALITY = np.array([1.4, 1.3, 0.95, 0.95, 1.0, 1.1, 1.1, 1.0, 0.95, 0.95, 1.05, 1.25])
+
+# Số tiền trung vị một giao dịch (VNĐ) và tỷ trọng số giao dịch theo danh mục chi tiêu
+EXPENSE_PROFILES = {
+    'Ăn uống': (80000, 0.35),
+    'Đi lại': (50000, 0.15),
+    'Giải trí': (200000, 0.08),
+    'Mua sắm': (400000, 0.12),
+    'Y tế': (300000, 0.04),
+    'Học tập': (500000, 0.04),
+    'Nhà ở': (3000000, 0.05),
+    'Điện nước': (600000, 0.07),
+    'Bảo hiểm': (1000000, 0.02),
+}
+DEFAULT_EXPENSE_PROFILE = (150000, 0.08)
+
+# Tỷ lệ giao dịch thu nhập (ngoài lương) trong tổng số giao dịch
+EXTRA_INCOME_SHARE = 0.03
+
+
+def _month_starts(months, today):
+    """Ngày đầu của N tháng gần nhất (gồm tháng hiện tại) và số ngày của từng tháng"""
+    current = np.datetime64(today, 'M')
+    starts = np.arange(current - months + 1, current + 1, dtype='datetime64[M]')
+    lengths = ((starts + 1).astype('datetime64[D]') - starts.astype('datetime64[D]')).astype(np.int64)
+    return starts.astype('datetime64[D]'), lengths
+
+
+TRANSACTION_COLUMNS = ['amount', 'type', 'description', 'date', 'created_at', 'updated_at', 'user_id', 'category_id']
+
+
+def _driver_values(array, unit):
+    """Mảng datetime64 thành giá trị gửi thẳng cho driver.
+
+    SQLite lưu ngày giờ dạng chuỗi: định dạng sẵn cả lô bằng NumPy, cùng định dạng
+    SQLAlchemy ghi ra, thay vì để bind processor xử lý từng giá trị.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return array.astype(f'datetime64[{unit}]').astype(object)
+    if unit == 'D':
+        return np.datetime_as_string(array, unit='D').tolist()
+    text = np.char.replace(np.datetime_as_string(array, unit='s'), 'T', ' ')
+    return np.char.add(text, '.000000').tolist()
+
+
+def _insert_transactions(columns):
+    """Ghi một lô giao dịch (dict các mảng cùng độ dài) bằng executemany của driver"""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    statement = str(Transaction.__table__.insert().compile(dialect=dialect, column_keys=TRANSACTION_COLUMNS))
+    created = _driver_values(columns['created_at'], 's')
+    size = len(created)
+    values = zip(
+        columns['amount'].tolist(), columns['type'].tolist(), [''] * size,
+        _driver_values(columns['date'], 'D'), created, created,
+        columns['user_id'].tolist(), columns['category_id'].tolist()
+    )
+    if dialect.positional:
+        rows = list(values)
+    else:
+        rows = [dict(zip(TRANSACTION_COLUMNS, row)) for row in values]
+    connection.exec_driver_sql(statement, rows)
+    return size
+
+
+def _tune_sqlite():
+    """SQLite: bỏ fsync và tăng cache trong lúc nạp dữ liệu.
+
+    Connection của session được tách khỏi pool (detach) trước khi đặt PRAGMA, nên nó bị đóng
+    khi session commit thay vì quay lại pool với synchronous = OFF cho các request sau
+    (SQLite không cho đổi synchronous trong transaction để khôi phục trước khi commit).
+    Database in-memory bỏ qua: đóng connection sẽ mất dữ liệu, và không có fsync để tiết kiệm.
+    """
+    url = db.engine.url
+    if url.get_backend_name() != 'sqlite' or url.database in (None, '', ':memory:'):
+        return
+    connection = db.session.connection()
+    connection.detach()
+    connection.exec_driver_sql('PRAGMA synchronous = OFF')
+    connection.exec_driver_sql('PRAGMA cache_size = -200000')
+
+
+def create_users(count, seed, password='password123'):
+    """Tạo user giả lập bằng một lệnh INSERT nhiều dòng, trả về mảng id (theo thứ tự tạo).
+
+    Username là gen<seed>_<i> nên mỗi seed chỉ dùng được một lần trên cùng database.
+    """
+    prefix = f'gen{seed}_'
+    if User.query.filter_by(username=f'{prefix}0').first():
+        raise RuntimeError(f'Đã có user giả lập với seed {seed} ({prefix}*): dùng seed khác')
+
+    # Băm mật khẩu một lần cho mọi user: bcrypt mỗi user sẽ chiếm phần lớn thời gian chạy
+    password_hash = bcrypt.generate_password_hash(password).decode('utf-8')
+    now = datetime.utcnow()
+    first_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+
+    rows = [{
+        'id': first_id + i,
+        'username': f'{prefix}{i}',
+        'email': f'{prefix}{i}@example.com',
+        'full_name': f'Synthetic User {i}',
+        'password_hash': password_hash,
+        'is_admin': False,
+        'created_at': now,
+        'data_version': 0,
+    } for i in range(count)]
+    for start in range(0, len(rows), GENERATOR_BATCH_SIZE):
+        db.session.execute(User.__table__.insert(), rows[start:start + GENERATOR_BATCH_SIZE])
+    return np.arange(first_id, first_id + count, dtype=np.int64)
+
+
+def generate_dataset(users=100, transactions=100000, months=24, seed=42,
+                     batch_size=GENERATOR_BATCH_SIZE, today=None, progress_callback=None):
+    """Tạo users user và đúng transactions giao dịch trong months tháng gần nhất.
+
+    Mỗi user có một khoản lương mỗi tháng (tính trong transactions; nếu transactions nhỏ hơn
+    số khoản lương thì chỉ giữ các tháng gần nhất); phần còn lại là chi tiêu theo danh mục (số tiền
+    log-normal quanh trung vị của danh mục, nhân hệ số mùa vụ) và một ít thu nhập khác.
+    Cùng seed cho cùng dữ liệu; mỗi seed chỉ chạy được một lần trên một database (username
+    gen<seed>_<i>). Trả về thống kê của lần chạy.
+    """
+    started = time.perf_counter()
+    today = today or date.today()
+    rng = np.random.default_rng(seed)
+
+    income_categories = Category.query.filter_by(type='income').order_by(Category.id).all()
+    expense_categories = Category.query.filter_by(type='expense').order_by(Category.id).all()
+    if not income_categories or not expense_categories:
+        raise RuntimeError('Cần có danh mục thu nhập và chi tiêu trước khi tạo dữ liệu')
+
+    salary_category = next((c.id for c in income_categories if c.name == 'Lương'), income_categories[0].id)
+    income_ids = np.array([c.id for c in income_categories], dtype=np.int64)
+    expense_ids = np.array([c.id for c in expense_categories], dtype=np.int64)
+    profiles = [EXPENSE_PROFILES.get(c.name, DEFAULT_EXPENSE_PROFILE) for c in expense_categories]
+    expense_medians = np.array([median for median, _weight in profiles], dtype=np.float64)
+    expense_weights = np.array([weight for _median, weight in profiles], dtype=np.float64)
+    expense_weights /= expense_weights.sum()
+
+    _tune_sqlite()
+    user_ids = create_users(users, seed)
+
+    # Mức chi tiêu và thu nhập riêng của từng user, số giao dịch mỗi user không đều
+    user_scale = rng.lognormal(0, 0.4, size=users)
+    user_salary = (rng.lognormal(np.log(15e6), 0.5, size=users) / 1e5).round() * 1e5
+    user_activity = rng.lognormal(0, 0.6, size=users)
+    user_activity /= user_activity.sum()
+
+    month_starts, month_lengths = _month_starts(months, today)
+    month_weights = MONTH_SEASONALITY[month_starts.astype('datetime64[M]').astype(np.int64) % 12]
+    month_weights = month_weights / month_weights.sum()
+    # Tháng hiện tại chỉ tính đến hôm nay
+    month_lengths[-1] = today.day
+
+    written = 0
+
+    # Lương: một giao dịch mỗi user mỗi tháng (ngày 5 hoặc trước đó nếu tháng hiện tại chưa tới),
+    # không vượt tổng số giao dịch yêu cầu
+    salary_months = np.repeat(np.arange(months), users)
+    salary_users = np.tile(np.arange(users), months)
+    skipped_salaries = max(len(salary_months) - transactions, 0)
+    salary_months = salary_months[skipped_salaries:]
+    salary_users = salary_users[skipped_salaries:]
+    salary_day = np.minimum(4, month_lengths[salary_months] - 1)
+    salary_dates = month_starts[salary_months] + salary_day
+    for start in range(0, len(salary_months), batch_size):
+        part = slice(start, start + batch_size)
+        size = len(salary_months[part])
+        written += _insert_transactions({
+            'amount': user_salary[salary_users[part]],
+            'type': np.full(size, 'income'),
+            'date': salary_dates[part],
+            'created_at': salary_dates[part].astype('datetime64[s]') + rng.integers(8 * 3600, 18 * 3600, size),
+            'user_id': user_ids[salary_users[part]],
+            'category_id': np.full(size, salary_category),
+        })
+
+    remaining = max(transactions - written, 0)
+    while remaining > 0:
+        size = min(batch_size, remaining)
+        user_index = rng.choice(users, size=size, p=user_activity)
+        month_index = rng.choice(months, size=size, p=month_weights)
+        dates = month_starts[month_index] + (rng.random(size) * month_lengths[month_index]).astype(np.int64)
+
+        is_income = rng.random(size) < EXTRA_INCOME_SHARE
+        category_index = rng.choice(len(expense_ids), size=size, p=expense_weights)
+        amounts = (expense_medians[category_index] * user_scale[user_index]
+                   * MONTH_SEASONALITY[dates.astype('datetime64[M]').astype(np.int64) % 12]
+                   * rng.lognormal(0, 0.5, size))
+        amounts = np.where(is_income, user_salary[user_index] * rng.uniform(0.05, 0.5, size), amounts)
+        categories = np.where(is_income, rng.choice(income_ids, size=size), expense_ids[category_index])
+
+        written += _insert_transactions({
+            'amount': np.maximum((amounts / 1000).round(), 1) * 1000,
+            'type': np.where(is_income, 'income', 'expense'),
+            'date': dates,
+            'created_at': dates.astype('datetime64[s]') + rng.integers(6 * 3600, 23 * 3600, size),
+            'user_id': user_ids[user_index],
+            'category_id': categories,
+        })
+        remaining -= size
+        if progress_callback:
+            progress_callback(written, transactions)
+
+    db.session.commit()
+    inserted = time.perf_counter()
+
+    # Insert qua Core không kích hoạt mapper event: xây dựng lại bảng tổng hợp một lần
+    rollup_rows = UserMonthlyRollup.rebuild()
+
+    return {
+        'users': users,
+        'transactions': written,
+        'rollup_rows': rollup_rows,
+        'insert_seconds': round(inserted - started, 1),
+        'rollup_seconds': round(time.perf_counter() - inserted, 1),
+    }
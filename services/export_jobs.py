@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Export Jobs
+Hàng đợi xuất dữ liệu chạy nền bằng thread pool trong tiến trình, trạng thái lưu ở bảng export_jobs.
+Không cần broker bên ngoài.
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Lock
+from flask import current_app
+from app import db
+from models.export_job import ExportJob
+from services.export_service import export_formats, export_filename
+
+# Ghi tiến độ vào database tối đa mỗi N dòng
+PROGRESS_COMMIT_EVERY = 10000
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _get_executor(app):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=app.config.get('EXPORT_WORKERS', 2),
+                thread_name_prefix='export-job'
+            )
+        return _executor
+
+
+def supported_formats():
+    return list(export_formats().keys())
+
+
+def enqueue_export(user_id, export_format='xlsx'):
+    """Tạo job và đưa vào hàng đợi, trả về ExportJob"""
+    if export_format not in export_formats():
+        raise ValueError(f'Unsupported export format: {export_format}')
+
+    cleanup_expired_exports()
+
+    job = ExportJob(user_id=user_id, format=export_format, status=ExportJob.STATUS_QUEUED)
+    db.session.add(job)
+    db.session.commit()
+
+    app = current_app._get_current_object()
+    _get_executor(app).submit(_run_job, app, job.id)
+    return job
+
+
+def _run_job(app, job_id):
+    """Chạy job trong thread nền với app context riêng.
+
+    Mọi lỗi (định dạng, thư mục xuất, ghi file, commit) đều đánh dấu job là failed thay vì
+    để job kẹt ở trạng thái queued / running khi thread kết thúc.
+    """
+    with app.app_context():
+        paths = []
+        try:
+            job = db.session.get(ExportJob, job_id)
+            if job is None:
+                return
+
+            writer, extension, _mimetype = export_formats()[job.format]
+            folder = app.config['EXPORT_FOLDER']
+            os.makedirs(folder, exist_ok=True)
+            job.filename = export_filename(extension)
+            job.file_path = os.path.join(folder, f'{job.id}.{extension}')
+            partial_path = job.file_path + '.part'
+            paths = [partial_path, job.file_path]
+            job.status = ExportJob.STATUS_RUNNING
+            job.started_at = datetime.utcnow()
+            db.session.commit()
+
+            last_commit = [0]
+
+            def on_progress(rows_written, total_rows):
+                job.processed_rows = rows_written
+                job.total_rows = total_rows
+                if rows_written - last_commit[0] >= PROGRESS_COMMIT_EVERY:
+                    last_commit[0] = rows_written
+                    db.session.commit()
+
+            written = writer(job.user_id, partial_path, progress_callback=on_progress)
+            os.replace(partial_path, job.file_path)
+            job.processed_rows = written
+            job.total_rows = written
+            job.file_size = os.path.getsize(job.file_path)
+            job.status = ExportJob.STATUS_DONE
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+        except Exception as e:
+            _mark_failed(job_id, paths, e)
+
+
+def _mark_failed(job_id, paths, error):
+    """Đánh dấu job failed và xóa file đang ghi dở"""
+    db.session.rollback()
+    print(f"Export job {job_id} failed: {str(error)}")
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    try:
+        job = db.session.get(ExportJob, job_id)
+        if job is not None:
+            job.status = ExportJob.STATUS_FAILED
+            job.error = str(error) or error.__class__.__name__
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        print(f"Export job {job_id}: could not record failure: {str(e)}")
+
+
+def cleanup_expired_exports():
+    """Xóa job và file đã quá EXPORT_JOB_TTL"""
+    cutoff = datetime.utcnow() - current_app.config['EXPORT_JOB_TTL']
+    expired = ExportJob.query.filter(
+        ExportJob.created_at < cutoff,
+        ExportJob.status.in_([ExportJob.STATUS_DONE, ExportJob.STATUS_FAILED])
+    ).all()
+    for job in expired:
+        if job.file_path and os.path.exists(job.file_path):
+            os.remove(job.file_path)
+        db.session.delete(job)
+    if expired:
+        db.session.commit()
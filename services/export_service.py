@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Export Service
+Xuất giao dịch ra Excel ở chế độ write-only: đọc dữ liệu theo lô từ SQL và ghi thẳng ra file,
+bộ nhớ không tăng theo số dòng.
+"""
+
+from datetime import datetime
+from sqlalchemy import select, func, case, and_, or_
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+from app import db
+from models.transaction import Transaction
+from models.category import Category
+
+# pyarrow is optional: only the Parquet / Arrow exports need it
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+EXPORT_HEADERS = [
+    'STT', 'Ngày', 'Loại', 'Danh mục', 'Mô tả',
+    'Số tiền (VNĐ)', 'Hóa đơn', 'Ngày tạo'
+]
+
+# Số dòng đọc từ database mỗi lô
+EXPORT_BATCH_SIZE = 2000
+
+MAX_COLUMN_WIDTH = 50
+
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+PARQUET_MIMETYPE = 'application/vnd.apache.parquet'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.file'
+
+TRANSACTION_TYPES = ['income', 'expense']
+
+
+def _border():
+    thin = Side(style='thin')
+    return Border(left=thin, right=thin, top=thin, bottom=thin)
+
+
+def _named_styles():
+    """Các style dùng chung cho mọi ô (mỗi style chỉ lưu một lần trong file)"""
+    header = NamedStyle(name='export_header')
+    header.font = Font(bold=True, color="FFFFFF")
+    header.fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header.alignment = Alignment(horizontal="center", vertical="center")
+    header.border = _border()
+
+    cell = NamedStyle(name='export_cell')
+    cell.border = _border()
+
+    income = NamedStyle(name='export_income')
+    income.font = Font(color="008000")  # Xanh lá
+    income.border = _border()
+
+    expense = NamedStyle(name='export_expense')
+    expense.font = Font(color="FF0000")  # Đỏ
+    expense.border = _border()
+
+    amount = NamedStyle(name='export_amount')
+    amount.number_format = '#,##0'
+    amount.alignment = Alignment(horizontal="right")
+    amount.border = _border()
+
+    total_label = NamedStyle(name='export_total_label')
+    total_label.font = Font(bold=True)
+
+    styles = [header, cell, income, expense, amount, total_label]
+    for name, color in (('export_total_income', "008000"),
+                        ('export_total_expense', "FF0000"),
+                        ('export_total_balance', "0000FF")):
+        total = NamedStyle(name=name)
+        total.font = Font(bold=True, color=color)
+        total.number_format = '#,##0'
+        styles.append(total)
+    return styles
+
+
+def get_export_summary(user_id):
+    """Tổng thu, chi, số dòng và độ dài lớn nhất của các cột văn bản - một truy vấn SQL"""
+    row = db.session.execute(
+        select(
+            func.count(Transaction.id).label('row_count'),
+            func.sum(case((Transaction.type == 'income', Transaction.amount), else_=0)).label('total_income'),
+            func.sum(case((Transaction.type == 'expense', Transaction.amount), else_=0)).label('total_expense'),
+            func.max(Transaction.amount).label('max_amount'),
+            func.min(Transaction.amount).label('min_amount'),
+            func.max(func.length(Transaction.description)).label('max_description'),
+            func.max(func.length(Category.name)).label('max_category')
+        ).select_from(Transaction).outerjoin(
+            Category, Category.id == Transaction.category_id
+        ).where(Transaction.user_id == user_id)
+    ).one()
+
+    return {
+        'row_count': row.row_count or 0,
+        'total_income': float(row.total_income or 0),
+        'total_expense': float(row.total_expense or 0),
+        'max_amount': float(row.max_amount or 0),
+        'min_amount': float(row.min_amount or 0),
+        'max_description': row.max_description or 0,
+        'max_category': row.max_category or 0
+    }
+
+
+def _summary_rows(summary):
+    """Các dòng thống kê cuối sheet: (nhãn ở cột Mô tả, giá trị ở cột Số tiền, style)"""
+    balance = summary['total_income'] - summary['total_expense']
+    return (("Tổng thu nhập:", summary['total_income'], 'export_total_income'),
+            ("Tổng chi tiêu:", summary['total_expense'], 'export_total_expense'),
+            ("Số dư:", balance, 'export_total_balance'))
+
+
+def _column_widths(summary):
+    """Độ rộng cột (như tự động điều chỉnh trước đây) tính từ thống kê SQL thay vì duyệt lại các ô,
+    gồm cả các dòng thống kê cuối sheet"""
+    summary_rows = _summary_rows(summary) if summary['row_count'] else ()
+    value_lengths = [
+        len(str(summary['row_count'])),                        # STT
+        len('dd/mm/YYYY'),                                       # Ngày
+        len('Thu nhập'),                                         # Loại
+        max(summary['max_category'], len('N/A')),                # Danh mục
+        max([summary['max_description']] + [len(label) for label, _, _ in summary_rows]),  # Mô tả
+        max([len(str(summary['max_amount'])), len(str(summary['min_amount']))]
+            + [len(str(value)) for _, value, _ in summary_rows]),                      # Số tiền
+        len('Không'),                                            # Hóa đơn
+        len('dd/mm/YYYY HH:MM'),                                 # Ngày tạo
+    ]
+    return [
+        min(max(len(header), length) + 2, MAX_COLUMN_WIDTH)
+        for header, length in zip(EXPORT_HEADERS, value_lengths)
+    ]
+
+
+def _iter_export_batches(user_id, batch_size=EXPORT_BATCH_SIZE):
+    """Đọc giao dịch theo lô bằng keyset (date, id) giảm dần.
+
+    Mỗi lô là một truy vấn hoàn chỉnh, không giữ cursor mở giữa các lô, nên người gọi
+    có thể commit (ví dụ cập nhật tiến độ) giữa các lô.
+    """
+    base = select(
+        Transaction.date,
+        Transaction.type,
+        Category.name,
+        Transaction.description,
+        Transaction.amount,
+        Transaction.receipt_image,
+        Transaction.created_at,
+        Transaction.id
+    ).select_from(Transaction).outerjoin(
+        Category, Category.id == Transaction.category_id
+    ).where(
+        Transaction.user_id == user_id
+    ).order_by(
+        Transaction.date.desc(), Transaction.id.desc()
+    ).limit(batch_size)
+
+    last = None
+    while True:
+        query = base
+        if last is not None:
+            last_date, last_id = last
+            query = query.where(
+                Transaction.date <= last_date,
+                or_(Transaction.date < last_date, and_(Transaction.date == last_date, Transaction.id < last_id))
+            )
+        batch = db.session.execute(query).all()
+        if not batch:
+            return
+        yield batch
+        if len(batch) < batch_size:
+            return
+        last = (batch[-1].date, batch[-1].id)
+
+
+def write_transactions_xlsx(user_id, output, progress_callback=None):
+    """Ghi toàn bộ giao dịch của user ra file Excel.
+
+    output là đường dẫn hoặc file object. progress_callback(rows_written, total_rows) được gọi sau mỗi lô.
+    Trả về số dòng giao dịch đã ghi.
+    """
+    summary = get_export_summary(user_id)
+
+    wb = Workbook(write_only=True)
+    for style in _named_styles():
+        wb.add_named_style(style)
+    ws = wb.create_sheet("Giao Dịch")
+
+    # Độ rộng cột phải được đặt trước khi ghi dòng đầu tiên ở chế độ write-only
+    for col, width in enumerate(_column_widths(summary), 1):
+        ws.column_dimensions[get_column_letter(col)].width = width
+
+    def styled(value, style):
+        cell = WriteOnlyCell(ws, value=value)
+        cell.style = style
+        return cell
+
+    ws.append([styled(header, 'export_header') for header in EXPORT_HEADERS])
+
+    written = 0
+    for batch in _iter_export_batches(user_id):
+        for date, transaction_type, category_name, description, amount, receipt_image, created_at, _id in batch:
+            written += 1
+            is_income = transaction_type == 'income'
+            ws.append([
+                styled(written, 'export_cell'),
+                styled(date.strftime('%d/%m/%Y'), 'export_cell'),
+                styled("Thu nhập" if is_income else "Chi tiêu", 'export_income' if is_income else 'export_expense'),
+                styled(category_name or "N/A", 'export_cell'),
+                styled(description or "", 'export_cell'),
+                styled(float(amount), 'export_amount'),
+                styled("Có" if receipt_image else "Không", 'export_cell'),
+                styled(created_at.strftime('%d/%m/%Y %H:%M') if created_at else "", 'export_cell'),
+            ])
+        if progress_callback:
+            progress_callback(written, summary['row_count'])
+
+    # Thêm thống kê ở cuối
+    if written:
+        ws.append([])
+        for label, value, style in _summary_rows(summary):
+            ws.append([None, None, None, None, styled(label, 'export_total_label'), styled(value, style)])
+
+    wb.save(output)
+    return written
+
+
+def _arrow_schema():
+    """Schema cột cho Parquet / Arrow: ngày và số tiền có kiểu, loại và danh mục mã hóa từ điển"""
+    return pa.schema([
+        ('id', pa.int64()),
+        ('date', pa.date32()),
+        ('type', pa.dictionary(pa.int8(), pa.string())),
+        ('category', pa.dictionary(pa.int32(), pa.string())),
+        ('description', pa.string()),
+        ('amount', pa.float64()),
+        ('has_receipt', pa.bool_()),
+        ('created_at', pa.timestamp('us')),
+    ])
+
+
+def _write_transactions_columnar(user_id, output, writer_factory, progress_callback=None):
+    """Ghi giao dịch theo từng record batch (mỗi lô SQL là một batch cột)"""
+    if not HAS_PYARROW:
+        raise RuntimeError('pyarrow chưa được cài đặt - không thể xuất Parquet / Arrow')
+
+    schema = _arrow_schema()
+    total_rows = db.session.query(func.count(Transaction.id)).filter(Transaction.user_id == user_id).scalar() or 0
+
+    # Từ điển cố định cho mọi batch (Arrow IPC file không cho phép thay từ điển giữa các batch).
+    # Tên danh mục có thể trùng giữa thu và chi (ví dụ 'Khác'): từ điển phải gồm các giá trị
+    # duy nhất để pandas đọc thành Categorical
+    category_names = sorted({name for (name,) in db.session.query(Category.name).distinct()} | {'N/A'})
+    category_index = {name: i for i, name in enumerate(category_names)}
+    category_dictionary = pa.array(category_names, type=pa.string())
+    missing_category = category_index['N/A']
+    type_dictionary = pa.array(TRANSACTION_TYPES, type=pa.string())
+    type_index = {name: i for i, name in enumerate(TRANSACTION_TYPES)}
+
+    written = 0
+    writer = writer_factory(output, schema)
+    try:
+        for batch in _iter_export_batches(user_id):
+            dates, types, categories, descriptions, amounts, receipts, created, ids = zip(*batch)
+            record_batch = pa.record_batch([
+                pa.array(ids, type=pa.int64()),
+                pa.array(dates, type=pa.date32()),
+                pa.DictionaryArray.from_arrays(
+                    pa.array([type_index[t] for t in types], type=pa.int8()), type_dictionary),
+                pa.DictionaryArray.from_arrays(
+                    pa.array([category_index.get(c, missing_category) for c in categories], type=pa.int32()),
+                    category_dictionary),
+                pa.array(descriptions, type=pa.string()),
+                pa.array(amounts, type=pa.float64()),
+                pa.array([bool(r) for r in receipts], type=pa.bool_()),
+                pa.array(created, type=pa.timestamp('us')),
+            ], schema=schema)
+            writer.write_batch(record_batch)
+            written += len(batch)
+            if progress_callback:
+                progress_callback(written, total_rows)
+    finally:
+        writer.close()
+    return written
+
+
+def write_transactions_parquet(user_id, output, progress_callback=None):
+    """Xuất giao dịch ra Parquet (mỗi lô là một row group)"""
+    return _write_transactions_columnar(
+        user_id, output,
+        lambda sink, schema: pq.ParquetWriter(sink, schema, compression='zstd'),
+        progress_callback
+    )
+
+
+def write_transactions_arrow(user_id, output, progress_callback=None):
+    """Xuất giao dịch ra Arrow IPC file (đọc lại bằng memory map gần như không sao chép)"""
+    return _write_transactions_columnar(
+        user_id, output,
+        lambda sink, schema: pa.ipc.new_file(sink, schema),
+        progress_callback
+    )
+
+
+def export_formats():
+    """Các định dạng xuất được hỗ trợ: format -> (hàm ghi, phần mở rộng, mimetype)"""
+    formats = {
+        'xlsx': (write_transactions_xlsx, 'xlsx', XLSX_MIMETYPE),
+    }
+    if HAS_PYARROW:
+        formats['parquet'] = (write_transactions_parquet, 'parquet', PARQUET_MIMETYPE)
+        formats['arrow'] = (write_transactions_arrow, 'arrow', ARROW_MIMETYPE)
+    return formats
+
+
+def export_filename(extension='xlsx'):
+    """Tên file xuất với timestamp"""
+    return f"giao_dich_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
@@ -0,0 +1,430 @@
+# -*- coding: utf-8 -*-
+"""
+Forecast Service
+Dự báo chi tiêu nhiều tháng: xu hướng tuyến tính + hệ số mùa vụ theo tháng trong năm,
+khoảng tin cậy bằng bootstrap phần dư. Mọi phép tính là phép toán trên mảng NumPy
+(ma trận chuỗi × tháng), không lặp Python theo từng mẫu, nên dùng chung cho một user
+hay cho cả batch nhiều user.
+"""
+
+from datetime import datetime
+import calendar
+import time
+import numpy as np
+from sqlalchemy import select, func
+from app import db
+from models.monthly_rollup import UserMonthlyRollup
+from models.forecast import Forecast
+from services.category_cache import get_category_map
+
+# Số tháng lịch sử tối đa đưa vào mô hình
+FORECAST_HISTORY_MONTHS = 120
+
+MAX_FORECAST_HORIZON = 24
+
+# Cần ít nhất hai chu kỳ năm mới ước lượng hệ số mùa vụ
+MIN_SEASONAL_MONTHS = 24
+
+BOOTSTRAP_SAMPLES = 1000
+
+# Hệ số làm trơn mũ mặc định cho dự báo theo danh mục
+CATEGORY_SMOOTHING_ALPHA = 0.5
+
+# Batch: lịch sử mặc định và số dòng mỗi lệnh INSERT nhiều dòng
+BATCH_HISTORY_MONTHS = 36
+FORECAST_INSERT_CHUNK = 5000
+
+
+def _month_of_year_matrix(start_period, length):
+    """Ma trận one-hot (length × 12): cột thứ k là tháng k + 1 trong năm"""
+    month_of_year = (start_period + np.arange(length)) % 12
+    return np.eye(12)[month_of_year]
+
+
+def fit_seasonal_trend(values, mask, start_period):
+    """Fit y = a + b*t + s[tháng trong năm] cho từng dòng của values (chuỗi × tháng).
+
+    mask đánh dấu các tháng thuộc lịch sử của chuỗi (tháng trước ngày bắt đầu không tính).
+    Trả về dict intercept (S,), slope (S,), season (S, 12), fitted (S, T), residuals (S, T) và
+    history_months (S,). Phần dư ngoài mask bằng 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    weights = np.asarray(mask, dtype=np.float64)
+    t = np.arange(values.shape[1], dtype=np.float64)
+
+    n = weights.sum(axis=1)
+    safe_n = np.maximum(n, 1)
+    t_mean = (weights * t).sum(axis=1) / safe_n
+    y_mean = (weights * values).sum(axis=1) / safe_n
+    t_centered = t - t_mean[:, None]
+
+    sxx = (weights * t_centered ** 2).sum(axis=1)
+    sxy = (weights * t_centered * (values - y_mean[:, None])).sum(axis=1)
+    slope = np.divide(sxy, sxx, out=np.zeros_like(sxy), where=sxx > 0)
+    intercept = y_mean - slope * t_mean
+    trend = intercept[:, None] + slope[:, None] * t
+
+    # Hệ số mùa vụ = trung bình phần dư sau khi bỏ xu hướng, theo tháng trong năm.
+    # Phần dư OLS có trung bình 0 nên tổng hệ số trên lịch sử tự bằng 0.
+    month_matrix = _month_of_year_matrix(start_period, values.shape[1])
+    detrended = weights * (values - trend)
+    month_counts = weights @ month_matrix
+    season = np.divide(detrended @ month_matrix, month_counts,
+                       out=np.zeros_like(month_counts), where=month_counts > 0)
+    season *= (n >= MIN_SEASONAL_MONTHS)[:, None]
+
+    fitted = trend + season @ month_matrix.T
+    return {
+        'intercept': intercept,
+        'slope': slope,
+        'season': season,
+        'fitted': fitted,
+        'residuals': weights * (values - fitted),
+        'history_months': n.astype(np.int64),
+    }
+
+
+def project(model, start_period, history_length, horizon):
+    """Giá trị dự báo (S, horizon) cho các tháng ngay sau lịch sử"""
+    t_future = history_length + np.arange(horizon, dtype=np.float64)
+    future_months = _month_of_year_matrix(start_period + history_length, horizon)
+    return (model['intercept'][:, None] + model['slope'][:, None] * t_future
+            + model['season'] @ future_months.T)
+
+
+def _sample_residuals(residuals, mask, size, rng):
+    """Lấy mẫu có hoàn lại từ phần dư trong mask của từng dòng: kết quả (samples, S, size)"""
+    samples = size[0]
+    valid = np.asarray(mask, dtype=bool)
+    n = valid.sum(axis=1)
+    # Vị trí hợp lệ của mỗi dòng được dồn lên đầu (argsort ổn định giữ thứ tự thời gian)
+    positions = np.argsort(~valid, axis=1, kind='stable')
+    draws = (rng.random((samples, residuals.shape[0], size[1])) * np.maximum(n, 1)[None, :, None]).astype(np.int64)
+    rows = np.arange(residuals.shape[0])[None, :, None]
+    return residuals[rows, positions[rows, draws]]
+
+
+def bootstrap_intervals(values, mask, start_period, horizon, model=None,
+                        samples=BOOTSTRAP_SAMPLES, confidence=0.9, seed=None):
+    """Khoảng tin cậy (lower, upper), mỗi mảng (S, horizon), bằng bootstrap phần dư.
+
+    Mỗi mẫu: chuỗi giả = fitted + phần dư lấy lại, fit lại mô hình (cả lô mẫu một lần),
+    dự báo và cộng thêm một phần dư ngẫu nhiên cho từng tháng tương lai.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mask = np.asarray(mask, dtype=bool)
+    series_count, history_length = values.shape
+    if model is None:
+        model = fit_seasonal_trend(values, mask, start_period)
+    rng = np.random.default_rng(seed)
+
+    resampled = _sample_residuals(model['residuals'], mask, (samples, history_length), rng)
+    pseudo = (model['fitted'][None, :, :] + resampled) * mask[None, :, :]
+
+    # Gộp (mẫu, chuỗi) thành một ma trận để fit lại tất cả cùng lúc
+    pseudo_model = fit_seasonal_trend(
+        pseudo.reshape(samples * series_count, history_length),
+        np.tile(mask, (samples, 1)),
+        start_period
+    )
+    simulated = project(pseudo_model, start_period, history_length, horizon).reshape(samples, series_count, horizon)
+    simulated += _sample_residuals(model['residuals'], mask, (samples, horizon), rng)
+
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(simulated, [tail, 100 - tail], axis=0)
+    return lower, upper
+
+
+def residual_quantile_intervals(model, mask, predicted, confidence=0.9):
+    """Khoảng dự báo nhanh cho batch: dự báo + phân vị phần dư của từng dòng (không bootstrap).
+
+    Phân vị nội suy tuyến tính như np.percentile, tính cho mọi dòng cùng lúc bằng sort.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    n = mask.sum(axis=1)
+    ordered = np.sort(np.where(mask, model['residuals'], np.inf), axis=1)
+
+    bounds = []
+    for quantile in ((1 - confidence) / 2, (1 + confidence) / 2):
+        position = quantile * np.maximum(n - 1, 0)
+        below = np.floor(position).astype(np.int64)
+        above = np.ceil(position).astype(np.int64)
+        low_value = np.take_along_axis(ordered, below[:, None], axis=1)[:, 0]
+        high_value = np.take_along_axis(ordered, above[:, None], axis=1)[:, 0]
+        offset = low_value + (high_value - low_value) * (position - below)
+        bounds.append(predicted + offset[:, None])
+    return bounds[0], bounds[1]
+
+
+def exponential_smoothing(values, alpha=CATEGORY_SMOOTHING_ALPHA):
+    """Mức làm trơn cuối của từng dòng (S,): l_0 = y_0, l_t = alpha*y_t + (1 - alpha)*l_{t-1}.
+
+    Dạng đóng l_{T-1} = values @ w với w_0 = (1-alpha)^(T-1), w_t = alpha*(1-alpha)^(T-1-t),
+    nên mọi dòng được tính bằng một phép nhân ma trận.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    length = values.shape[1]
+    if length == 0:
+        return np.zeros(values.shape[0])
+    weights = alpha * (1 - alpha) ** np.arange(length - 1, -1, -1, dtype=np.float64)
+    weights[0] = (1 - alpha) ** (length - 1)
+    return values @ weights
+
+
+def _fetch_array(statement, chunk_size=100000):
+    """Chạy câu SELECT số và trả về mảng float (số dòng × số cột).
+
+    Đọc bằng cursor DBAPI theo từng khối: với hàng triệu dòng, tạo Row của SQLAlchemy
+    cho từng dòng chậm hơn nhiều so với chính truy vấn.
+    """
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = compiled.construct_params()
+    if compiled.positional:
+        params = [params[name] for name in compiled.positiontup]
+
+    cursor = db.session.connection().connection.cursor()
+    try:
+        cursor.execute(str(compiled), params)
+        chunks = []
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            chunks.append(np.array(rows, dtype=np.float64))
+    finally:
+        cursor.close()
+
+    column_count = len(statement.selected_columns)
+    return np.concatenate(chunks) if chunks else np.zeros((0, column_count))
+
+
+class ForecastService:
+    """Dự báo chi tiêu của user cho N tháng tới"""
+
+    @staticmethod
+    def get_expense_history(user_id, today=None, history_months=FORECAST_HISTORY_MONTHS):
+        """Chi tiêu theo tháng (một truy vấn trên bảng tổng hợp) của các tháng đã kết thúc.
+
+        Trả về (values, start_period): values là mảng dày từ tháng đầu tiên có chi tiêu
+        đến tháng trước tháng hiện tại, tháng không có giao dịch bằng 0.
+        """
+        today = today or datetime.now().date()
+        current_period = today.year * 12 + today.month - 1
+        rows = UserMonthlyRollup.monthly_totals(
+            user_id, 'expense',
+            start_period=current_period - history_months,
+            end_period=current_period
+        )
+        if not rows:
+            return np.zeros(0), current_period
+
+        periods = np.array([int(row.year) * 12 + int(row.month) - 1 for row in rows], dtype=np.int64)
+        amounts = np.array([float(row.total_amount or 0) for row in rows], dtype=np.float64)
+        start_period = int(periods.min())
+        values = np.zeros(current_period - start_period)
+        np.add.at(values, periods - start_period, amounts)
+        return values, start_period
+
+    @staticmethod
+    def forecast(user_id, horizon=3, confidence=0.9, today=None, samples=BOOTSTRAP_SAMPLES):
+        """Dự báo chi tiêu từ tháng hiện tại đến horizon - 1 tháng sau.
+
+        Tháng hiện tại chưa kết thúc nên không dùng để fit, nó là tháng dự báo đầu tiên.
+        Trả về None nếu chưa có tháng nào đã kết thúc với chi tiêu.
+        """
+        today = today or datetime.now().date()
+        values, start_period = ForecastService.get_expense_history(user_id, today)
+        if len(values) == 0:
+            return None
+
+        values = values[None, :]
+        mask = np.ones_like(values, dtype=bool)
+        model = fit_seasonal_trend(values, mask, start_period)
+        predicted = project(model, start_period, values.shape[1], horizon)[0]
+        # Seed cố định theo user: cùng dữ liệu cho cùng khoảng tin cậy (khớp ETag)
+        lower, upper = bootstrap_intervals(values, mask, start_period, horizon, model=model,
+                                           samples=samples, confidence=confidence, seed=user_id)
+
+        first_period = start_period + values.shape[1]
+        forecasts = []
+        for step in range(horizon):
+            period = first_period + step
+            month = period % 12 + 1
+            forecasts.append({
+                'year': period // 12,
+                'month': month,
+                'month_name': calendar.month_name[month],
+                'predicted_amount': round(max(0.0, float(predicted[step])), 0),
+                'lower': round(max(0.0, float(lower[0, step])), 0),
+                'upper': round(max(0.0, float(upper[0, step])), 0)
+            })
+
+        history_months = int(model['history_months'][0])
+        return {
+            'horizon': horizon,
+            'confidence': confidence,
+            'method': 'trend_seasonal' if history_months >= MIN_SEASONAL_MONTHS else 'trend',
+            'history_months': history_months,
+            'trend_slope': float(model['slope'][0]),
+            'seasonal_factors': {
+                calendar.month_name[k + 1]: round(float(model['season'][0, k]), 0) for k in range(12)
+            },
+            'forecasts': forecasts,
+            'generated_at': datetime.now().isoformat()
+        }
+
+    @staticmethod
+    def get_expense_matrix(history_months=BATCH_HISTORY_MONTHS, today=None):
+        """Ma trận chi tiêu users × tháng đã kết thúc từ một truy vấn GROUP BY trên bảng tổng hợp.
+
+        Trả về (user_ids, values, mask, start_period); mask của mỗi user bắt đầu từ tháng
+        đầu tiên user có chi tiêu trong khoảng.
+        """
+        today = today or datetime.now().date()
+        end_period = today.year * 12 + today.month - 1
+        start_period = end_period - history_months
+        period = UserMonthlyRollup.period_expr()
+
+        data = _fetch_array(
+            select(
+                UserMonthlyRollup.user_id,
+                period,
+                func.sum(UserMonthlyRollup.total_amount)
+            ).where(
+                UserMonthlyRollup.type == 'expense',
+                UserMonthlyRollup.year >= start_period // 12,
+                UserMonthlyRollup.year <= (end_period - 1) // 12,
+                period >= start_period,
+                period < end_period
+            ).group_by(
+                UserMonthlyRollup.user_id,
+                UserMonthlyRollup.year,
+                UserMonthlyRollup.month
+            )
+        )
+        user_ids, user_index = np.unique(data[:, 0].astype(np.int64), return_inverse=True)
+        month_index = data[:, 1].astype(np.int64) - start_period
+
+        values = np.zeros((len(user_ids), history_months))
+        values[user_index, month_index] = data[:, 2]
+        present = np.zeros(values.shape, dtype=bool)
+        present[user_index, month_index] = True
+        first_month = present.argmax(axis=1)
+        mask = np.arange(history_months) >= first_month[:, None]
+        return user_ids, values, mask, start_period
+
+    @staticmethod
+    def forecast_all_users(horizon=3, history_months=BATCH_HISTORY_MONTHS, confidence=0.9, today=None):
+        """Dự báo cho mọi user có chi tiêu trong khoảng lịch sử và ghi đè bảng forecasts.
+
+        Cùng mô hình với forecast() nhưng fit tất cả user trong một lần; khoảng dự báo dùng
+        phân vị phần dư thay cho bootstrap. Trả về thống kê của lần chạy.
+        """
+        started = time.perf_counter()
+        user_ids, values, mask, start_period = ForecastService.get_expense_matrix(history_months, today)
+        loaded = time.perf_counter()
+
+        model = fit_seasonal_trend(values, mask, start_period)
+        predicted = project(model, start_period, history_months, horizon)
+        lower, upper = residual_quantile_intervals(model, mask, predicted, confidence)
+        predicted, lower, upper = (np.round(np.maximum(array, 0), 0) for array in (predicted, lower, upper))
+        fitted = time.perf_counter()
+
+        generated_at = datetime.utcnow()
+        first_period = start_period + history_months
+        history = model['history_months'].tolist()
+        slopes = model['slope'].tolist()
+        methods = ['trend_seasonal' if n >= MIN_SEASONAL_MONTHS else 'trend' for n in history]
+        ids = user_ids.tolist()
+        predicted, lower, upper = predicted.tolist(), lower.tolist(), upper.tolist()
+
+        db.session.execute(db.delete(Forecast))
+        rows = []
+        written = 0
+        for step in range(horizon):
+            period = first_period + step
+            year, month = period // 12, period % 12 + 1
+            for i, user_id in enumerate(ids):
+                rows.append({
+                    'user_id': user_id,
+                    'year': year,
+                    'month': month,
+                    'predicted_amount': predicted[i][step],
+                    'lower_amount': lower[i][step],
+                    'upper_amount': upper[i][step],
+                    'method': methods[i],
+                    'history_months': history[i],
+                    'trend_slope': slopes[i],
+                    'generated_at': generated_at
+                })
+                if len(rows) >= FORECAST_INSERT_CHUNK:
+                    db.session.execute(db.insert(Forecast), rows)
+                    written += len(rows)
+                    rows = []
+        if rows:
+            db.session.execute(db.insert(Forecast), rows)
+            written += len(rows)
+        db.session.commit()
+
+        return {
+            'users': len(ids),
+            'rows': written,
+            'load_seconds': round(loaded - started, 3),
+            'fit_seconds': round(fitted - loaded, 3),
+            'write_seconds': round(time.perf_counter() - fitted, 3)
+        }
+
+    @staticmethod
+    def forecast_categories(user_id, months=3, alpha=CATEGORY_SMOOTHING_ALPHA, today=None):
+        """Dự báo chi tiêu tháng hiện tại theo từng danh mục.
+
+        Ma trận danh mục × tháng (months tháng đã kết thúc gần nhất, tháng trống bằng 0)
+        lấy từ một truy vấn trên bảng tổng hợp; tên danh mục lấy từ cache.
+        """
+        today = today or datetime.now().date()
+        months = min(max(months, 1), FORECAST_HISTORY_MONTHS)
+        end_period = today.year * 12 + today.month - 1
+        start_period = end_period - months
+        period = UserMonthlyRollup.period_expr()
+
+        rows = db.session.query(
+            UserMonthlyRollup.category_id,
+            period.label('period'),
+            func.sum(UserMonthlyRollup.total_amount).label('total_amount'),
+            func.sum(UserMonthlyRollup.transaction_count).label('transaction_count')
+        ).filter(
+            UserMonthlyRollup.user_id == user_id,
+            UserMonthlyRollup.type == 'expense',
+            UserMonthlyRollup.year >= start_period // 12,
+            UserMonthlyRollup.year <= (end_period - 1) // 12,
+            period >= start_period,
+            period < end_period
+        ).group_by(
+            UserMonthlyRollup.category_id,
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month
+        ).all()
+        if not rows:
+            return []
+
+        category_ids, category_index = np.unique([row.category_id for row in rows], return_inverse=True)
+        month_index = np.array([row.period for row in rows], dtype=np.int64) - start_period
+        amounts = np.zeros((len(category_ids), months))
+        amounts[category_index, month_index] = [float(row.total_amount or 0) for row in rows]
+        counts = np.zeros(len(category_ids))
+        np.add.at(counts, category_index, [int(row.transaction_count or 0) for row in rows])
+
+        predicted = exponential_smoothing(amounts, alpha)
+        categories = get_category_map()
+
+        predictions = []
+        for i, category_id in enumerate(category_ids.tolist()):
+            category = categories.get(category_id)
+            predictions.append({
+                'category_id': category_id,
+                'category_name': category.name if category else 'Unknown',
+                'predicted_amount': round(float(predicted[i]), 0),
+                'avg_transactions_per_month': round(float(counts[i]) / months, 1),
+                'monthly_amounts': amounts[i].tolist()
+            })
+        return sorted(predictions, key=lambda x: x['predicted_amount'], reverse=True)
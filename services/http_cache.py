@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+"""
+HTTP caching helpers
+ETag cho các endpoint đọc dựa trên users.data_version: nếu dữ liệu của user không đổi
+thì trả 304 mà không chạy lại các truy vấn tổng hợp.
+"""
+
+import hashlib
+from datetime import date
+from functools import wraps
+from flask import request, make_response
+from flask_login import current_user
+from services.category_cache import get_categories_version
+
+
+def user_data_etag(user, today=None):
+    """ETag cho dữ liệu của user: đổi khi data_version, ngày hiện tại hoặc danh mục thay đổi"""
+    today = today or date.today()
+    key = f'{user.id}:{user.data_version}:{today.isoformat()}:{get_categories_version()}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()[:20]
+
+
+def data_version_etag(view):
+    """Decorator (đặt dưới @login_required): trả 304 khi If-None-Match khớp ETag hiện tại"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = user_data_etag(current_user)
+        if etag in request.if_none_match:
+            response = make_response('', 304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            # View tự đánh dấu no-store khi trả kết quả cũ hơn data_version hiện tại
+            if response.status_code != 200 or 'no-store' in response.headers.get('Cache-Control', ''):
+                return response
+        response.set_etag(etag)
+        # Trình duyệt luôn hỏi lại server, nhưng được dùng bản đã lưu khi nhận 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
+    return wrapper
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Keyset (cursor) pagination
+Phân trang theo con trỏ (giá trị cột sắp xếp, id) thay cho OFFSET + COUNT(*) mỗi trang
+"""
+
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Con trỏ phân trang không hợp lệ"""
+
+
+def encode_cursor(sort_value, row_id):
+    """Mã hóa (giá trị sắp xếp, id) thành chuỗi an toàn cho URL"""
+    payload = json.dumps([sort_value.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort_column):
+    """Giải mã con trỏ, trả về (giá trị sắp xếp, id)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        raw_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        if sort_column.type.python_type is datetime:
+            sort_value = datetime.fromisoformat(raw_value)
+        else:
+            sort_value = date.fromisoformat(raw_value)
+        return sort_value, int(row_id)
+    except (ValueError, TypeError, json.JSONDecodeError) as e:
+        raise InvalidCursor(f'Invalid cursor: {cursor}') from e
+
+
+class KeysetPage:
+    """Một trang kết quả phân trang theo con trỏ (tương thích một phần với Pagination của Flask-SQLAlchemy)"""
+
+    def __init__(self, items, per_page, next_cursor, total, total_is_estimate):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.has_next = next_cursor is not None
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+
+def keyset_paginate(query, sort_column, id_column, cursor=None, per_page=10):
+    """Lấy một trang sắp xếp giảm dần theo (sort_column, id_column), không dùng OFFSET.
+
+    Trả về (items, next_cursor); next_cursor là None ở trang cuối.
+    """
+    if cursor:
+        sort_value, row_id = decode_cursor(cursor, sort_column)
+        # sort <= v AND (sort < v OR id < i): giữ điều kiện phạm vi để dùng được index
+        query = query.filter(
+            sort_column <= sort_value,
+            or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < row_id))
+        )
+
+    rows = query.order_by(sort_column.desc(), id_column.desc()).limit(per_page + 1).all()
+    items = rows[:per_page]
+
+    next_cursor = None
+    if len(rows) > per_page:
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, sort_column.key), getattr(last, id_column.key))
+    return items, next_cursor
+
+
+# Bộ đệm COUNT(*) trong tiến trình cho các bộ lọc không tính được từ bảng tổng hợp
+COUNT_CACHE_TTL = 60
+COUNT_CACHE_MAX_KEYS = 10000
+_count_cache = {}
+_count_cache_lock = threading.Lock()
+
+
+def cached_count(key, query, ttl=COUNT_CACHE_TTL):
+    """COUNT(*) được lưu đệm theo key trong ttl giây"""
+    now = time.monotonic()
+    with _count_cache_lock:
+        cached = _count_cache.get(key)
+        if cached and cached[1] > now:
+            return cached[0]
+
+    total = query.order_by(None).count()
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_KEYS:
+            _count_cache.clear()
+        _count_cache[key] = (total, now + ttl)
+    return total
+
+
+def transaction_total(query, user_id=None, transaction_type=None, category_id=None, date_from=None, date_to=None):
+    """Tổng số giao dịch cho trang con trỏ, trả về (total, is_estimate).
+
+    Không lọc theo ngày: đếm chính xác từ bảng tổng hợp tháng (O(số tháng)).
+    Có lọc theo ngày: COUNT(*) được lưu đệm, có thể trễ tối đa COUNT_CACHE_TTL giây.
+    """
+    if not date_from and not date_to:
+        from models.monthly_rollup import UserMonthlyRollup
+        return UserMonthlyRollup.count_transactions(user_id, transaction_type, category_id), False
+
+    key = ('transactions', user_id, transaction_type, category_id, date_from, date_to)
+    return cached_count(key, query), True
@@ -1,11 +1,22 @@
 from datetime import datetime, timedelta
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import func, extract
-from models.transaction import Transaction
+from sqlalchemy import func
+from models.monthly_rollup import UserMonthlyRollup
 from app import db
+from services.result_cache import VersionedResultCache
 import numpy as np
-from sklearn.linear_model import LinearRegression
 import calendar
+from collections import namedtuple
+
+# Số tháng mặc định cho trung bình và xu hướng
+AVERAGE_MONTHS = 3
+TREND_MONTHS = 6
+
+# Chi tiêu theo tháng: period = year * 12 + month - 1, current_period là tháng hiện tại
+MonthlySeries = namedtuple('MonthlySeries', ['periods', 'amounts', 'current_period'])
+
+# Kết quả dự đoán theo (user, tháng hiện tại), version là users.data_version
+_prediction_cache = VersionedResultCache('prediction')
 
 class ExpensePredictionService:
     """Service for predicting monthly expenses based on historical data"""
@@ -16,149 +27,177 @@ class ExpensePredictionService:
         end_date = datetime.now().date()
         start_date = end_date - relativedelta(months=months_back)
         
-        # Query monthly expenses
+        # Query monthly expenses from the rollup table
+        start_period = start_date.year * 12 + start_date.month - 1
+        end_period = end_date.year * 12 + end_date.month
         monthly_data = db.session.query(
-            extract('year', Transaction.date).label('year'),
-            extract('month', Transaction.date).label('month'),
-            func.sum(Transaction.amount).label('total_expense')
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month,
+            func.sum(UserMonthlyRollup.total_amount).label('total_expense')
         ).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'expense',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
+            UserMonthlyRollup.user_id == user_id,
+            UserMonthlyRollup.type == 'expense',
+            UserMonthlyRollup.period_expr() >= start_period,
+            UserMonthlyRollup.period_expr() < end_period
         ).group_by(
-            extract('year', Transaction.date),
-            extract('month', Transaction.date)
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month
         ).order_by(
-            extract('year', Transaction.date),
-            extract('month', Transaction.date)
+            UserMonthlyRollup.year,
+            UserMonthlyRollup.month
         ).all()
         
         return monthly_data
     
     @staticmethod
-    def predict_current_month_simple_average(user_id, months_to_average=3):
+    def get_monthly_expense_series(user_id, months_back=12):
+        """Chi tiêu theo tháng của N tháng gần nhất dưới dạng mảng NumPy (một truy vấn)"""
+        current_month = datetime.now().date()
+        monthly_data = ExpensePredictionService.get_monthly_expenses(user_id, months_back)
+        return MonthlySeries(
+            periods=np.array([int(m.year) * 12 + int(m.month) - 1 for m in monthly_data], dtype=np.int64),
+            amounts=np.array([float(m.total_expense) for m in monthly_data], dtype=np.float64),
+            current_period=current_month.year * 12 + current_month.month - 1
+        )
+    
+    @staticmethod
+    def _window(series, months_back):
+        """Các tháng trong khoảng get_monthly_expenses(user_id, months_back) sẽ trả về"""
+        mask = series.periods >= series.current_period - months_back
+        return series.periods[mask], series.amounts[mask]
+    
+    @staticmethod
+    def _historical_data(periods, amounts, weights=None):
+        historical_data = []
+        for i, (period, amount) in enumerate(zip(periods.tolist(), amounts.tolist())):
+            month = period % 12 + 1
+            item = {
+                'year': period // 12,
+                'month': month,
+                'month_name': calendar.month_name[month],
+                'amount': amount
+            }
+            if weights is not None:
+                item['weight'] = float(weights[i])
+            historical_data.append(item)
+        return historical_data
+    
+    @staticmethod
+    def fit_linear_trend(y):
+        """Bình phương tối thiểu dạng đóng cho y theo x = 0..n-1, trả về (slope, intercept, r_squared)"""
+        x = np.arange(len(y), dtype=np.float64)
+        x_centered = x - x.mean()
+        y_mean = y.mean()
+        slope = float(np.dot(x_centered, y - y_mean) / np.dot(x_centered, x_centered))
+        intercept = float(y_mean - slope * x.mean())
+        
+        ss_res = float(np.sum((y - (intercept + slope * x)) ** 2))
+        ss_tot = float(np.sum((y - y_mean) ** 2))
+        if ss_tot == 0:
+            # Cùng quy ước với sklearn r2_score khi y không đổi
+            r_squared = 1.0 if ss_res == 0 else 0.0
+        else:
+            r_squared = 1 - ss_res / ss_tot
+        return slope, intercept, r_squared
+    
+    @staticmethod
+    def predict_current_month_simple_average(user_id, months_to_average=3, series=None):
         """Predict current month expenses using simple average of past months"""
-        monthly_data = ExpensePredictionService.get_monthly_expenses(user_id, months_to_average + 1)
+        if series is None:
+            series = ExpensePredictionService.get_monthly_expense_series(user_id, months_to_average + 1)
+        periods, amounts = ExpensePredictionService._window(series, months_to_average + 1)
         
-        if len(monthly_data) < 1:
+        if len(amounts) < 1:
             return None
         
         # Get available months (use all if less than requested)
-        available_months = min(len(monthly_data), months_to_average)
-        recent_months = monthly_data[-available_months:]
-        total_expenses = [float(month.total_expense) for month in recent_months]
+        periods, amounts = periods[-months_to_average:], amounts[-months_to_average:]
         
         # Calculate average
-        prediction = sum(total_expenses) / len(total_expenses)
+        prediction = float(amounts.sum() / len(amounts))
         
         return {
             'predicted_amount': round(prediction, 0),
             'method': 'simple_average',
             'months_used': months_to_average,
-            'historical_data': [
-                {
-                    'year': int(month.year),
-                    'month': int(month.month),
-                    'month_name': calendar.month_name[int(month.month)],
-                    'amount': float(month.total_expense)
-                } for month in recent_months
-            ]
+            'historical_data': ExpensePredictionService._historical_data(periods, amounts)
         }
     
     @staticmethod
-    def predict_current_month_weighted_average(user_id, months_to_average=3):
+    def predict_current_month_weighted_average(user_id, months_to_average=3, series=None):
         """Predict current month expenses using weighted average (recent months have more weight)"""
-        monthly_data = ExpensePredictionService.get_monthly_expenses(user_id, months_to_average + 1)
+        if series is None:
+            series = ExpensePredictionService.get_monthly_expense_series(user_id, months_to_average + 1)
+        periods, amounts = ExpensePredictionService._window(series, months_to_average + 1)
         
-        if len(monthly_data) < 1:
+        if len(amounts) < 1:
             return None
         
         # Get available months (use all if less than requested)
-        available_months = min(len(monthly_data), months_to_average)
-        recent_months = monthly_data[-available_months:]
-        total_expenses = [float(month.total_expense) for month in recent_months]
+        periods, amounts = periods[-months_to_average:], amounts[-months_to_average:]
         
         # Create weights (more recent = higher weight)
-        weights = np.arange(1, len(total_expenses) + 1)
+        weights = np.arange(1, len(amounts) + 1)
         weights = weights / weights.sum()
         
         # Calculate weighted average
-        prediction = np.average(total_expenses, weights=weights)
+        prediction = float(np.average(amounts, weights=weights))
         
         return {
             'predicted_amount': round(prediction, 0),
             'method': 'weighted_average',
             'months_used': months_to_average,
             'weights': weights.tolist(),
-            'historical_data': [
-                {
-                    'year': int(month.year),
-                    'month': int(month.month),
-                    'month_name': calendar.month_name[int(month.month)],
-                    'amount': float(month.total_expense),
-                    'weight': float(weights[i])
-                } for i, month in enumerate(recent_months)
-            ]
+            'historical_data': ExpensePredictionService._historical_data(periods, amounts, weights)
         }
     
     @staticmethod
-    def predict_current_month_linear_regression(user_id, months_back=6):
+    def predict_current_month_linear_regression(user_id, months_back=6, series=None):
         """Predict current month expenses using linear regression trend"""
-        monthly_data = ExpensePredictionService.get_monthly_expenses(user_id, months_back)
+        if series is None:
+            series = ExpensePredictionService.get_monthly_expense_series(user_id, months_back)
+        periods, amounts = ExpensePredictionService._window(series, months_back)
         
-        if len(monthly_data) < 2:
+        if len(amounts) < 2:
             return None
         
-        # Prepare data for linear regression
-        X = np.array(range(len(monthly_data))).reshape(-1, 1)
-        y = np.array([float(month.total_expense) for month in monthly_data])
-        
-        # Fit linear regression model
-        model = LinearRegression()
-        model.fit(X, y)
-        
-        # Predict current month (current index)
-        current_month_index = len(monthly_data)
-        prediction = model.predict([[current_month_index]])[0]
-        
-        # Calculate R-squared for model accuracy
-        r_squared = model.score(X, y)
+        # Fit trend on month index, predict current month (current index)
+        slope, intercept, r_squared = ExpensePredictionService.fit_linear_trend(amounts)
+        prediction = intercept + slope * len(amounts)
         
         return {
             'predicted_amount': round(max(0, prediction), 0),  # Ensure non-negative
             'method': 'linear_regression',
-            'months_used': len(monthly_data),
-            'trend_slope': float(model.coef_[0]),
-            'r_squared': float(r_squared),
+            'months_used': len(amounts),
+            'trend_slope': slope,
+            'r_squared': r_squared,
             'accuracy': 'High' if r_squared > 0.7 else 'Medium' if r_squared > 0.4 else 'Low',
-            'historical_data': [
-                {
-                    'year': int(month.year),
-                    'month': int(month.month),
-                    'month_name': calendar.month_name[int(month.month)],
-                    'amount': float(month.total_expense)
-                } for month in monthly_data
-            ]
+            'historical_data': ExpensePredictionService._historical_data(periods, amounts)
         }
     
     @staticmethod
-    def get_comprehensive_prediction(user_id):
+    def get_comprehensive_prediction(user_id, series=None):
         """Get predictions using multiple methods and return the best one"""
         predictions = {}
         
+        # One fetch covers the windows of all three methods
+        if series is None:
+            series = ExpensePredictionService.get_monthly_expense_series(
+                user_id, max(AVERAGE_MONTHS + 1, TREND_MONTHS)
+            )
+        
         # Simple average (use available months, prefer 3 if available)
-        simple_pred = ExpensePredictionService.predict_current_month_simple_average(user_id, 3)
+        simple_pred = ExpensePredictionService.predict_current_month_simple_average(user_id, AVERAGE_MONTHS, series)
         if simple_pred:
             predictions['simple_average'] = simple_pred
         
         # Weighted average (use available months, prefer 3 if available)
-        weighted_pred = ExpensePredictionService.predict_current_month_weighted_average(user_id, 3)
+        weighted_pred = ExpensePredictionService.predict_current_month_weighted_average(user_id, AVERAGE_MONTHS, series)
         if weighted_pred:
             predictions['weighted_average'] = weighted_pred
         
         # Linear regression (use available months, prefer 6 if available)
-        linear_pred = ExpensePredictionService.predict_current_month_linear_regression(user_id, 6)
+        linear_pred = ExpensePredictionService.predict_current_month_linear_regression(user_id, TREND_MONTHS, series)
         if linear_pred:
             predictions['linear_regression'] = linear_pred
         
@@ -190,37 +229,22 @@ class ExpensePredictionService:
             'generated_at': datetime.now().isoformat()
         }
     
+    @staticmethod
+    def get_cached_prediction(user_id, data_version):
+        """get_comprehensive_prediction qua cache, trả về (prediction, cache_state).
+        
+        Khi dữ liệu đổi trong cùng tháng, trả kết quả cũ và tính lại ở thread nền.
+        Sang tháng mới là key mới nên được tính ngay.
+        """
+        today = datetime.now().date()
+        return _prediction_cache.get(
+            (user_id, today.year, today.month),
+            data_version,
+            lambda: ExpensePredictionService.get_comprehensive_prediction(user_id)
+        )
+    
     @staticmethod
     def get_category_predictions(user_id, months_to_average=3):
-        """Predict expenses by category for next month"""
-        end_date = datetime.now().date()
-        start_date = end_date - relativedelta(months=months_to_average)
-        
-        # Query expenses by category for the past N months
-        category_data = db.session.query(
-            Transaction.category_id,
-            func.avg(Transaction.amount).label('avg_amount'),
-            func.count(Transaction.id).label('transaction_count')
-        ).join(
-            Transaction.category
-        ).filter(
-            Transaction.user_id == user_id,
-            Transaction.type == 'expense',
-            Transaction.date >= start_date,
-            Transaction.date <= end_date
-        ).group_by(
-            Transaction.category_id
-        ).all()
-        
-        predictions = []
-        for category in category_data:
-            from models.category import Category
-            cat_obj = Category.query.get(category.category_id)
-            predictions.append({
-                'category_id': category.category_id,
-                'category_name': cat_obj.name if cat_obj else 'Unknown',
-                'predicted_amount': round(float(category.avg_amount), 0),
-                'avg_transactions_per_month': round(float(category.transaction_count) / months_to_average, 1)
-            })
-        
-        return sorted(predictions, key=lambda x: x['predicted_amount'], reverse=True)
+        """Predict this month's expenses by category (exponential smoothing over past months)"""
+        from services.forecast_service import ForecastService
+        return ForecastService.forecast_categories(user_id, months_to_average)
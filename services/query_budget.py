@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Query budget
+Ghi lại các câu lệnh SQL một đoạn code (thường là một request qua test client) gửi xuống
+database, báo lỗi khi vượt số câu cho phép và khi cùng một câu lệnh chạy lặp lại với
+tham số khác nhau (dấu hiệu N+1).
+
+Trong test dùng fixture query_budget (tests/conftest.py):
+
+    def test_dashboard(client, query_budget):
+        with query_budget(5):
+            client.get('/api/dashboard/data')
+"""
+
+from collections import namedtuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from services.sql_utils import normalize_statement
+
+# Cùng một câu lệnh chạy từ ngần này lần trở lên với tham số khác nhau thì coi là N+1
+N_PLUS_ONE_THRESHOLD = 3
+
+RecordedStatement = namedtuple('RecordedStatement', ['statement', 'parameters'])
+RepeatedStatement = namedtuple('RepeatedStatement', ['statement', 'count', 'distinct_parameters'])
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Vượt số câu lệnh cho phép hoặc phát hiện N+1"""
+
+
+class QueryRecorder:
+    """Context manager ghi lại mọi câu lệnh chạy trong khối with.
+
+    Mặc định nghe trên mọi Engine nên không cần app context; truyền engine để chỉ ghi một engine.
+    """
+
+    def __init__(self, engine=None):
+        self.target = engine if engine is not None else Engine
+        self.statements = []
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(RecordedStatement(statement, parameters))
+
+    def __enter__(self):
+        event.listen(self.target, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        event.remove(self.target, 'before_cursor_execute', self._record)
+        return False
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def repeated(self, threshold=N_PLUS_ONE_THRESHOLD):
+        """Các câu lệnh chạy >= threshold lần với ít nhất hai bộ tham số khác nhau"""
+        groups = {}
+        for recorded in self.statements:
+            groups.setdefault(normalize_statement(recorded.statement), []).append(repr(recorded.parameters))
+        return [
+            RepeatedStatement(statement, len(parameters), len(set(parameters)))
+            for statement, parameters in groups.items()
+            if len(parameters) >= threshold and len(set(parameters)) > 1
+        ]
+
+    def report(self):
+        """Danh sách câu lệnh đã ghi, để đưa vào thông báo lỗi"""
+        return '\n'.join(
+            f'  {i}. {normalize_statement(recorded.statement)}  {recorded.parameters!r}'
+            for i, recorded in enumerate(self.statements, 1)
+        )
+
+
+class QueryBudget(QueryRecorder):
+    """QueryRecorder báo QueryBudgetExceeded khi ra khỏi khối with nếu vượt ngân sách.
+
+    allow_n_plus_one=True bỏ qua kiểm tra câu lệnh lặp (khi lặp là chủ ý).
+    """
+
+    def __init__(self, max_queries, engine=None, allow_n_plus_one=False, threshold=N_PLUS_ONE_THRESHOLD):
+        super().__init__(engine)
+        self.max_queries = max_queries
+        self.allow_n_plus_one = allow_n_plus_one
+        self.threshold = threshold
+
+    def __exit__(self, exc_type, exc, traceback):
+        super().__exit__(exc_type, exc, traceback)
+        if exc_type is None:
+            self.check()
+        return False
+
+    def check(self):
+        problems = []
+        if self.count > self.max_queries:
+            problems.append(f'{self.count} câu lệnh, vượt ngân sách {self.max_queries}')
+        if not self.allow_n_plus_one:
+            for repeated in self.repeated(self.threshold):
+                problems.append(
+                    f'có thể là N+1: chạy {repeated.count} lần với {repeated.distinct_parameters} bộ tham số: '
+                    f'{repeated.statement}'
+                )
+        if problems:
+            raise QueryBudgetExceeded('\n'.join(problems) + '\nCác câu lệnh đã chạy:\n' + self.report())
+
+
+def assert_query_budget(client, url, max_queries, method='GET', allow_n_plus_one=False, **kwargs):
+    """Gọi một endpoint qua Flask test client trong QueryBudget, trả về response"""
+    with QueryBudget(max_queries, allow_n_plus_one=allow_n_plus_one):
+        response = client.open(url, method=method, **kwargs)
+        # Đọc hết body để tính cả truy vấn của response dạng stream
+        response.get_data()
+    return response
+
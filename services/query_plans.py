@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+"""
+Query plan checks
+Chạy các endpoint nóng (kể cả stream NDJSON và danh sách giao dịch của admin) cho một user
+trên database đã có dữ liệu và kiểm tra hai điều:
+
+- Ngân sách câu lệnh (QUERY_BUDGETS): số câu SQL mỗi request không vượt mức khai báo và
+  không có câu lệnh lặp lại với tham số khác nhau (N+1).
+- Kế hoạch thực thi (HOT_PATHS): EXPLAIN QUERY PLAN của từng câu lệnh đọc transactions /
+  user_monthly_rollup không quét toàn bảng, không sắp xếp bằng B-tree tạm và dùng index
+  mong đợi cho đủ các cột (ví dụ khi ai đó thêm lại extract() vào điều kiện).
+
+Mọi thay đổi trong lúc kiểm tra (budget tạm) được rollback. Kế hoạch chỉ hỗ trợ SQLite.
+"""
+
+import re
+from collections import namedtuple
+from datetime import datetime
+from flask_login import login_user
+from app import db
+from models.user import User
+from models.monthly_budget import MonthlyBudget
+from models.monthly_rollup import UserMonthlyRollup
+from services.dashboard_service import DashboardService
+from services.query_budget import QueryRecorder, QueryBudget, QueryBudgetExceeded
+from services.sql_utils import normalize_statement, explain_statement
+
+# expected_plans: mỗi mẫu phải khớp ít nhất một dòng kế hoạch của endpoint. Ghi cả các cột
+# dùng trong index để bắt cả trường hợp index vẫn được dùng nhưng chỉ cho một phần điều kiện
+# dòng SCAN khớp một mẫu expected_plans là chủ ý (ví dụ stream toàn bảng theo thứ tự index)
+HotPath = namedtuple('HotPath', ['name', 'url', 'expected_plans', 'admin'], defaults=(False,))
+
+HOT_PATHS = [
+    HotPath('dashboard', '/api/dashboard/data', [
+        r'SEARCH user_monthly_rollup USING (COVERING )?INDEX sqlite_autoindex_user_monthly_rollup_1 \(user_id=\?',
+        r'SEARCH transactions USING (COVERING )?INDEX ix_transactions_user_created_at \(user_id=\?\)',
+    ]),
+    HotPath('transactions_list', '/api/transactions/list?page=3&per_page=10', [
+        r'SEARCH transactions USING (COVERING )?INDEX ix_transactions_user_date \(user_id=\?\)',
+    ]),
+    HotPath('transactions_list_cursor', '/api/transactions/list?mode=cursor&per_page=10', [
+        r'SEARCH transactions USING (COVERING )?INDEX ix_transactions_user_date \(user_id=\?\)',
+    ]),
+    HotPath('transactions_stream', '/api/transactions?stream=ndjson', [
+        r'SEARCH transactions USING (COVERING )?INDEX ix_transactions_user_date \(user_id=\?\)',
+    ]),
+    HotPath('admin_transactions_stream', '/api/admin/transactions?stream=ndjson', [
+        r'^SCAN transactions USING INDEX ix_transactions_created_at$',
+    ], admin=True),
+    # Tổng số giao dịch toàn hệ thống đọc từ bảng tổng hợp (nhỏ hơn nhiều so với transactions)
+    HotPath('admin_transactions_page', '/admin/transactions?page=2', [
+        r'^SCAN transactions USING INDEX ix_transactions_created_at$',
+        r'^SCAN user_monthly_rollup$',
+    ], admin=True),
+    HotPath('admin_transactions_cursor', '/admin/transactions?mode=cursor', [
+        r'^SCAN transactions USING INDEX ix_transactions_created_at$',
+        r'^SCAN user_monthly_rollup$',
+    ], admin=True),
+    HotPath('budget_alert', '/api/budget/alert', [
+        r'SEARCH transactions USING COVERING INDEX ix_transactions_user_type_date_amount '
+        r'\(user_id=\? AND type=\? AND date>\? AND date<\?\)',
+    ]),
+    HotPath('stats_monthly', '/api/stats/monthly?months=12', [
+        r'SEARCH user_monthly_rollup USING (COVERING )?INDEX sqlite_autoindex_user_monthly_rollup_1 '
+        r'\(user_id=\? AND year>\? AND year<\?\)',
+    ]),
+]
+
+# Số câu lệnh tối đa của mỗi endpoint (sau một request làm nóng cache danh mục / kết quả),
+# đồng thời kiểm tra N+1: cùng câu lệnh lặp lại với tham số khác nhau
+BudgetedPath = namedtuple('BudgetedPath', ['name', 'url', 'max_queries', 'admin'])
+
+QUERY_BUDGETS = [
+    BudgetedPath('dashboard_api', '/api/dashboard/data', DashboardService.QUERY_BUDGET, False),
+    # Trang HTML thêm một truy vấn cho biểu đồ 6 tháng
+    BudgetedPath('dashboard_html', '/dashboard', DashboardService.QUERY_BUDGET + 1, False),
+    BudgetedPath('admin_categories', '/api/admin/categories', 2, True),
+    BudgetedPath('category_predictions', '/api/predict-spending/categories', 1, False),
+]
+
+CHECKED_TABLES = ('transactions', 'user_monthly_rollup')
+# SCAN ... USING INDEX vẫn là đọc toàn bộ index, cũng tính là quét toàn bảng
+_FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(%s)\b' % '|'.join(CHECKED_TABLES))
+_TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+_READS_CHECKED_TABLE = re.compile(r'\bFROM (?:%s)\b' % '|'.join(CHECKED_TABLES))
+
+PlanResult = namedtuple('PlanResult', ['name', 'statements', 'failures'])
+BudgetResult = namedtuple('BudgetResult', ['name', 'queries', 'max_queries', 'failures'])
+
+
+def heaviest_user_id():
+    """User có nhiều giao dịch nhất (theo bảng tổng hợp)"""
+    return db.session.query(UserMonthlyRollup.user_id).group_by(UserMonthlyRollup.user_id).order_by(
+        db.func.sum(UserMonthlyRollup.transaction_count).desc()
+    ).limit(1).scalar()
+
+
+def capture_statements(app, user, url, recorder=None, full_body=True):
+    """Chạy endpoint trong request context của user (cùng session), trả về các câu lệnh đã chạy.
+
+    User đã đăng nhập sẵn nên câu load user của Flask-Login không được tính.
+    full_body=False chỉ đọc khối đầu tiên của response dạng stream (đủ để câu lệnh đã chạy).
+    """
+    recorder = recorder if recorder is not None else QueryRecorder(db.engine)
+    with app.test_request_context(url):
+        login_user(user)
+        with recorder:
+            response = app.make_response(app.full_dispatch_request())
+            if full_body:
+                # Đọc hết body để tính cả truy vấn của response dạng stream
+                response.get_data()
+            else:
+                next(iter(response.iter_encoded()), None)
+            response.close()
+        if response.status_code >= 400:
+            raise RuntimeError(f'{url} -> HTTP {response.status_code}')
+    return recorder.statements
+
+
+def check_plan(statement, plan, allowed_scans=()):
+    """Các vấn đề trong kế hoạch của một câu lệnh; allowed_scans là các mẫu SCAN được chấp nhận"""
+    failures = []
+    for detail in plan:
+        if _FULL_SCAN.match(detail) and not any(re.search(pattern, detail) for pattern in allowed_scans):
+            failures.append(f'full scan "{detail}"')
+        elif detail.startswith(_TEMP_SORT) and re.search(r'\bFROM transactions\b', statement):
+            failures.append(f'unindexed sort "{detail}"')
+    return failures
+
+
+def _check_user(user_id=None):
+    user = db.session.get(User, user_id or heaviest_user_id())
+    if user is None:
+        raise RuntimeError('Không có user nào có giao dịch: chạy `flask generate-data` trước')
+    return user
+
+
+def _admin_user():
+    admin = User.query.filter_by(is_admin=True).order_by(User.id).first()
+    if admin is None:
+        raise RuntimeError('Không có tài khoản admin để kiểm tra các endpoint quản trị')
+    return admin
+
+
+def check_query_budgets(app, user_id=None, budgets=QUERY_BUDGETS):
+    """Chạy từng endpoint trong QueryBudget, trả về danh sách BudgetResult"""
+    user = _check_user(user_id)
+    admin = _admin_user()
+    results = []
+    try:
+        for path in budgets:
+            path_user = admin if path.admin else user
+            # Request đầu tiên làm nóng cache ở cấp module, chỉ đo request thứ hai
+            capture_statements(app, path_user, path.url)
+            budget = QueryBudget(path.max_queries, db.engine)
+            try:
+                capture_statements(app, path_user, path.url, budget)
+                failures = []
+            except QueryBudgetExceeded as e:
+                failures = [str(e)]
+            results.append(BudgetResult(path.name, budget.count, path.max_queries, failures))
+    finally:
+        db.session.rollback()
+    return results
+
+
+def check_hot_paths(app, user_id=None, hot_paths=HOT_PATHS):
+    """Kiểm tra kế hoạch của các endpoint nóng, trả về danh sách PlanResult"""
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError('Query plan checks only support SQLite (EXPLAIN QUERY PLAN)')
+
+    user = _check_user(user_id)
+    admin = _admin_user()
+
+    # Cảnh báo ngân sách chỉ truy vấn chi tiêu khi user có budget tháng này (rollback ở cuối)
+    if not MonthlyBudget.get_current_month_budget(user.id):
+        now = datetime.now()
+        db.session.add(MonthlyBudget(user_id=user.id, year=now.year, month=now.month, budget_limit=10000000))
+        db.session.flush()
+
+    cursor = db.session.connection().connection.dbapi_connection.cursor()
+    results = []
+    try:
+        for hot_path in hot_paths:
+            statements = []
+            failures = []
+            plan_text = []
+            path_user = admin if hot_path.admin else user
+            for recorded in capture_statements(app, path_user, hot_path.url, full_body=False):
+                if not _READS_CHECKED_TABLE.search(recorded.statement):
+                    continue
+                plan = explain_statement(cursor, 'sqlite', recorded.statement, recorded.parameters) or []
+                statement = normalize_statement(recorded.statement)
+                statements.append({'statement': statement, 'plan': plan})
+                failures.extend(
+                    f'{problem} in: {statement}' for problem in check_plan(statement, plan, hot_path.expected_plans)
+                )
+                plan_text.extend(plan)
+
+            for pattern in hot_path.expected_plans:
+                if not any(re.search(pattern, detail) for detail in plan_text):
+                    failures.append(f'no plan step matches /{pattern}/')
+            results.append(PlanResult(hot_path.name, statements, failures))
+    finally:
+        cursor.close()
+        db.session.rollback()
+    return results
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Request timing
+Đo số câu SQL, thời gian database và thời gian serialize JSON của từng request,
+trả về qua header Server-Timing và một dòng log JSON. Thời gian database tính từ
+before_cursor_execute đến after_cursor_execute (chưa gồm fetch dòng kết quả).
+
+Bật bằng config SQL_TIMING (biến môi trường SQL_TIMING=1). Khi tắt, không listener
+nào được đăng ký nên không tốn gì thêm cho mỗi câu lệnh hay request.
+"""
+
+import json
+import logging
+from contextvars import ContextVar
+from time import perf_counter
+from flask import g, request
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+from services.request_user import request_user_id
+
+logger = logging.getLogger('expense_tracker.request_timing')
+
+# Số liệu của request hiện tại; None ngoài request (CLI, thread nền) nên không bị tính
+_current_timing = ContextVar('request_timing', default=None)
+
+
+class RequestTiming:
+    __slots__ = ('started', 'queries', 'db_seconds', 'serialize_seconds')
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.serialize_seconds = 0.0
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider mặc định của Flask, cộng thời gian dumps vào request hiện tại"""
+
+    def dumps(self, obj, **kwargs):
+        timing = _current_timing.get()
+        if timing is None:
+            return super().dumps(obj, **kwargs)
+        start = perf_counter()
+        try:
+            return super().dumps(obj, **kwargs)
+        finally:
+            timing.serialize_seconds += perf_counter() - start
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_timing.get() is not None:
+        context.request_timing_start = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    timing = _current_timing.get()
+    started = getattr(context, 'request_timing_start', None)
+    if timing is not None and started is not None:
+        timing.queries += 1
+        timing.db_seconds += perf_counter() - started
+
+
+def _start_timing():
+    g.request_timing_token = _current_timing.set(RequestTiming())
+
+
+def _finish_timing(response):
+    timing = _current_timing.get()
+    if timing is None:
+        return response
+
+    total_ms = (perf_counter() - timing.started) * 1000
+    db_ms = timing.db_seconds * 1000
+    serialize_ms = timing.serialize_seconds * 1000
+    response.headers['Server-Timing'] = (
+        f'db;dur={db_ms:.1f};desc="{timing.queries} queries", '
+        f'serialize;dur={serialize_ms:.1f}, '
+        f'app;dur={total_ms:.1f}'
+    )
+
+    logger.info(json.dumps({
+        'event': 'request_timing',
+        'method': request.method,
+        'path': request.path,
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        # Không ép load / refresh user chỉ để ghi log: câu SQL đó sẽ bị tính vào request
+        'user_id': request_user_id(),
+        'db_queries': timing.queries,
+        'db_ms': round(db_ms, 2),
+        'serialize_ms': round(serialize_ms, 2),
+        'python_ms': round(total_ms - db_ms - serialize_ms, 2),
+        'total_ms': round(total_ms, 2),
+    }))
+    return response
+
+
+def _reset_timing(exc=None):
+    token = g.pop('request_timing_token', None)
+    if token is not None:
+        _current_timing.reset(token)
+
+
+def init_request_timing(app, engine):
+    """Đăng ký listener SQLAlchemy và hook request nếu SQL_TIMING được bật"""
+    if not app.config.get('SQL_TIMING'):
+        return False
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    app.json = TimedJSONProvider(app)
+    app.before_request(_start_timing)
+    app.after_request(_finish_timing)
+    app.teardown_request(_reset_timing)
+
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    return True
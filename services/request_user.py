@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+"""
+Request user
+Id của user đã đăng nhập cho log / số liệu của request mà không chạy câu SQL nào.
+"""
+
+from flask import g, has_request_context
+from sqlalchemy import inspect
+
+
+def request_user_id():
+    """Id của user Flask-Login đã load trong request hiện tại, None nếu chưa load.
+
+    Không ép load user và đọc id từ identity key của SQLAlchemy thay vì user.id: sau khi request
+    commit, instance bị expire và đọc user.id sẽ chạy một SELECT (kể cả từ bên trong event
+    before/after_cursor_execute).
+    """
+    if not has_request_context():
+        return None
+    user = g.get('_login_user')
+    state = inspect(user, raiseerr=False) if user is not None else None
+    if state is None or state.identity is None:
+        # AnonymousUserMixin, hoặc instance chưa được lưu
+        return None
+    return state.identity[0]
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""
+Result Cache
+Cache kết quả tính toán theo (key, version) trong bộ nhớ tiến trình, kiểu stale-while-revalidate:
+khi version đổi, trả ngay kết quả cũ và tính lại ở thread nền.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from flask import current_app
+
+FRESH = 'fresh'
+STALE = 'stale'
+MISS = 'miss'
+
+
+class VersionedResultCache:
+    """Lưu {key: (version, value)}; chỉ một lần tính lại nền cho mỗi key tại một thời điểm"""
+
+    def __init__(self, name, max_entries=10000, workers=1):
+        self.name = name
+        self.max_entries = max_entries
+        self.workers = workers
+        self._entries = {}
+        self._refreshing = set()
+        self._lock = Lock()
+        self._executor = None
+
+    def get(self, key, version, compute):
+        """Trả về (value, state).
+
+        FRESH: version khớp. STALE: có kết quả của version cũ, đã lên lịch tính lại.
+        MISS: chưa có gì, compute() chạy ngay trong request.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is not None:
+            cached_version, value = entry
+            if cached_version == version:
+                return value, FRESH
+            self._schedule_refresh(key, version, compute)
+            return value, STALE
+
+        value = compute()
+        self._store(key, version, value)
+        return value, MISS
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _store(self, key, version, value):
+        with self._lock:
+            if key not in self._entries and len(self._entries) >= self.max_entries:
+                # Bỏ key cũ nhất (dict giữ thứ tự thêm vào)
+                self._entries.pop(next(iter(self._entries)))
+            self._entries[key] = (version, value)
+
+    def _schedule_refresh(self, key, version, compute):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix=f'{self.name}-refresh'
+                )
+        app = current_app._get_current_object()
+        self._executor.submit(self._refresh, app, key, version, compute)
+
+    def _refresh(self, app, key, version, compute):
+        """Chạy trong thread nền với app context riêng"""
+        try:
+            with app.app_context():
+                self._store(key, version, compute())
+        except Exception as e:
+            print(f"{self.name} refresh failed for {key}: {str(e)}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
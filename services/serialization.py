@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+Serialization helpers
+Chuyển danh sách giao dịch sang dict mà không lazy-load category / user cho từng dòng
+"""
+
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.util import identity_key
+from app import db
+from models.transaction import Transaction
+from models.category import Category
+from models.user import User
+from services.category_cache import get_category_map
+
+# Số id tối đa trong một mệnh đề IN (giới hạn biến của SQLite)
+IN_CHUNK_SIZE = 500
+
+
+def transaction_eager_options(include_user=True):
+    """Tùy chọn query để nạp sẵn category (và user) cùng giao dịch"""
+    options = [joinedload(Transaction.category)]
+    if include_user:
+        options.append(joinedload(Transaction.user))
+    return options
+
+
+def load_by_ids(model, ids):
+    """Nạp các object theo id: lấy từ identity map nếu có, phần còn lại bằng các truy vấn IN"""
+    found = {}
+    missing = []
+    for object_id in ids:
+        obj = db.session.identity_map.get(identity_key(model, object_id))
+        if obj is not None:
+            found[object_id] = obj
+        else:
+            missing.append(object_id)
+
+    for start in range(0, len(missing), IN_CHUNK_SIZE):
+        chunk = missing[start:start + IN_CHUNK_SIZE]
+        for obj in model.query.filter(model.id.in_(chunk)):
+            found[obj.id] = obj
+    return found
+
+
+def serialize_transactions(transactions):
+    """Danh sách Transaction.to_dict() với category (từ cache) và user được nạp theo lô"""
+    categories = dict(get_category_map())
+    missing = {t.category_id for t in transactions} - categories.keys()
+    if missing:
+        # Danh mục vừa thêm ở worker khác, cache chưa hết hạn
+        categories.update(load_by_ids(Category, missing))
+    users = load_by_ids(User, {t.user_id for t in transactions})
+    return [t.to_dict(categories=categories, users=users) for t in transactions]
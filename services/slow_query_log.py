@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Slow query log
+Ghi log mọi câu lệnh chạy lâu hơn ngưỡng SLOW_QUERY_MS (biến môi trường cùng tên), kèm
+câu SQL đã chuẩn hóa, endpoint, user và kế hoạch thực thi: EXPLAIN QUERY PLAN (SQLite)
+hoặc EXPLAIN (PostgreSQL). Không đặt ngưỡng thì không listener nào được đăng ký.
+"""
+
+import json
+import logging
+import threading
+from time import perf_counter
+from flask import has_request_context, request
+from sqlalchemy import event
+from services.request_user import request_user_id
+from services.sql_utils import normalize_statement, explain_statement
+
+logger = logging.getLogger('expense_tracker.slow_query')
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms):
+        self.threshold = threshold_ms / 1000
+        # Câu lệnh chạy trong lúc đang ghi log (nếu có) không được log lại, tránh đệ quy
+        self._local = threading.local()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context.slow_query_start = perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'slow_query_start', None)
+        if started is None or getattr(self._local, 'logging', False):
+            return
+        elapsed = perf_counter() - started
+        if elapsed < self.threshold:
+            return
+
+        self._local.logging = True
+        try:
+            self._log(conn, cursor, statement, parameters, executemany, elapsed)
+        finally:
+            self._local.logging = False
+
+    def _log(self, conn, cursor, statement, parameters, executemany, elapsed):
+        # Không ép load / refresh user: đọc user.id trên instance đã expire sẽ chạy SELECT
+        endpoint = request.endpoint if has_request_context() else None
+        plan = None if executemany else explain_statement(cursor, conn.dialect.name, statement, parameters)
+        logger.warning(json.dumps({
+            'event': 'slow_query',
+            'duration_ms': round(elapsed * 1000, 2),
+            'statement': normalize_statement(statement),
+            'endpoint': endpoint,
+            'user_id': request_user_id(),
+            'query_plan': plan,
+        }, ensure_ascii=False))
+
+
+def init_slow_query_log(app, engine):
+    """Đăng ký listener nếu SLOW_QUERY_MS được đặt"""
+    threshold_ms = app.config.get('SLOW_QUERY_MS')
+    if threshold_ms is None:
+        return None
+
+    slow_query_log = SlowQueryLog(threshold_ms)
+    event.listen(engine, 'before_cursor_execute', slow_query_log.before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', slow_query_log.after_cursor_execute)
+
+    if not logger.handlers and not logging.getLogger().handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+    return slow_query_log
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+SQL utilities
+Chuẩn hóa câu SQL và lấy kế hoạch thực thi, dùng chung cho slow query log,
+query budget và kiểm tra query plan.
+"""
+
+import re
+
+# Danh sách tham số của IN (...) mở rộng theo số phần tử: gom về một dạng
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*,)+\s*(?:\?|%s|%\(\w+\)s|:\w+)\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+EXPLAIN_PREFIXES = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+
+# Chỉ lấy kế hoạch cho các câu đọc / sửa có WHERE; EXPLAIN không chạy câu lệnh thật
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+
+def normalize_statement(statement):
+    """Câu SQL đã bỏ khoảng trắng thừa, IN (?, ?, ?) thành IN (?...)"""
+    return _IN_LIST.sub('(?...)', _WHITESPACE.sub(' ', statement).strip())
+
+
+def explain_statement(cursor, dialect_name, statement, parameters):
+    """Kế hoạch thực thi của một câu lệnh (danh sách dòng), None nếu không lấy được"""
+    prefix = EXPLAIN_PREFIXES.get(dialect_name)
+    if prefix is None or not statement.lstrip().upper().startswith(EXPLAINABLE):
+        return None
+    # Cursor mới trên cùng connection DBAPI: không đụng kết quả của câu lệnh gốc
+    # và không đi qua event của SQLAlchemy
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(prefix + statement, parameters)
+        rows = explain_cursor.fetchall()
+    except Exception as e:
+        return [f'EXPLAIN failed: {e}']
+    finally:
+        explain_cursor.close()
+    if dialect_name == 'sqlite':
+        # (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    return [row[0] for row in rows]
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Pytest fixtures
+Database SQLite tạm có dữ liệu giả lập (services.data_generator) dùng chung cho cả phiên test,
+cùng các fixture đếm câu lệnh SQL (services.query_budget).
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Config đọc DATABASE_URL lúc import nên phải đặt trước khi import app
+_TEST_DIR = tempfile.mkdtemp(prefix='expense_tracker_tests_')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}"
+os.environ['EXPORT_FOLDER'] = _TEST_DIR
+
+from services.query_budget import QueryBudget, QueryRecorder  # noqa: E402
+
+TEST_USERS = 3
+TEST_TRANSACTIONS = 30000
+
+
+@pytest.fixture(scope='session')
+def app():
+    from app import create_app, db
+    from services.data_generator import generate_dataset
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        generate_dataset(users=TEST_USERS, transactions=TEST_TRANSACTIONS, seed=7)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    shutil.rmtree(_TEST_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login_client(app, user_id):
+    """Test client đã đăng nhập sẵn bằng session của Flask-Login"""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+@pytest.fixture
+def login_as():
+    """Trả về login_client: `login_as(app, user_id)` cho app khác app chung"""
+    return login_client
+
+
+@pytest.fixture
+def user_client(app):
+    """Client của user có nhiều giao dịch nhất"""
+    from services.query_plans import heaviest_user_id
+    with app.app_context():
+        user_id = heaviest_user_id()
+    return login_client(app, user_id)
+
+
+@pytest.fixture
+def admin_client(app):
+    from models.user import User
+    with app.app_context():
+        admin_id = User.query.filter_by(is_admin=True).order_by(User.id).first().id
+    return login_client(app, admin_id)
+
+
+@pytest.fixture
+def instrumented_app(app, monkeypatch):
+    """Tạo app thứ hai trên cùng database với cấu hình đo đạc riêng (SQL_TIMING, SLOW_QUERY_MS).
+
+    Các listener / hook này chỉ được đăng ký trong create_app nên không bật được trên app chung.
+    """
+    from app import create_app, db
+    from config import config
+    created = []
+
+    def make(**settings):
+        for key, value in settings.items():
+            monkeypatch.setattr(config['development'], key, value)
+        instrumented = create_app('development')
+        instrumented.config['TESTING'] = True
+        created.append(instrumented)
+        return instrumented
+
+    yield make
+    for instrumented in created:
+        with instrumented.app_context():
+            db.engine.dispose()
+
+
+@pytest.fixture
+def add_transaction(app, user_client):
+    """Thêm giao dịch chi tiêu hôm nay qua API (tăng data_version), xóa lại sau test"""
+    from models.category import Category
+    created = []
+
+    def add(amount=12345):
+        with app.app_context():
+            category_id = Category.query.filter_by(type='expense').order_by(Category.id).first().id
+        response = user_client.post('/api/transactions', json={
+            'amount': amount, 'type': 'expense', 'category_id': category_id,
+            'description': 'test', 'date': date.today().isoformat(),
+        })
+        assert response.status_code == 201
+        created.append(response.get_json()['id'])
+        return created[-1]
+
+    yield add
+    for transaction_id in created:
+        assert user_client.delete(f'/api/transactions/{transaction_id}').status_code == 204
+
+
+@pytest.fixture
+def query_budget():
+    """Trả về QueryBudget: `with query_budget(5): ...`"""
+    return QueryBudget
+
+
+@pytest.fixture
+def query_recorder():
+    """QueryRecorder ghi mọi câu lệnh trong suốt test"""
+    with QueryRecorder() as recorder:
+        yield recorder
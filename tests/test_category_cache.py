@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+"""Cache danh mục: version đổi và danh sách được nạp lại khi danh mục thay đổi"""
+
+from app import db
+from models.category import Category
+from services.category_cache import get_categories_version, invalidate_categories
+
+ETAG_URL = '/api/stats/overview'
+
+
+def test_category_change_invalidates_cache(app, admin_client, user_client):
+    listed = admin_client.get('/api/categories')
+    version = listed.headers['ETag'].strip('"')
+    assert version == get_categories_version()
+    assert admin_client.get('/api/categories', headers={'If-None-Match': version}).status_code == 304
+    user_etag = user_client.get(ETAG_URL).headers['ETag']
+
+    response = admin_client.post('/api/categories', json={'name': 'Cache test', 'type': 'expense'})
+    assert response.status_code == 201
+    category_id = response.get_json()['id']
+    try:
+        relisted = admin_client.get('/api/categories', headers={'If-None-Match': version})
+        assert relisted.status_code == 200
+        assert category_id in [category['id'] for category in relisted.get_json()]
+        # ETag dữ liệu user gồm cả version danh mục
+        assert user_client.get(ETAG_URL, headers={'If-None-Match': user_etag}).status_code == 200
+    finally:
+        with app.app_context():
+            db.session.delete(db.session.get(Category, category_id))
+            db.session.commit()
+        invalidate_categories()
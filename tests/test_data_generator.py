@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""Dữ liệu giả lập: đúng số giao dịch yêu cầu, không để lại PRAGMA nạp nhanh trong pool"""
+
+import pytest
+from app import db
+from models.monthly_rollup import UserMonthlyRollup
+from models.transaction import Transaction
+from models.user import User
+from services.data_generator import generate_dataset
+
+SEED = 9001
+
+
+@pytest.fixture
+def generated_users(app):
+    """Xóa user và giao dịch do test tạo (username gen<SEED>_*)"""
+    with app.app_context():
+        yield
+        db.session.rollback()
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.username.like(f'gen{SEED}\\_%', escape='\\'))]
+        Transaction.query.filter(Transaction.user_id.in_(user_ids)).delete(synchronize_session=False)
+        UserMonthlyRollup.query.filter(UserMonthlyRollup.user_id.in_(user_ids)).delete(synchronize_session=False)
+        User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def test_generates_requested_transaction_count(generated_users):
+    # 4 user x 24 tháng = 96 khoản lương, nhiều hơn số giao dịch yêu cầu
+    stats = generate_dataset(users=4, transactions=50, months=24, seed=SEED)
+    assert stats['transactions'] == 50
+
+    user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.username.like(f'gen{SEED}\\_%', escape='\\'))]
+    assert len(user_ids) == 4
+    assert Transaction.query.filter(Transaction.user_id.in_(user_ids)).count() == 50
+    assert sum(UserMonthlyRollup.count_transactions(user_id) for user_id in user_ids) == 50
+
+
+def test_pool_connections_keep_synchronous(generated_users):
+    generate_dataset(users=1, transactions=10, months=2, seed=SEED)
+    db.session.commit()
+
+    # Lấy cùng lúc mọi connection đang rảnh trong pool để kiểm tra từng cái
+    connections = [db.engine.connect() for _ in range(db.engine.pool.checkedin())]
+    try:
+        assert connections
+        for connection in connections:
+            # 0 = OFF: connection nạp dữ liệu không được quay lại pool
+            assert connection.exec_driver_sql('PRAGMA synchronous').scalar() != 0
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def test_same_seed_twice_is_rejected(generated_users):
+    generate_dataset(users=1, transactions=10, months=2, seed=SEED)
+    with pytest.raises(RuntimeError, match=f'seed {SEED}'):
+        generate_dataset(users=1, transactions=10, months=2, seed=SEED)
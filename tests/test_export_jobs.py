@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""Job xuất chạy nền: vòng đời, endpoint trạng thái, tải lại từng phần (Range) và lỗi"""
+
+import os
+import time
+
+import pytest
+
+JOB_TIMEOUT = 60
+
+
+def _wait_for_job(client, status_url):
+    deadline = time.monotonic() + JOB_TIMEOUT
+    while True:
+        job = client.get(status_url).get_json()
+        if job['status'] in ('done', 'failed'):
+            return job
+        if time.monotonic() > deadline:
+            pytest.fail(f'Export job still {job["status"]} after {JOB_TIMEOUT}s')
+        time.sleep(0.1)
+
+
+def test_export_job_lifecycle_and_range_download(user_client):
+    response = user_client.post('/api/exports', json={'format': 'xlsx'})
+    assert response.status_code == 202
+    job = response.get_json()
+    assert job['status'] in ('queued', 'running', 'done')
+
+    job = _wait_for_job(user_client, job['status_url'])
+    assert job['status'] == 'done', job['error']
+    assert job['progress_percentage'] == 100.0
+    assert job['processed_rows'] == job['total_rows'] > 0
+    assert job['download_url']
+
+    full = user_client.get(job['download_url'])
+    assert full.status_code == 200
+    assert full.headers['Accept-Ranges'] == 'bytes'
+    content = full.get_data()
+    assert len(content) == job['file_size']
+    assert content[:2] == b'PK'  # xlsx là file zip
+
+    # Tiếp tục tải từ giữa file như khi kết nối bị ngắt
+    middle = len(content) // 2
+    partial = user_client.get(job['download_url'], headers={'Range': f'bytes={middle}-'})
+    assert partial.status_code == 206
+    assert partial.headers['Content-Range'] == f'bytes {middle}-{len(content) - 1}/{len(content)}'
+    assert partial.get_data() == content[middle:]
+
+
+def test_export_status_is_private(user_client, admin_client):
+    job = user_client.post('/api/exports', json={'format': 'xlsx'}).get_json()
+
+    assert admin_client.get(job['status_url']).status_code == 404
+    assert admin_client.get(f"{job['status_url']}/download").status_code == 404
+    _wait_for_job(user_client, job['status_url'])
+
+
+def test_export_unsupported_format(user_client):
+    response = user_client.post('/api/exports', json={'format': 'pdf'})
+    assert response.status_code == 400
+
+
+def test_export_job_failure_is_recorded(app, user_client, tmp_path, monkeypatch):
+    # Thư mục xuất nằm dưới một file thường: os.makedirs lỗi trước khi ghi dòng nào
+    blocker = tmp_path / 'not-a-directory'
+    blocker.write_text('')
+    monkeypatch.setitem(app.config, 'EXPORT_FOLDER', os.path.join(str(blocker), 'exports'))
+
+    job = user_client.post('/api/exports', json={'format': 'xlsx'}).get_json()
+    job = _wait_for_job(user_client, job['status_url'])
+
+    assert job['status'] == 'failed'
+    assert job['error']
+    assert job['finished_at'] is not None
+    assert job['download_url'] is None
+    assert user_client.get(f"{job['status_url']}/download").status_code == 409
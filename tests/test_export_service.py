@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+"""Xuất Excel / Parquet / Arrow: độ rộng cột, từ điển danh mục gồm tên duy nhất, đọc lại được bằng pandas"""
+
+import io
+
+import pytest
+from services.export_service import (
+    HAS_PYARROW, EXPORT_HEADERS, _column_widths, write_transactions_arrow, write_transactions_parquet
+)
+from services.query_plans import heaviest_user_id
+
+requires_pyarrow = pytest.mark.skipif(not HAS_PYARROW, reason='pyarrow chưa được cài đặt')
+
+if HAS_PYARROW:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+
+def _summary(**overrides):
+    summary = {
+        'row_count': 12, 'total_income': 0.0, 'total_expense': 0.0, 'max_amount': 500000.0,
+        'min_amount': 1000.0, 'max_description': 8, 'max_category': 6,
+    }
+    summary.update(overrides)
+    return summary
+
+
+def test_column_widths_include_summary_rows():
+    widths = dict(zip(EXPORT_HEADERS, _column_widths(_summary(total_income=123456789012.5, total_expense=1.0))))
+
+    # Nhãn "Tổng thu nhập:" dài hơn mọi mô tả, tổng thu dài hơn mọi số tiền
+    assert widths['Mô tả'] >= len('Tổng thu nhập:')
+    assert widths['Số tiền (VNĐ)'] >= len(str(123456789012.5))
+
+
+def test_column_widths_without_rows_skip_summary():
+    widths = dict(zip(EXPORT_HEADERS, _column_widths(_summary(row_count=0, max_description=0))))
+    assert widths['Mô tả'] == len('Mô tả') + 2
+
+
+def _export(app, writer):
+    with app.app_context():
+        output = io.BytesIO()
+        written = writer(heaviest_user_id(), output)
+    return output.getvalue(), written
+
+
+def _read_arrow(data):
+    return pa.ipc.open_file(pa.BufferReader(data)).read_all()
+
+
+@requires_pyarrow
+def test_arrow_category_dictionary_is_unique(app):
+    data, written = _export(app, write_transactions_arrow)
+    table = _read_arrow(data)
+
+    assert table.num_rows == written
+    for chunk in table.column('category').chunks:
+        dictionary = chunk.dictionary.to_pylist()
+        assert len(dictionary) == len(set(dictionary))
+        # 'Khác' có ở cả danh mục thu và chi nhưng chỉ xuất hiện một lần trong từ điển
+        assert 'Khác' in dictionary
+    assert None not in table.column('category').to_pylist()
+
+
+@requires_pyarrow
+def test_arrow_export_loads_into_pandas(app):
+    pytest.importorskip('pandas')
+    data, written = _export(app, write_transactions_arrow)
+
+    frame = _read_arrow(data).to_pandas()
+    assert len(frame) == written
+    assert frame['category'].dtype.name == 'category'
+    assert frame['category'].notna().all()
+
+
+@requires_pyarrow
+def test_parquet_export_loads_into_pandas(app):
+    pytest.importorskip('pandas')
+    data, written = _export(app, write_transactions_parquet)
+
+    frame = pq.read_table(io.BytesIO(data)).to_pandas()
+    assert len(frame) == written
+    assert frame['category'].dtype.name == 'category'
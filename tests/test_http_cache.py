@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""ETag theo users.data_version: 304 khi khớp, ETag mới sau khi ghi"""
+
+import pytest
+
+ETAG_URL = '/api/stats/overview'
+
+
+def test_matching_etag_returns_304(user_client):
+    first = user_client.get(ETAG_URL)
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert first.headers['Cache-Control'] == 'private, no-cache'
+
+    again = user_client.get(ETAG_URL, headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.get_data() == b''
+    assert again.headers['ETag'] == etag
+
+
+def test_write_changes_etag(user_client, add_transaction):
+    before = user_client.get(ETAG_URL)
+    etag = before.headers['ETag']
+
+    add_transaction(500000)
+
+    after = user_client.get(ETAG_URL, headers={'If-None-Match': etag})
+    assert after.status_code == 200
+    assert after.headers['ETag'] != etag
+    assert after.get_json()['total_expense'] == pytest.approx(before.get_json()['total_expense'] + 500000)
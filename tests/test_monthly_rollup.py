@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""Bảng tổng hợp tháng cập nhật tăng dần phải khớp với UserMonthlyRollup.rebuild()"""
+
+from datetime import date
+
+import pytest
+from app import db
+from models.category import Category
+from models.monthly_rollup import UserMonthlyRollup
+from models.transaction import Transaction
+from models.user import User
+
+
+def _rollup_rows(user_ids):
+    rows = UserMonthlyRollup.query.filter(UserMonthlyRollup.user_id.in_(user_ids)).all()
+    return sorted(
+        (row.user_id, row.year, row.month, row.type, row.category_id,
+         round(row.total_amount, 2), row.transaction_count)
+        for row in rows
+    )
+
+
+def _assert_matches_rebuild(user_ids):
+    incremental = _rollup_rows(user_ids)
+    for user_id in user_ids:
+        UserMonthlyRollup.rebuild(user_id)
+    assert incremental == _rollup_rows(user_ids)
+
+
+@pytest.fixture
+def rollup_users(app):
+    """Hai user mới không có giao dịch, xóa cùng dữ liệu sau test"""
+    with app.app_context():
+        users = []
+        for name in ('rollup_a', 'rollup_b'):
+            user = User(username=name, email=f'{name}@example.com', full_name=name)
+            user.set_password('secret')
+            db.session.add(user)
+            users.append(user)
+        db.session.commit()
+        user_ids = [user.id for user in users]
+        yield user_ids
+
+        db.session.rollback()
+        Transaction.query.filter(Transaction.user_id.in_(user_ids)).delete(synchronize_session=False)
+        UserMonthlyRollup.query.filter(UserMonthlyRollup.user_id.in_(user_ids)).delete(synchronize_session=False)
+        User.query.filter(User.id.in_(user_ids)).delete(synchronize_session=False)
+        db.session.commit()
+
+
+def _categories(transaction_type):
+    return Category.query.filter_by(type=transaction_type).order_by(Category.id).limit(2).all()
+
+
+def _add(user_id, amount, transaction_type, category, transaction_date):
+    transaction = Transaction(user_id=user_id, amount=amount, type=transaction_type,
+                              category_id=category.id, date=transaction_date, description='rollup test')
+    db.session.add(transaction)
+    return transaction
+
+
+def test_insert_matches_rebuild(rollup_users):
+    user_id = rollup_users[0]
+    food, other = _categories('expense')
+    _add(user_id, 50000, 'expense', food, date(2024, 1, 10))
+    _add(user_id, 20000, 'expense', food, date(2024, 1, 20))
+    _add(user_id, 70000, 'expense', other, date(2024, 2, 1))
+    db.session.commit()
+
+    assert UserMonthlyRollup.count_transactions(user_id) == 3
+    _assert_matches_rebuild(rollup_users)
+
+
+def test_update_matches_rebuild(rollup_users):
+    user_id = rollup_users[0]
+    food, other = _categories('expense')
+    salary = _categories('income')[0]
+    transaction = _add(user_id, 50000, 'expense', food, date(2024, 1, 10))
+    _add(user_id, 20000, 'expense', food, date(2024, 1, 20))
+    db.session.commit()
+
+    # Đổi nhiều khóa cùng lúc trên một instance còn trong session (chưa expire)
+    transaction.amount = 80000
+    transaction.date = date(2024, 3, 5)
+    db.session.flush()
+    transaction.type = 'income'
+    transaction.category_id = salary.id
+    db.session.commit()
+
+    assert UserMonthlyRollup.totals_by_type(user_id, 2024, 1) == {'income': 0.0, 'expense': 20000.0}
+    _assert_matches_rebuild(rollup_users)
+
+    transaction.category_id = other.id
+    transaction.type = 'expense'
+    db.session.commit()
+    _assert_matches_rebuild(rollup_users)
+
+
+def test_update_expired_instance_matches_rebuild(rollup_users):
+    first_user, second_user = rollup_users
+    food = _categories('expense')[0]
+    transaction = _add(first_user, 50000, 'expense', food, date(2024, 1, 10))
+    db.session.commit()
+
+    # commit() expire mọi thuộc tính: giá trị cũ phải được nạp lại khi gán
+    assert 'user_id' not in transaction.__dict__
+    transaction.user_id = second_user
+    db.session.commit()
+
+    assert UserMonthlyRollup.count_transactions(first_user) == 0
+    assert UserMonthlyRollup.count_transactions(second_user) == 1
+    _assert_matches_rebuild(rollup_users)
+
+    db.session.expire(transaction)
+    transaction.amount = 65000
+    transaction.date = date(2023, 12, 31)
+    db.session.commit()
+    assert UserMonthlyRollup.totals_by_type(second_user, 2024, 1)['expense'] == 0.0
+    _assert_matches_rebuild(rollup_users)
+
+
+def test_delete_matches_rebuild(rollup_users):
+    user_id = rollup_users[0]
+    food = _categories('expense')[0]
+    kept = _add(user_id, 50000, 'expense', food, date(2024, 1, 10))
+    removed = _add(user_id, 20000, 'expense', food, date(2024, 1, 20))
+    only_in_month = _add(user_id, 30000, 'expense', food, date(2024, 2, 1))
+    db.session.commit()
+
+    db.session.delete(removed)
+    db.session.delete(only_in_month)
+    db.session.commit()
+
+    assert UserMonthlyRollup.count_transactions(user_id) == 1
+    assert kept.amount == 50000
+    # Dòng tổng hợp của tháng không còn giao dịch bị xóa
+    assert UserMonthlyRollup.query.filter_by(user_id=user_id, year=2024, month=2).count() == 0
+    _assert_matches_rebuild(rollup_users)
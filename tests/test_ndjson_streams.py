@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+"""Stream NDJSON trả về cùng dữ liệu và cùng thứ tự với danh sách JSON của cùng endpoint"""
+
+import json
+
+
+def _stream_ids(response):
+    assert response.mimetype == 'application/x-ndjson'
+    return [json.loads(line)['id'] for line in response.get_data(as_text=True).splitlines()]
+
+
+def test_admin_stream_matches_list_order(admin_client):
+    listed = admin_client.get('/api/admin/transactions')
+    streamed = admin_client.get('/api/admin/transactions?stream=ndjson')
+    assert listed.status_code == streamed.status_code == 200
+
+    transactions = listed.get_json()
+    assert [transaction['id'] for transaction in transactions] == _stream_ids(streamed)
+    # Mới tạo trước: (created_at, id) giảm dần
+    keys = [(transaction['created_at'], transaction['id']) for transaction in transactions]
+    assert keys == sorted(keys, reverse=True)
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""Phân trang theo con trỏ trên các trang HTML: đi theo next_cursor, cursor hỏng bị từ chối"""
+
+import re
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+from models.transaction import Transaction
+from services.pagination import decode_cursor
+
+BAD_CURSOR = 'not-a-cursor'
+
+PAGES = [
+    ('user_client', '/transactions/', Transaction.date),
+    ('admin_client', '/admin/transactions', Transaction.created_at),
+]
+
+
+def _next_cursor(html):
+    match = re.search(r'[?&;]cursor=([A-Za-z0-9_-]+)', html)
+    return match.group(1) if match else None
+
+
+@pytest.mark.parametrize('client_fixture, url, sort_column', PAGES)
+def test_follow_next_cursor(request, client_fixture, url, sort_column):
+    client = request.getfixturevalue(client_fixture)
+
+    first = client.get(f'{url}?mode=cursor')
+    assert first.status_code == 200
+    first_cursor = _next_cursor(first.get_data(as_text=True))
+    assert first_cursor is not None
+
+    second = client.get(f'{url}?cursor={first_cursor}')
+    assert second.status_code == 200
+    second_cursor = _next_cursor(second.get_data(as_text=True))
+    assert second_cursor is not None
+
+    # Trang sau bắt đầu sau dòng cuối của trang trước theo thứ tự (giá trị sắp xếp, id) giảm dần
+    assert decode_cursor(second_cursor, sort_column) < decode_cursor(first_cursor, sort_column)
+
+
+@pytest.mark.parametrize('client_fixture, url, sort_column', PAGES)
+def test_invalid_cursor_is_rejected(request, client_fixture, url, sort_column):
+    client = request.getfixturevalue(client_fixture)
+
+    response = client.get(f'{url}?cursor={BAD_CURSOR}&type=expense')
+    assert response.status_code == 302
+    location = urlsplit(response.headers['Location'])
+    assert location.path == url
+    assert parse_qs(location.query) == {'mode': ['cursor'], 'type': ['expense']}
+
+    with client.session_transaction() as session:
+        assert [category for category, _message in session['_flashes']] == ['danger']
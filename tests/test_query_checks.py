@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Ngân sách câu lệnh và kế hoạch truy vấn của các endpoint nóng (cùng danh sách với `flask check-query-plans`)"""
+
+import pytest
+from services.query_plans import QUERY_BUDGETS, HOT_PATHS, check_query_budgets, check_hot_paths
+
+
+@pytest.mark.parametrize('path', QUERY_BUDGETS, ids=lambda path: path.name)
+def test_query_budget(app, path):
+    with app.app_context():
+        [result] = check_query_budgets(app, budgets=[path])
+    assert not result.failures, '\n'.join(result.failures)
+
+
+@pytest.mark.parametrize('hot_path', HOT_PATHS, ids=lambda hot_path: hot_path.name)
+def test_query_plan(app, hot_path):
+    with app.app_context():
+        [result] = check_hot_paths(app, hot_paths=[hot_path])
+    assert not result.failures, '\n'.join(result.failures)
+
+
+def test_dashboard_service_query_budget(app, query_budget):
+    from services.dashboard_service import DashboardService
+    from services.query_plans import heaviest_user_id
+
+    with app.app_context():
+        user_id = heaviest_user_id()
+        with query_budget(DashboardService.QUERY_BUDGET):
+            DashboardService.get_dashboard_data(user_id)
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Server-Timing / log của request không tự chạy thêm câu SQL nào"""
+
+import json
+import logging
+from datetime import date
+
+from flask_login import login_user
+from app import db
+from models.category import Category
+from models.user import User
+from services.query_budget import QueryRecorder
+from services.query_plans import heaviest_user_id
+from services.request_user import request_user_id
+
+
+def _user_selects(recorder):
+    return [
+        recorded.statement for recorded in recorder.statements
+        if recorded.statement.lstrip().startswith('SELECT') and 'FROM users' in recorded.statement
+    ]
+
+
+def test_write_request_timing_does_not_reload_user(instrumented_app, login_as, caplog):
+    timed_app = instrumented_app(SQL_TIMING=True)
+    with timed_app.app_context():
+        user_id = heaviest_user_id()
+        category_id = Category.query.filter_by(type='expense').order_by(Category.id).first().id
+    client = login_as(timed_app, user_id)
+
+    created = client.post('/api/transactions', json={
+        'amount': 1000, 'type': 'expense', 'category_id': category_id,
+        'description': 'test', 'date': date.today().isoformat(),
+    })
+    assert created.status_code == 201
+
+    # DELETE không đụng tới user sau commit: mọi SELECT users sau câu load đầu là do hook đo
+    with caplog.at_level(logging.INFO, logger='expense_tracker.request_timing'), QueryRecorder() as recorder:
+        response = client.delete(f"/api/transactions/{created.get_json()['id']}")
+    assert response.status_code == 204
+    assert 'Server-Timing' in response.headers
+
+    assert len(_user_selects(recorder)) == 1
+    logged = [json.loads(record.getMessage()) for record in caplog.records
+              if record.name == 'expense_tracker.request_timing']
+    assert logged[-1]['user_id'] == user_id
+    assert logged[-1]['db_queries'] == recorder.count
+
+
+def test_request_user_id_without_sql(app):
+    with app.test_request_context('/'):
+        assert request_user_id() is None
+
+        user_id = heaviest_user_id()
+        login_user(db.session.get(User, user_id))
+        db.session.commit()  # expire mọi thuộc tính của user
+
+        with QueryRecorder() as recorder:
+            assert request_user_id() == user_id
+        assert recorder.count == 0
+        db.session.rollback()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""Cache kết quả theo version: trả bản cũ trong lúc tính lại ở thread nền"""
+
+import threading
+
+from services.result_cache import VersionedResultCache, FRESH, STALE, MISS
+
+
+def test_stale_prediction_served_without_etag(user_client, add_transaction):
+    assert user_client.get('/api/predict-spending').status_code == 200
+    fresh = user_client.get('/api/predict-spending')
+    assert fresh.headers['X-Cache'] == FRESH
+
+    add_transaction()
+
+    stale = user_client.get('/api/predict-spending')
+    assert stale.status_code == 200
+    assert stale.headers['X-Cache'] == STALE
+    assert stale.headers['Cache-Control'] == 'no-store'
+    assert 'ETag' not in stale.headers
+    assert stale.get_json() == fresh.get_json()
+
+
+def test_result_cache_serves_stale_while_refreshing(app):
+    cache = VersionedResultCache('test')
+    refresh_started = threading.Event()
+    release_refresh = threading.Event()
+    calls = []
+
+    def slow_compute():
+        calls.append('v2')
+        refresh_started.set()
+        assert release_refresh.wait(10)
+        return 'v2'
+
+    with app.app_context():
+        assert cache.get('key', 1, lambda: 'v1') == ('v1', MISS)
+        assert cache.get('key', 1, slow_compute) == ('v1', FRESH)
+
+        # Version mới: trả ngay bản cũ, tính lại ở thread nền
+        assert cache.get('key', 2, slow_compute) == ('v1', STALE)
+        assert refresh_started.wait(10)
+        # Đang tính lại: vẫn trả bản cũ và không lên lịch thêm lần nữa
+        assert cache.get('key', 2, slow_compute) == ('v1', STALE)
+
+        release_refresh.set()
+        cache._executor.shutdown(wait=True)
+        assert cache.get('key', 2, slow_compute) == ('v2', FRESH)
+    assert calls == ['v2']
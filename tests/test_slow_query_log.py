@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Slow query log với ngưỡng 0 ms: mọi câu lệnh được log, request ghi vẫn chạy bình thường"""
+
+import json
+import logging
+from datetime import date
+
+from models.category import Category
+from services.query_plans import heaviest_user_id
+
+LOGGER = 'expense_tracker.slow_query'
+
+
+def test_write_requests_with_slow_log(instrumented_app, login_as, caplog):
+    logged_app = instrumented_app(SLOW_QUERY_MS=0.0)
+    with logged_app.app_context():
+        user_id = heaviest_user_id()
+        category_id = Category.query.filter_by(type='expense').order_by(Category.id).first().id
+    client = login_as(logged_app, user_id)
+
+    with caplog.at_level(logging.WARNING, logger=LOGGER):
+        created = client.post('/api/transactions', json={
+            'amount': 1000, 'type': 'expense', 'category_id': category_id,
+            'description': 'test', 'date': date.today().isoformat(),
+        })
+        assert created.status_code == 201
+        deleted = client.delete(f"/api/transactions/{created.get_json()['id']}")
+        assert deleted.status_code == 204
+
+    entries = [json.loads(record.getMessage()) for record in caplog.records if record.name == LOGGER]
+    endpoints = {entry['endpoint'] for entry in entries}
+    assert {'api.create_transaction', 'api.delete_transaction'} <= endpoints
+    assert all(entry['user_id'] in (None, user_id) for entry in entries)
+    assert any(entry['statement'].startswith('INSERT INTO transactions') for entry in entries)
+    # Câu đọc có kế hoạch EXPLAIN QUERY PLAN
+    assert any(entry['query_plan'] for entry in entries if entry['statement'].startswith('SELECT'))